@@ -0,0 +1,381 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Computes joints from the command line, without a display, and optionally
+renders their figures.
+
+The job file is a JSON list of job specifications, each an object whose keys
+are any of the configuration options (see config_file.py), such as bit_width
+or board_width, along with:
+
+name: Label for the job in the output.  Default is the name of the joint
+      file, without its extension, or else the job index.
+joint: PNG file saved by pyRouterJig, whose units, bit, boards, and spacing
+       are used in place of the options that set them.
+double_thickness: Thickness of the double board, in increments.  Default is
+                  no double board.
+double_double_thickness: Thickness of the double-double board, in
+                         increments.  Requires double_thickness.
+caul: If true, compute the caul cuts.  Default is false.
+spacing: One of 'Equally', 'Variable', or 'Edit'.  Default is 'Equally'.
+params: Object of the spacing parameter values, such as {"Fingers": 5}.
+        Parameters not given keep their defaults.  Not for Edit spacing.
+cuts: For Edit spacing, and only Edit spacing, the list of [xmin, xmax] of
+      each cut on Board-A.
+export: File name to export the figure to, at true scale.  The format is SVG
+        if the name ends in .svg, and PDF otherwise.  Requires PyQt4.
+image: PNG file name to render the figure to, min_image_width pixels wide,
+       with the joint embedded so that pyRouterJig may open it.  Requires
+       PyQt4.
+
+The figures also require a display, even though no window is shown.  On a
+server without one, run under a virtual display, such as with xvfb-run.
+
+All distances are in increments.  Options not given are set to their
+defaults; the user configuration file is not read.  For example:
+
+[{"name": "box", "board_width": 320, "params": {"Width": 24}},
+ {"bit_angle": 14, "double_thickness": 4, "spacing": "Variable", "caul": true}]
+
+The output is a tab-separated table of the cuts on every board edge, with
+the columns job, edge, cut, xmin, xmax, and passes.  The jobs are computed in
+a process pool, and written in order as they complete.  The --export and
+--image options write the figure of each job without an export or image key
+to <name>.<format>.  The --timing option writes the seconds each job spent
+computing its geometry and writing its figures.
+'''
+from __future__ import print_function
+from future.utils import lrange
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import multiprocessing
+import router
+import spacing
+import utils
+import config_file
+import serialize
+import png_file
+
+_spacings = {'Equally':spacing.Equally_Spaced, 'Variable':spacing.Variable_Spaced,\
+             'Edit':spacing.Edit_Spaced}
+
+_job_keys = ['name', 'double_thickness', 'double_double_thickness', 'caul',\
+             'spacing', 'params', 'cuts', 'export', 'joint', 'image']
+
+_defaults = None
+
+class Batch_Exception(Exception):
+    '''
+    Exception handler for job specifications
+    '''
+    def __init__(self, msg):
+        Exception.__init__(self, msg)
+        self.msg = msg
+
+    def __str__(self):
+        return self.msg
+
+class Job_Config(object):
+    '''
+    The configuration for a job: the default configuration, with the options
+    in the job specification replaced.
+    '''
+    def __init__(self, job):
+        global _defaults
+        if _defaults is None:
+            _defaults = config_file.default_config()
+        for (k, v) in vars(_defaults).items():
+            if not k.startswith('_'):
+                setattr(self, k, v)
+        for (k, v) in job.items():
+            if k not in _job_keys:
+                if not hasattr(self, k):
+                    raise Batch_Exception('unknown option "%s"' % k)
+                setattr(self, k, v)
+
+def check_increments(name, value):
+    '''
+    Raises a Batch_Exception if value, the distance name, is not a whole
+    number of increments
+    '''
+    if isinstance(value, float) and value != int(value):
+        raise Batch_Exception('%s = %s must be a whole number of increments' % (name, value))
+
+def make_joint(job):
+    '''
+    Forms the joint from the job specification job, a dictionary.  Returns
+    the tuple (config, template, boards, bit, spacing).
+    '''
+    config = Job_Config(job)
+    if job.get('joint') is not None:
+        return read_joint(job, config)
+    for k in ['bit_width', 'bit_depth', 'board_width']:
+        check_increments(k, getattr(config, k))
+    for k in ['double_thickness', 'double_double_thickness']:
+        check_increments(k, job.get(k))
+    for c in job.get('cuts', []):
+        for x in c:
+            check_increments('cut %s' % c, x)
+    units = utils.Units(config.increments_per_inch, config.metric)
+    bit = router.Router_Bit(units, config.bit_width, config.bit_depth, config.bit_angle)
+    boards = []
+    for i in lrange(4):
+        boards.append(router.Board(bit, width=config.board_width))
+    boards[2].set_active(False)
+    boards[3].set_active(False)
+    if job.get('double_thickness') is not None:
+        boards[2].set_active(True)
+        boards[2].set_height(bit, job['double_thickness'])
+        if job.get('double_double_thickness') is not None:
+            boards[3].set_active(True)
+            boards[3].set_height(bit, job['double_double_thickness'])
+    elif job.get('double_double_thickness') is not None:
+        raise Batch_Exception('double_double_thickness requires double_thickness')
+    template = router.Incra_Template(units, boards, job.get('caul', False))
+
+    name = job.get('spacing', 'Equally')
+    if name not in _spacings:
+        raise Batch_Exception('unknown spacing "%s"' % name)
+    sp = _spacings[name](bit, boards, config)
+    if name == 'Edit':
+        if 'cuts' not in job:
+            raise Batch_Exception('Edit spacing requires cuts')
+        if 'params' in job:
+            raise Batch_Exception('Edit spacing takes cuts, rather than params')
+        xmin = [c[0] for c in job['cuts']]
+        xmax = [c[1] for c in job['cuts']]
+        sp.set_cuts(router.Cut_Array(xmin, xmax))
+    else:
+        if 'cuts' in job:
+            raise Batch_Exception('cuts requires Edit spacing')
+        for (k, v) in job.get('params', {}).items():
+            if k not in sp.params:
+                raise Batch_Exception('unknown %s parameter "%s"' % (name, k))
+            p = sp.params[k]
+            if (p.vMin is not None and v < p.vMin) or (p.vMax is not None and v > p.vMax):
+                raise Batch_Exception('%s parameter %s = %s must be in [%s, %s]'\
+                                      % (name, k, v, p.vMin, p.vMax))
+            p.v = v
+        sp.set_cuts()
+    return (config, template, boards, bit, sp)
+
+def read_joint(job, config):
+    '''
+    Forms the joint saved in the image file of the job specification job.
+    Returns the tuple (config, template, boards, bit, spacing).
+    '''
+    filename = job['joint']
+    try:
+        with open(filename, 'rb') as fd:
+            s = png_file.read_text(fd, 'pyRouterJig')
+    except IOError:
+        raise Batch_Exception('unable to open joint file %s' % filename)
+    except png_file.PNG_Exception as e:
+        raise Batch_Exception('%s: %s' % (filename, e))
+    if not s:
+        raise Batch_Exception('%s does not contain pyRouterJig data' % filename)
+    try:
+        (bit, boards, sp, sp_type) = serialize.unserialize(s, config)
+    except (EOFError, pickle.UnpicklingError):
+        raise Batch_Exception('unable to read the joint in %s' % filename)
+    template = router.Incra_Template(bit.units, boards, job.get('caul', False))
+    return (config, template, boards, bit, sp)
+
+def job_name(index, job):
+    '''
+    Returns the name of the job specification job, whose index is index
+    '''
+    if job.get('name') is not None:
+        return job['name']
+    if job.get('joint') is not None:
+        return os.path.splitext(os.path.basename(job['joint']))[0]
+    return index
+
+def joint_edges(geom):
+    '''
+    Returns a list of (edge, cuts) for each edge of the joint geometry geom,
+    where edge is the edge name and cuts is a Cut_Array.
+    '''
+    boards = geom.boards
+    edges = [('A-bottom', boards[0].bottom_cuts)]
+    if boards[3].active:
+        edges.append(('double-double-top', boards[3].top_cuts))
+        edges.append(('double-double-bottom', boards[3].bottom_cuts))
+    if boards[2].active:
+        edges.append(('double-top', boards[2].top_cuts))
+        edges.append(('double-bottom', boards[2].bottom_cuts))
+    edges.append(('B-top', boards[1].top_cuts))
+    if geom.caul_top is not None:
+        edges.append(('caul-top', geom.caul_top))
+        edges.append(('caul-bottom', geom.caul_bottom))
+    return edges
+
+def run_job(args):
+    '''
+    Computes the job, where args is the tuple (index, job).  Returns the
+    tuple (lines, error, times), where lines are the output table rows,
+    error is None or the error message, and times are the seconds spent on
+    the geometry and on the figures.
+    '''
+    (index, job) = args
+    name = job_name(index, job)
+    times = [0.0, 0.0]
+    try:
+        t = time.time()
+        (config, template, boards, bit, sp) = make_joint(job)
+        margins = utils.Margins(8, config.separation, config.left_margin,\
+                                config.right_margin, config.bottom_margin,\
+                                config.top_margin)
+        geom = router.Joint_Geometry(template, boards, bit, sp, margins, config.caul_trim)
+        times[0] = time.time() - t
+        t = time.time()
+        if job.get('export') is not None or job.get('image') is not None:
+            # import Qt only for the jobs that need it
+            import qt_fig
+        if job.get('export') is not None:
+            qt_fig.export_figure(job['export'], template, boards, bit, sp, config)
+        if job.get('image') is not None:
+            texts = {'pyRouterJig':serialize.serialize(bit, boards, sp, config)}
+            qt_fig.render_image(job['image'], template, boards, bit, sp, config, texts)
+        times[1] = time.time() - t
+    except (Batch_Exception, router.Router_Exception, spacing.Spacing_Exception,\
+            ImportError, IOError) as e:
+        return ([], 'job %s: %s' % (name, e), times)
+    except Exception as e:
+        # report any other failure, so that the rest of the jobs still run
+        return ([], 'job %s: %s: %s' % (name, e.__class__.__name__, e), times)
+    lines = []
+    for (edge, cuts) in joint_edges(geom):
+        for (i, c) in enumerate(cuts):
+            passes = ' '.join([str(p) for p in c.passes])
+            lines.append('%s\t%s\t%d\t%d\t%d\t%s' % (name, edge, i, c.xmin, c.xmax, passes))
+    return (lines, None, times)
+
+def check_display(jobs):
+    '''
+    Raises a Batch_Exception if any of jobs paints a figure, and there is no
+    display to paint it.  If PyQt4 is missing, the jobs report it themselves.
+    '''
+    if not [job for job in jobs if job.get('export') is not None or\
+            job.get('image') is not None]:
+        return
+    try:
+        import qt_fig
+    except ImportError:
+        return
+    if not qt_fig.has_display():
+        raise Batch_Exception('figures require a display; set DISPLAY,'\
+                              ' or run under xvfb-run')
+
+def run_jobs(jobs, out, nprocs=None, chunksize=4, timing=None, errors=None):
+    '''
+    Computes the list of job specifications jobs in a pool of nprocs
+    processes, and writes the table of cuts to the file out.  If nprocs is
+    1, no pool is used.  If timing is not None, the seconds of each job are
+    written to the file timing.  The error messages are written to the file
+    errors, which defaults to standard error.  Returns the number of jobs
+    that failed.  Raises a Batch_Exception, before any job is run, if the
+    jobs paint figures without a display.
+    '''
+    if errors is None:
+        errors = sys.stderr
+    check_display(jobs)
+    args = list(enumerate(jobs))
+    pool = None
+    if nprocs == 1:
+        results = (run_job(a) for a in args)
+    else:
+        pool = multiprocessing.Pool(nprocs)
+        results = pool.imap(run_job, args, chunksize)
+    nerrors = 0
+    out.write('job\tedge\tcut\txmin\txmax\tpasses\n')
+    if timing is not None:
+        timing.write('job\tgeometry\tfigures\n')
+    try:
+        for (index, (lines, error, times)) in enumerate(results):
+            if error is not None:
+                nerrors += 1
+                print(error, file=errors)
+            for l in lines:
+                out.write(l + '\n')
+            out.flush()
+            if timing is not None:
+                timing.write('%s\t%.4f\t%.4f\n' % (job_name(index, jobs[index]),\
+                                                    times[0], times[1]))
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return nerrors
+
+def main(argv=None):
+    '''
+    Runs the command line.  Returns the exit status.
+    '''
+    parser = argparse.ArgumentParser(description='Computes the cuts and router passes'\
+                                     ' of pyRouterJig joints.')
+    parser.add_argument('jobfile', help='JSON file of job specifications')
+    parser.add_argument('-o', '--output', help='output file; default is standard output')
+    parser.add_argument('-j', '--processes', type=int, default=None,\
+                        help='number of processes; default is the number of CPUs')
+    parser.add_argument('-e', '--export', choices=['svg', 'pdf'], default=None,\
+                        help='export the figure of each job in this format')
+    parser.add_argument('-i', '--image', action='store_true',\
+                        help='render the figure of each job to a PNG file')
+    parser.add_argument('-d', '--directory', default='.',\
+                        help='directory of the figures; default is the current one')
+    parser.add_argument('-t', '--timing', help='file of the seconds spent on each job')
+    args = parser.parse_args(argv)
+    with open(args.jobfile) as fd:
+        jobs = json.load(fd)
+    for (key, fmt) in [('export', args.export), ('image', args.image and 'png')]:
+        if not fmt:
+            continue
+        for (index, job) in enumerate(jobs):
+            if job.get(key) is None:
+                name = '%s.%s' % (job_name(index, job), fmt)
+                job[key] = os.path.join(args.directory, name)
+    timing = None
+    if args.timing is not None:
+        timing = open(args.timing, 'w')
+    try:
+        check_display(jobs)
+        if args.output is None:
+            nerrors = run_jobs(jobs, sys.stdout, args.processes, timing=timing)
+        else:
+            with open(args.output, 'w') as out:
+                nerrors = run_jobs(jobs, out, args.processes, timing=timing)
+    except Batch_Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if timing is not None:
+            timing.close()
+    if nerrors > 0:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Tests for batch
+'''
+import os
+import sys
+import shutil
+import struct
+import tempfile
+import StringIO
+import unittest
+import batch
+import router
+import serialize
+import png_file
+
+try:
+    import qt_fig
+    has_qt = True
+    has_display = qt_fig.has_display()
+except ImportError:
+    has_qt = False
+    has_display = False
+
+class Batch_Test(unittest.TestCase):
+    '''
+    Tests the batch computation of joints
+    '''
+    jobs = [{'name':'a', 'board_width':320, 'params':{'Width':24}},\
+            {'bit_angle':14, 'double_thickness':4, 'spacing':'Variable', 'caul':True},\
+            {'spacing':'Edit', 'cuts':[[0, 20], [100, 140]], 'double_thickness':4,\
+             'double_double_thickness':3},\
+            {'params':{'Fingers':3}},\
+            {'bit_widht':16}]
+    def test_job(self):
+        (lines, error, times) = batch.run_job((0, self.jobs[0]))
+        self.assertEqual(error, None)
+        self.assertEqual(lines[0], 'a\tA-bottom\t0\t4\t28\t12 20')
+        (config, template, boards, bit, sp) = batch.make_joint(self.jobs[0])
+        self.assertEqual(boards[0].width, 320)
+        self.assertEqual(len([l for l in lines if '\tA-bottom\t' in l]), len(sp.cuts))
+    def test_edges(self):
+        (lines, error, times) = batch.run_job((2, self.jobs[2]))
+        edges = set([l.split('\t')[1] for l in lines])
+        self.assertEqual(len(edges), 6)
+        (lines, error, times) = batch.run_job((1, self.jobs[1]))
+        self.assertTrue('caul-bottom' in set([l.split('\t')[1] for l in lines]))
+    def test_spacing_keys(self):
+        for job in [{'cuts':[[0, 20]]}, {'spacing':'Variable', 'cuts':[[0, 20]]},\
+                    {'spacing':'Edit', 'cuts':[[0, 20]], 'params':{'Width':24}}]:
+            self.assertRaises(batch.Batch_Exception, batch.make_joint, job)
+    def test_increments(self):
+        for job in [{'board_width':320.5}, {'spacing':'Edit', 'cuts':[[0, 20.5]]}]:
+            self.assertRaises(batch.Batch_Exception, batch.make_joint, job)
+        (lines, error, times) = batch.run_job((0, {'board_width':320.0}))
+        self.assertEqual(error, None)
+    def test_errors(self):
+        for job in self.jobs[3:]:
+            (lines, error, times) = batch.run_job((0, job))
+            self.assertEqual(lines, [])
+            self.assertTrue(error.startswith('job 0: unknown'))
+    @unittest.skipUnless(has_display, 'requires PyQt4 and a display')
+    def test_export(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for (name, header) in [('b.svg', b'<?xml'), ('b.pdf', b'%PDF')]:
+                job = dict(self.jobs[1], export=os.path.join(directory, name))
+                (lines, error, times) = batch.run_job((0, job))
+                self.assertEqual(error, None)
+                self.assertTrue(os.path.getsize(job['export']) > 0)
+                with open(job['export'], 'rb') as fd:
+                    self.assertEqual(fd.read(len(header)), header)
+        finally:
+            shutil.rmtree(directory)
+    @unittest.skipIf(has_qt, 'requires PyQt4 to be missing')
+    def test_export_without_qt(self):
+        job = dict(self.jobs[1], export='b.svg')
+        (lines, error, times) = batch.run_job((0, job))
+        # the error is reported, rather than raised
+        self.assertEqual(lines, [])
+        self.assertTrue(error.startswith('job 0: '))
+        self.assertFalse(os.path.exists('b.svg'))
+    @unittest.skipUnless(has_qt and sys.platform.startswith('linux'),\
+                         'requires PyQt4 on X11')
+    def test_no_display(self):
+        display = os.environ.pop('DISPLAY', None)
+        try:
+            out = StringIO.StringIO()
+            jobs = [self.jobs[0], dict(self.jobs[1], image='b.png')]
+            # no job is run
+            self.assertRaises(batch.Batch_Exception, batch.run_jobs, jobs, out, 1)
+            self.assertEqual(out.getvalue(), '')
+            batch.run_jobs(jobs[:1], out, 1)
+        finally:
+            if display is not None:
+                os.environ['DISPLAY'] = display
+    @unittest.skipUnless(has_display, 'requires PyQt4 and a display')
+    def test_image(self):
+        directory = tempfile.mkdtemp()
+        try:
+            jobs = [dict(job, min_image_width=300, image_tile_rows=64,\
+                         image=os.path.join(directory, '%d.png' % i))\
+                    for (i, job) in enumerate(self.jobs[:3])]
+            errors = StringIO.StringIO()
+            self.assertEqual(batch.run_jobs(jobs, StringIO.StringIO(), 2, errors=errors), 0,\
+                             errors.getvalue())
+            for (i, job) in enumerate(jobs):
+                with open(job['image'], 'rb') as fd:
+                    data = fd.read(24)
+                    fd.seek(0)
+                    text = png_file.read_text(fd, 'pyRouterJig')
+                # the IHDR chunk follows the signature
+                (width, height) = struct.unpack('>II', data[16:24])
+                self.assertEqual((data[12:16], width), (b'IHDR', 300))
+                self.assertTrue(height > 0)
+                # the embedded joint has the cuts of the job
+                (config, template, boards, bit, sp) = batch.make_joint(job)
+                (bit, boards, saved, sp_type) = serialize.unserialize(text, config)
+                self.assertEqual(saved.cuts.fingerprint(), sp.cuts.fingerprint())
+        finally:
+            shutil.rmtree(directory)
+    def test_joint(self):
+        job = {'joint':os.path.join('doc', 'missing.png')}
+        self.assertEqual(batch.job_name(3, job), 'missing')
+        (lines, error, times) = batch.run_job((3, job))
+        self.assertEqual(lines, [])
+        self.assertTrue(error.startswith('job missing: '))
+    def test_joint_file(self):
+        (config, template, boards, bit, sp) = batch.make_joint(self.jobs[1])
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'b.png')
+            with open(filename, 'wb') as fd:
+                writer = png_file.PNG_Writer(fd, 1, 1)
+                writer.write_text('pyRouterJig', serialize.serialize(bit, boards, sp, config))
+                writer.write_rows([b'\0' * 3])
+                writer.close()
+            job = {'joint':filename, 'caul':True}
+            (lines, error, times) = batch.run_job((0, job))
+            self.assertEqual(error, None)
+            (ref, error, times) = batch.run_job((0, dict(self.jobs[1], name='b')))
+            self.assertEqual(lines, ref)
+        finally:
+            shutil.rmtree(directory)
+    def test_timing(self):
+        (out, timing, errors) = (StringIO.StringIO(), StringIO.StringIO(), StringIO.StringIO())
+        self.assertEqual(batch.run_jobs(self.jobs, out, 1, timing=timing, errors=errors), 2)
+        self.assertEqual(errors.getvalue(), 'job 3: unknown Equally parameter "Fingers"\n'\
+                         'job 4: unknown option "bit_widht"\n')
+        rows = [l.split('\t') for l in timing.getvalue().split('\n')[1:-1]]
+        self.assertEqual([r[0] for r in rows], ['a', '1', '2', '3', '4'])
+        self.assertTrue(float(rows[1][1]) > 0)
+    def test_bad_jobs(self):
+        jobs = [{'board_width':'abc'},\
+                {'board_width':64, 'bit_width':16, 'spacing':'Variable'},\
+                self.jobs[0]]
+        for nprocs in [1, 2]:
+            (out, errors) = (StringIO.StringIO(), StringIO.StringIO())
+            self.assertEqual(batch.run_jobs(jobs, out, nprocs, errors=errors), 2)
+            self.assertEqual(len(errors.getvalue().split('\n')), 3)
+            (lines, error, times) = batch.run_job((0, self.jobs[0]))
+            self.assertEqual(out.getvalue().split('\n')[1:-1], lines)
+        (lines, error, times) = batch.run_job((1, jobs[1]))
+        self.assertEqual(lines, [])
+        self.assertTrue(error.startswith('job 1: '))
+    def test_pool(self):
+        out = [StringIO.StringIO(), StringIO.StringIO()]
+        errors = StringIO.StringIO()
+        self.assertEqual(batch.run_jobs(self.jobs[:3], out[0], 1, errors=errors), 0)
+        self.assertEqual(batch.run_jobs(self.jobs[:3] * 4, out[1], 2, errors=errors), 0)
+        rows = out[0].getvalue().split('\n')
+        self.assertEqual(out[1].getvalue().split('\n')[:len(rows) - 1], rows[:-1])
+        self.assertEqual(errors.getvalue(), '')
+
+if __name__ == '__main__':
+    unittest.main()
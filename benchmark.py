@@ -0,0 +1,213 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Benchmarks for pyRouterJig.  Run as
+
+    python benchmark.py [name ...]
+
+where each name is one of the benchmarks below, without the bench_ prefix.
+With no names, all benchmarks are run.
+'''
+from __future__ import print_function
+from future.utils import lrange
+
+import sys
+import timeit
+import router
+import spacing
+import utils
+import serialize
+
+class Config(object):
+    '''
+    The configuration attributes needed by the spacing algorithms
+    '''
+    min_finger_width = 2
+    debug = False
+    undo_limit = 100000
+
+def best_time(f, repeat=3):
+    '''Returns the fastest time, in seconds, of repeat calls to f()'''
+    times = []
+    for i in lrange(repeat):
+        t = timeit.default_timer()
+        f()
+        times.append(timeit.default_timer() - t)
+    return min(times)
+
+def make_boards(bit, width):
+    '''Returns the four boards, of width increments, with only A and B active'''
+    boards = [router.Board(bit, width=width) for i in lrange(4)]
+    boards[2].set_active(False)
+    boards[3].set_active(False)
+    return boards
+
+def bench_variable_spacing():
+    '''
+    Compares selecting every number of fingers of a Variable_Spaced, computing
+    each layout per call, as set_cuts() did, with the table of layouts from
+    compute_layouts().
+    '''
+    units = utils.Units()
+    bit = router.Router_Bit(units, 16, 24)
+    print('board width  fingers  per call (s)  table (s)  lookups (s)')
+    for width in [480, 1920, 7680, 15360]:
+        sp = spacing.Variable_Spaced(bit, make_boards(bit, width), Config())
+        deltaP = bit.width - sp.eff_width
+        deltaM = utils.my_round(sp.eff_width - bit.neck)
+        fingers = lrange(sp.mMin, sp.mMax + 1)
+        def per_call():
+            for m in fingers:
+                cuts = sp._layout(m, deltaP, deltaM)
+                cuts.sort()
+        def select():
+            for m in fingers:
+                sp.params['Fingers'].v = m
+                sp.set_cuts()
+        def table():
+            sp.layouts = None
+            select()
+        t_call = best_time(per_call)
+        t_table = best_time(table)
+        t_select = best_time(select)
+        print('%11d  %7d  %12.4f  %9.4f  %11.4f' % (width, len(fingers), t_call,\
+                                                  t_table, t_select))
+
+def bench_paint_passes():
+    '''
+    Times painting the figure for equally-spaced joints with an increasing
+    number of router passes, with each layer timed separately.  Requires
+    PyQt4, and paints to an image, so no window is shown.
+    '''
+    from PyQt4 import QtCore, QtGui
+    import config_file
+    import qt_fig
+    qt_fig.application()
+    config = config_file.default_config()
+    units = utils.Units()
+    bit = router.Router_Bit(units, 4, 24)
+    names = qt_fig.Qt_Plotter.layers
+    print('board width   passes  ' + '  '.join(['%9s (s)' % name for name in names]))
+    for width in [240, 960, 3840, 15360]:
+        boards = make_boards(bit, width)
+        template = router.Incra_Template(units, boards)
+        sp = spacing.Equally_Spaced(bit, boards, config)
+        sp.set_cuts()
+        plotter = qt_fig.Qt_Plotter(template, boards, config)
+        plotter.woods = {None:QtCore.Qt.DiagCrossPattern}
+        plotter.update_geometry(template, boards, bit, sp)
+        image = QtGui.QImage(2048, 1024, QtGui.QImage.Format_RGB32)
+        def paint():
+            painter = QtGui.QPainter(image)
+            plotter.paint_all(painter)
+            painter.end()
+        times = dict([(name, []) for name in names])
+        for i in lrange(3):
+            paint()
+            for name in names:
+                times[name].append(plotter.paint_times[name])
+        npasses = sum([len(c.passes) for c in plotter.geom.boards[0].bottom_cuts])
+        print('%11d  %7d  ' % (width, npasses) +\
+              '  '.join(['%13.4f' % min(times[name]) for name in names]))
+
+def bench_render_jobs():
+    '''
+    Times the batch jobs that render the figure to a PNG file, for joints of
+    increasing board width, with the whole image painted at once and in
+    tiles.  The geometry and figure times are those of batch.run_job.
+    Requires PyQt4 and a display.
+    '''
+    import os
+    import shutil
+    import tempfile
+    import batch
+    import qt_fig
+    qt_fig.application()
+    directory = tempfile.mkdtemp()
+    try:
+        print('board width  tile rows  geometry (s)  figure (s)')
+        for width in [240, 960, 3840, 15360]:
+            for tile_rows in [0, 64]:
+                job = {'board_width':width, 'bit_width':4, 'double_thickness':4,\
+                       'caul':True, 'min_image_width':2048, 'image_tile_rows':tile_rows,\
+                       'image':os.path.join(directory, 'job.png')}
+                times = []
+                for i in lrange(3):
+                    (lines, error, t) = batch.run_job((0, job))
+                    if error is not None:
+                        raise Exception(error)
+                    times.append(t)
+                print('%11d  %9d  %12.4f  %10.4f' % (width, tile_rows,\
+                                                     min([t[0] for t in times]),\
+                                                     min([t[1] for t in times])))
+    finally:
+        shutil.rmtree(directory)
+
+def bench_read_text():
+    '''
+    Times reading the joint from PNG files of increasing size, with
+    png_file.read_text, against inflating the image data of the file, as
+    decoding the image would.
+    '''
+    import io
+    import os
+    import zlib
+    import struct
+    import png_file
+    units = utils.Units()
+    bit = router.Router_Bit(units, 16, 24)
+    boards = make_boards(bit, 960)
+    sp = spacing.Equally_Spaced(bit, boards, Config())
+    sp.set_cuts()
+    text = serialize.serialize(bit, boards, sp, Config())
+    print('image width     size (MB)  read_text (s)    inflate (s)')
+    for w in [256, 1024, 4096]:
+        fd = io.BytesIO()
+        writer = png_file.PNG_Writer(fd, w, w // 2)
+        writer.write_text('pyRouterJig', text)
+        writer.write_rows([os.urandom(3 * w) for i in lrange(w // 2)])
+        writer.close()
+        data = fd.getvalue()
+        def read():
+            fd.seek(0)
+            png_file.read_text(fd, 'pyRouterJig')
+        def inflate():
+            # walk the chunks, and inflate the image data ones
+            (i, chunks) = (len(png_file.SIGNATURE), [])
+            while i < len(data):
+                (n, kind) = struct.unpack('>I4s', data[i:i + 8])
+                if kind == b'IDAT':
+                    chunks.append(data[i + 8:i + 8 + n])
+                i += n + 12
+            zlib.decompress(b''.join(chunks))
+        print('%11d  %12.2f  %13.6f  %13.6f' % (w, len(data) / 1e6, best_time(read),\
+                                                best_time(inflate)))
+
+def main(names):
+    '''Runs the benchmarks names, or all benchmarks if names is empty'''
+    if not names:
+        names = sorted([k[6:] for k in globals() if k.startswith('bench_')])
+    for name in names:
+        print('%s:' % name)
+        globals()['bench_' + name]()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
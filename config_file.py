@@ -71,6 +71,11 @@ caul_trim = 1
 # On save image, minimum width of image in pixels.  Does not apply to screenshots.
 min_image_width = 2048
 
+# On save image, the image is painted and written this many rows at a time, so
+# that large images need only this part of the image in memory.  Set to 0 to
+# paint the whole image at once.  Does not apply to screenshots.
+image_tile_rows = 256
+
 # The folder which contains wood grain image files.  Prefix the string with the character-r to prevent
 # python from interpreting the character-\ (used in Windows file paths) as an escape.
 wood_images = r'%s'
@@ -80,12 +85,40 @@ wood_images = r'%s'
 # DiagCrossPattern, BDiagPattern, FDiagPattern, Dense1Pattern, Dense5Pattern
 default_wood = 'DiagCrossPattern'
 
+# Maximum memory, in megabytes, of the wood images kept decoded in memory, so
+# that they are not read from their files on every redraw.
+texture_cache_mb = 64
+
+# Wood images are scaled down when read to about the size of the boards on the
+# screen.  If positive, images are also scaled down to fit this size, in pixels,
+# in width and height.  If 0, there is no further limit.
+texture_size = 0
+
 # Set debug to True to turn on debugging.  This will print a lot of output to
 # stdout during a pyRouterJig session.  This option is typically only useful
 # for developers.
 debug = False
 #debug = True
 
+# Number of computed sets of cuts (adjoining board edges and cauls) to keep in
+# memory, so that they are reused rather than recomputed.  Set to 0 to disable.
+cut_cache_size = 64
+
+# If True, the equally-spaced cuts for all settings of the sliders are computed
+# in the background whenever the bit or boards change, so that moving the
+# sliders only looks up the cuts.
+precompute_spacing = False
+
+# Maximum number of equally-spaced layouts that precompute_spacing computes,
+# starting from the default slider settings, so that the table of a wide
+# board does not take all of the memory.  Set to 0 for no limit.
+precompute_spacing_limit = 20000
+
+# Maximum size of the undo history in the Editor, in number of cuts stored.
+# Each edit stores only the cuts it changed.  When the limit is exceeded, the
+# oldest edits can no longer be undone.
+undo_limit = 100000
+
 # The margins object controls top, bottom, and side margins, along with the
 # separation between objects in the figure.
 # Specified in increments.
@@ -115,16 +148,39 @@ def version_number(version):
     vs = version.split('.')
     return int(vs[0]) * 100 + int(vs[1]) * 10 + int(vs[2])
 
+def _config_content():
+    '''Returns the content of the default configuration file'''
+    wood_images = os.path.join(os.path.expanduser('~'), 'wood_images')
+    return _CONFIG_INIT % (utils.VERSION, wood_images)
+
 def create_config(filename):
     '''
     Creates the configuration file.
     '''
-    wood_images = os.path.join(os.path.expanduser('~'), 'wood_images')
-    content = _CONFIG_INIT % (utils.VERSION, wood_images)
+    content = _config_content()
     fd = open(filename, 'w')
     fd.write(content)
     fd.close()
 
+def default_config():
+    '''
+    Returns the default configuration, without reading or creating the
+    configuration file.
+    '''
+    config = imp.new_module('config')
+    exec(_config_content(), config.__dict__)
+    return config
+
+def add_defaults(config):
+    '''
+    Sets any options missing from config, such as those added since the
+    configuration file was created, to their default values.
+    '''
+    defaults = default_config()
+    for (k, v) in vars(defaults).items():
+        if not k.startswith('_') and not hasattr(config, k):
+            setattr(config, k, v)
+
 def read_config(min_version_number):
     '''
     Reads the configuration file.  If it does not exist, it's created.
@@ -154,4 +210,5 @@ def read_config(min_version_number):
               ' Unfortunately, we are unable to automatically migrate your old'\
               ' settings.' % (filename, backup)
 
+    add_defaults(config)
     return (config, msg, msg_level)
@@ -0,0 +1,67 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Tests that the geometry modules import quickly and without Qt, so that they
+may be used without a display, such as by batch.py.
+'''
+import os
+import sys
+import subprocess
+import unittest
+
+# Imports the modules in a new interpreter, and prints the import time in
+# seconds, followed by any Qt modules that were loaded
+_IMPORT_SCRIPT = r'''
+import sys, time
+t = time.time()
+import %s
+t = time.time() - t
+qt = [m for m in sys.modules if m.startswith(('PyQt', 'PySide', 'sip'))]
+sys.stdout.write('%%g %%s\n' %% (t, ' '.join(qt)))
+'''
+
+class Import_Test(unittest.TestCase):
+    '''
+    Tests the import of the geometry core
+    '''
+    # maximum import time, in seconds
+    budget = 0.5
+    def import_modules(self, modules):
+        '''Returns the tuple (time, qt_modules) for importing modules'''
+        here = os.path.dirname(os.path.abspath(__file__))
+        out = subprocess.check_output([sys.executable, '-c', _IMPORT_SCRIPT % modules],\
+                                      cwd=here)
+        fields = out.decode().split()
+        return (float(fields[0]), fields[1:])
+    def test_core(self):
+        for modules in ['router, spacing',\
+                        'utils, router, spacing, serialize, config_file, batch, png_file']:
+            # take the fastest of a few tries, to reduce the effect of system load
+            times = []
+            for i in range(3):
+                (t, qt_modules) = self.import_modules(modules)
+                self.assertEqual(qt_modules, [], 'import %s loaded Qt' % modules)
+                times.append(t)
+            self.assertLess(min(times), self.budget,\
+                            'import %s took %g seconds' % (modules, min(times)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Writes PNG image files, and reads their text chunks
+'''
+from __future__ import division
+
+import struct
+import zlib
+
+# The first eight bytes of every PNG file
+SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class PNG_Exception(Exception):
+    '''
+    Exception handler for PNG files
+    '''
+    def __init__(self, msg):
+        Exception.__init__(self, msg)
+        self.msg = msg
+
+    def __str__(self):
+        return self.msg
+
+def write_chunk(fd, kind, data):
+    '''Writes the chunk of type kind, a 4-byte string, with contents data'''
+    fd.write(struct.pack('>I', len(data)))
+    fd.write(kind)
+    fd.write(data)
+    fd.write(struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+def read_text(fd, key):
+    '''
+    Returns the text of the tEXt, zTXt, or iTXt chunk with keyword key in the
+    PNG file object fd, as bytes, or None if there is no such chunk.  Only
+    the chunk headers are read until the chunk is found, and the image data
+    chunks are skipped without being read, so that the time does not depend
+    on the image size when, as usual, the text is before the image data.
+    '''
+    if fd.read(len(SIGNATURE)) != SIGNATURE:
+        raise PNG_Exception('Not a PNG file')
+    key = key.encode('latin-1')
+    while True:
+        header = fd.read(8)
+        if len(header) < 8:
+            raise PNG_Exception('Truncated PNG file')
+        (n, kind) = struct.unpack('>I4s', header)
+        if kind == b'IEND':
+            return None
+        if kind not in [b'tEXt', b'zTXt', b'iTXt']:
+            # skip the contents and the CRC
+            fd.seek(n + 4, 1)
+            continue
+        data = fd.read(n + 4)
+        if len(data) < n + 4:
+            raise PNG_Exception('Truncated PNG file')
+        (crc,) = struct.unpack('>I', data[n:])
+        data = data[:n]
+        if crc != zlib.crc32(kind + data) & 0xffffffff:
+            raise PNG_Exception('Bad CRC in PNG %s chunk' % kind.decode('latin-1'))
+        (keyword, sep, text) = data.partition(b'\0')
+        if keyword != key:
+            continue
+        try:
+            if kind == b'zTXt':
+                # skip the compression method
+                return zlib.decompress(text[1:])
+            elif kind == b'iTXt':
+                (flag, method) = struct.unpack('>BB', text[:2])
+                # skip the language tag and the translated keyword
+                text = text[2:].split(b'\0', 2)[2]
+                if flag:
+                    text = zlib.decompress(text)
+            return text
+        except (zlib.error, struct.error, IndexError):
+            raise PNG_Exception('Bad PNG %s chunk' % kind.decode('latin-1'))
+
+class PNG_Writer(object):
+    '''
+    Writes an 8-bit RGB PNG image to a file object, a row at a time, so that
+    the whole image need not be in memory.  The text chunks must be written
+    before the first row.  Call close() after the last row.
+
+    Attributes:
+
+    width, height: The image dimensions, in pixels.
+    rows: The number of rows written.
+    '''
+    # the maximum size of the image data chunks
+    chunk_size = 1 << 16
+
+    def __init__(self, fd, width, height, level=6):
+        if width <= 0 or height <= 0:
+            raise PNG_Exception('Bad PNG image size %d x %d' % (width, height))
+        self.fd = fd
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self.compressor = zlib.compressobj(level)
+        self.data = []
+        self.nbytes = 0
+        fd.write(SIGNATURE)
+        # 8-bit depth, color type 2 (RGB), default compression, filter,
+        # and no interlacing
+        write_chunk(fd, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+    def write_text(self, key, text):
+        '''
+        Writes the text chunk with keyword key.  Long text is compressed, as
+        Qt does.
+        '''
+        if self.rows > 0:
+            raise PNG_Exception('PNG text chunks must be written before the image rows')
+        key = key.encode('latin-1')
+        text = text.encode('latin-1')
+        if len(text) > 40:
+            write_chunk(self.fd, b'zTXt', key + b'\0\0' + zlib.compress(text))
+        else:
+            write_chunk(self.fd, b'tEXt', key + b'\0' + text)
+
+    def write_rows(self, rows):
+        '''
+        Writes each row in rows, which are strings of the red, green, and blue
+        bytes of each pixel.
+        '''
+        for row in rows:
+            if len(row) != 3 * self.width:
+                raise PNG_Exception('PNG row %d has %d bytes, instead of %d' %\
+                                    (self.rows, len(row), 3 * self.width))
+            if self.rows == self.height:
+                raise PNG_Exception('Too many PNG rows')
+            # each row starts with its filter type, 0 for none
+            self._add_data(self.compressor.compress(b'\0' + row))
+            self.rows += 1
+
+    def close(self):
+        '''Writes the rest of the image data and the end of the file'''
+        if self.rows != self.height:
+            raise PNG_Exception('Wrote %d PNG rows, instead of %d' % (self.rows, self.height))
+        self._add_data(self.compressor.flush())
+        self._write_data()
+        write_chunk(self.fd, b'IEND', b'')
+
+    def _add_data(self, data):
+        '''Adds compressed data, writing a chunk when there is enough'''
+        if data:
+            self.data.append(data)
+            self.nbytes += len(data)
+            if self.nbytes >= self.chunk_size:
+                self._write_data()
+
+    def _write_data(self):
+        '''Writes the compressed data as an image data chunk'''
+        if self.nbytes > 0:
+            write_chunk(self.fd, b'IDAT', b''.join(self.data))
+            self.data = []
+            self.nbytes = 0
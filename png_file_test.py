@@ -0,0 +1,134 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Tests for png_file
+'''
+from future.utils import lrange
+
+import io
+import random
+import struct
+import unittest
+import zlib
+import png_file
+
+def read_chunks(data):
+    '''Returns the list of (kind, contents) of the chunks in the PNG data'''
+    chunks = []
+    i = len(png_file.SIGNATURE)
+    while i < len(data):
+        (n,) = struct.unpack('>I', data[i:i + 4])
+        kind = data[i + 4:i + 8]
+        contents = data[i + 8:i + 8 + n]
+        (crc,) = struct.unpack('>I', data[i + 8 + n:i + 12 + n])
+        assert crc == zlib.crc32(kind + contents) & 0xffffffff
+        chunks.append((kind, contents))
+        i += 12 + n
+    return chunks
+
+class PNG_Writer_Test(unittest.TestCase):
+    '''
+    Tests PNG_Writer
+    '''
+    def test_write(self):
+        (w, h) = (37, 300)
+        r = random.Random(6)
+        rows = [bytes(bytearray([r.randrange(256) for x in lrange(3 * w)])) for y in lrange(h)]
+        fd = io.BytesIO()
+        writer = png_file.PNG_Writer(fd, w, h)
+        writer.chunk_size = 1000
+        writer.write_text('pyRouterJig', 'x' * 100)
+        writer.write_text('short', 'text')
+        for y in lrange(0, h, 64):
+            writer.write_rows(rows[y:y + 64])
+        writer.close()
+        data = fd.getvalue()
+        self.assertEqual(data[:8], png_file.SIGNATURE)
+        chunks = read_chunks(data)
+        kinds = [k for (k, c) in chunks]
+        self.assertEqual(kinds[:3], [b'IHDR', b'zTXt', b'tEXt'])
+        self.assertEqual(kinds[-1], b'IEND')
+        self.assertTrue(kinds.count(b'IDAT') > 1)
+        self.assertEqual(struct.unpack('>IIBBBBB', chunks[0][1]), (w, h, 8, 2, 0, 0, 0))
+        self.assertEqual(chunks[1][1][:13], b'pyRouterJig\0\0')
+        self.assertEqual(zlib.decompress(chunks[1][1][13:]), b'x' * 100)
+        self.assertEqual(chunks[2][1], b'short\0text')
+        pixels = zlib.decompress(b''.join([c for (k, c) in chunks if k == b'IDAT']))
+        self.assertEqual(pixels, b''.join([b'\0' + r for r in rows]))
+    def test_errors(self):
+        writer = png_file.PNG_Writer(io.BytesIO(), 2, 2)
+        self.assertRaises(png_file.PNG_Exception, writer.write_rows, [b'\0' * 5])
+        writer.write_rows([b'\0' * 6])
+        self.assertRaises(png_file.PNG_Exception, writer.write_text, 'a', 'b')
+        self.assertRaises(png_file.PNG_Exception, writer.close)
+        self.assertRaises(png_file.PNG_Exception, png_file.PNG_Writer, io.BytesIO(), 0, 2)
+
+class Read_Text_Test(unittest.TestCase):
+    '''
+    Tests read_text
+    '''
+    def write(self, text_after=False):
+        '''Returns a PNG file object, with text chunks before or after the image'''
+        fd = io.BytesIO()
+        writer = png_file.PNG_Writer(fd, 4, 3)
+        writer.chunk_size = 1
+        if not text_after:
+            writer.write_text('pyRouterJig', 'x' * 100)
+            writer.write_text('short', 'text')
+        writer.write_rows([b'\1' * 12] * 3)
+        writer.close()
+        data = fd.getvalue()
+        if text_after:
+            fd = io.BytesIO()
+            writer = png_file.PNG_Writer(fd, 1, 1)
+            writer.write_text('pyRouterJig', 'x' * 100)
+            i = len(png_file.SIGNATURE) + 25
+            data = data[:-12] + fd.getvalue()[i:] + data[-12:]
+        return io.BytesIO(data)
+    def test_read(self):
+        for text_after in [False, True]:
+            self.assertEqual(png_file.read_text(self.write(text_after), 'pyRouterJig'),\
+                             b'x' * 100)
+        self.assertEqual(png_file.read_text(self.write(), 'short'), b'text')
+        self.assertEqual(png_file.read_text(self.write(), 'missing'), None)
+    def test_itxt(self):
+        fd = io.BytesIO()
+        fd.write(png_file.SIGNATURE)
+        png_file.write_chunk(fd, b'iTXt', b'a\0\0\0en\0A\0plain')
+        png_file.write_chunk(fd, b'iTXt', b'b\0\1\0\0\0' + zlib.compress(b'packed'))
+        png_file.write_chunk(fd, b'IEND', b'')
+        for (key, text) in [('a', b'plain'), ('b', b'packed')]:
+            fd.seek(0)
+            self.assertEqual(png_file.read_text(fd, key), text)
+    def test_errors(self):
+        self.assertRaises(png_file.PNG_Exception, png_file.read_text,\
+                          io.BytesIO(b'GIF89a'), 'a')
+        data = self.write().getvalue()
+        self.assertRaises(png_file.PNG_Exception, png_file.read_text,\
+                          io.BytesIO(data[:40]), 'short')
+        # corrupt the zTXt chunk, which starts after the header chunk
+        i = len(png_file.SIGNATURE) + 25 + 20
+        data = data[:i] + b'?' + data[i + 1:]
+        self.assertRaises(png_file.PNG_Exception, png_file.read_text,\
+                          io.BytesIO(data), 'pyRouterJig')
+
+if __name__ == '__main__':
+    unittest.main()
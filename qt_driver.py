@@ -34,6 +34,7 @@ import spacing
 import utils
 import doc
 import serialize
+import png_file
 
 from PyQt4 import QtCore, QtGui
 #from PySide import QtCore, QtGui
@@ -94,6 +95,8 @@ class Driver(QtGui.QMainWindow):
             QtGui.QMessageBox.warning(self, 'Warning', msg)
             msg = ''
 
+        router.cut_cache.resize(self.config.cut_cache_size)
+
         # Default is English units, 1/32" resolution
         self.units = utils.Units(self.config.increments_per_inch, self.config.metric)
         self.doc = doc.Doc(self.units)
@@ -114,6 +117,8 @@ class Driver(QtGui.QMainWindow):
         self.do_caul = False # if true, do caul template
         self.template = router.Incra_Template(self.units, self.boards, self.do_caul)
         self.equal_spacing = spacing.Equally_Spaced(self.bit, self.boards, self.config)
+        self.equal_spacing_table = None
+        self.start_equal_spacing_table()
         self.equal_spacing.set_cuts()
         self.var_spacing = spacing.Variable_Spaced(self.bit, self.boards, self.config)
         self.var_spacing.set_cuts()
@@ -122,6 +127,11 @@ class Driver(QtGui.QMainWindow):
         self.spacing = self.equal_spacing # the default
         self.spacing_index = None # to be set in layout_widgets()
 
+        # Draws are scheduled, so that any number of changes within one pass
+        # of the event loop result in a single draw
+        self.draw_pending = False
+        self.draws_dropped = 0
+
         # Create the main frame and menus
         self.create_menu()
         self.create_status_bar()
@@ -147,6 +157,10 @@ class Driver(QtGui.QMainWindow):
         self.shift_key = False
         self.alt_key = False
 
+        # Auto-repeated edit keys are accumulated here, as [kind, side, delta],
+        # until they are applied
+        self.pending_edit = None
+
         # ... show the status message from reading the configuration file
         self.statusbar.showMessage(msg)
 
@@ -175,6 +189,14 @@ class Driver(QtGui.QMainWindow):
         QtGui.QMessageBox.warning(self, 'Error', exception)
         self.except_handled = False
 
+    @QtCore.pyqtSlot(object)
+    def _on_geometry_error(self, error):
+        '''
+        Handles an exception raised while computing the geometry in the
+        background, as if it had been raised here.
+        '''
+        self.exception_hook(type(error), error, None)
+
     def create_menu(self):
         '''
         Creates the drop-down menus.
@@ -303,6 +325,7 @@ class Driver(QtGui.QMainWindow):
         self.fig.canvas.setFocusPolicy(QtCore.Qt.StrongFocus)
         self.fig.canvas.setSizePolicy(QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Expanding)
         self.fig.canvas.setFocus()
+        self.fig.canvas.geometry_error.connect(self._on_geometry_error)
 
         # Board width line edit
         self.le_board_width_label = QtGui.QLabel('Board Width')
@@ -346,11 +369,7 @@ class Driver(QtGui.QMainWindow):
 
         # Wood combo boxes
         woods = utils.create_wood_dict(self.config.wood_images)
-        patterns = {'DiagCrossPattern':QtCore.Qt.DiagCrossPattern,\
-                    'BDiagPattern':QtCore.Qt.BDiagPattern,\
-                    'FDiagPattern':QtCore.Qt.FDiagPattern,\
-                    'Dense1Pattern':QtCore.Qt.Dense1Pattern,\
-                    'Dense5Pattern':QtCore.Qt.Dense5Pattern}
+        patterns = qt_fig.wood_patterns
         # ... combine the wood images and patterns
         self.woods = copy.deepcopy(woods)
         self.woods.update(patterns)
@@ -432,6 +451,9 @@ class Driver(QtGui.QMainWindow):
         edit_btn_undo = QtGui.QPushButton('Undo', self.main_frame)
         edit_btn_undo.clicked.connect(self._on_edit_undo)
         edit_btn_undo.setToolTip('Undo the last change')
+        edit_btn_redo = QtGui.QPushButton('Redo', self.main_frame)
+        edit_btn_redo.clicked.connect(self._on_edit_redo)
+        edit_btn_redo.setToolTip('Redo the last undone change')
         edit_btn_add = QtGui.QPushButton('Add', self.main_frame)
         edit_btn_add.clicked.connect(self._on_edit_add)
         edit_btn_add.setToolTip('Add a cut (if there is space to add cuts)')
@@ -618,6 +640,7 @@ class Driver(QtGui.QMainWindow):
         hbox_edit.addLayout(grid_edit)
         hbox_edit.addStretch(1)
         hbox_edit.addWidget(edit_btn_undo)
+        hbox_edit.addWidget(edit_btn_redo)
 
         # Add the spacing layouts as Tabs
         self.tabs_spacing = QtGui.QTabWidget()
@@ -736,12 +759,45 @@ class Driver(QtGui.QMainWindow):
         self.statusbar = self.statusBar()
         self.statusbar.showMessage('Ready')
 
-    def draw(self):
-        '''(Re)draws the template and boards'''
+    def draw(self, wait=False):
+        '''
+        (Re)draws the template and boards.  If wait, the figure is painted
+        before returning.
+        '''
         if self.config.debug:
-            print('draw')
+            print('draw: dropped %d redundant draws' % self.draws_dropped)
+        self.draws_dropped = 0
+        self.draw_pending = False
         self.template = router.Incra_Template(self.units, self.boards, self.do_caul)
-        self.fig.draw(self.template, self.boards, self.bit, self.spacing, self.woods)
+        self.fig.draw(self.template, self.boards, self.bit, self.spacing, self.woods, wait)
+
+    def draw_overlay(self):
+        '''
+        Redraws only the cursor and active cuts, when only they changed.  If
+        a draw is scheduled, the cuts may have changed too, so that draw is
+        left to paint them.
+        '''
+        if self.draw_pending:
+            self.draws_dropped += 1
+        else:
+            self.fig.draw_overlay(self.spacing)
+
+    def schedule_draw(self):
+        '''
+        Marks the figure as needing a draw, which is done once the event loop
+        has handled the pending events.  Further calls until then are dropped.
+        '''
+        if self.draw_pending:
+            self.draws_dropped += 1
+        else:
+            self.draw_pending = True
+            QtCore.QTimer.singleShot(0, self.flush_draw)
+
+    @QtCore.pyqtSlot()
+    def flush_draw(self):
+        '''Does the scheduled draw, unless it has already been done'''
+        if self.draw_pending:
+            self.draw()
 
     def reinit_spacing(self):
         '''
@@ -753,6 +809,7 @@ class Driver(QtGui.QMainWindow):
         # Re-create the spacings objects
         if self.spacing_index == self.equal_spacing_id:
             self.equal_spacing = spacing.Equally_Spaced(self.bit, self.boards, self.config)
+            self.start_equal_spacing_table()
         elif self.spacing_index == self.var_spacing_id:
             self.var_spacing = spacing.Variable_Spaced(self.bit, self.boards, self.config)
         elif self.spacing_index == self.edit_spacing_id:
@@ -762,6 +819,24 @@ class Driver(QtGui.QMainWindow):
 
         self.set_spacing_widgets()
 
+    def start_equal_spacing_table(self):
+        '''
+        If the precompute_spacing option is set, starts filling the table of
+        equally-spaced cuts for the current bit and boards, so that the
+        equally-spaced widgets only look up their cuts.
+        '''
+        if self.equal_spacing_table is not None:
+            self.equal_spacing_table.cancel()
+            self.equal_spacing_table = None
+        if self.config.precompute_spacing:
+            limit = self.config.precompute_spacing_limit
+            if limit <= 0:
+                limit = None
+            self.equal_spacing_table = spacing.Equally_Spaced_Table(self.bit, self.boards,\
+                                                                    self.config, limit)
+            self.equal_spacing_table.start()
+            self.equal_spacing.table = self.equal_spacing_table
+
     def set_spacing_widgets(self):
         '''
         Sets the spacing widget parameters
@@ -869,7 +944,7 @@ class Driver(QtGui.QMainWindow):
                 self.tabs_spacing.setCurrentIndex(self.spacing_index)
                 return
         self.reinit_spacing()
-        self.draw()
+        self.schedule_draw()
         self.status_message('Changed to spacing algorithm %s'\
                             % str(self.tabs_spacing.tabText(index)))
         self.file_saved = False
@@ -892,7 +967,7 @@ class Driver(QtGui.QMainWindow):
             text = str(self.le_bit_width.text())
             self.bit.set_width_from_string(text)
             self.reinit_spacing()
-            self.draw()
+            self.schedule_draw()
             self.status_message('Changed bit width to ' + text)
             self.file_saved = False
 
@@ -907,7 +982,9 @@ class Driver(QtGui.QMainWindow):
             self.bit.set_depth_from_string(text)
             for b in self.boards:
                 b.set_height(self.bit)
-            self.draw()
+            # the table is for the old depth, so refill it
+            self.start_equal_spacing_table()
+            self.schedule_draw()
             self.status_message('Changed bit depth to ' + text)
             self.file_saved = False
 
@@ -921,7 +998,7 @@ class Driver(QtGui.QMainWindow):
             text = str(self.le_bit_angle.text())
             self.bit.set_angle_from_string(text)
             self.reinit_spacing()
-            self.draw()
+            self.schedule_draw()
             self.status_message('Changed bit angle to ' + text)
             self.file_saved = False
 
@@ -937,7 +1014,7 @@ class Driver(QtGui.QMainWindow):
             for b in self.boards[1:]:
                 b.width = self.boards[0].width
             self.reinit_spacing()
-            self.draw()
+            self.schedule_draw()
             self.status_message('Changed board width to ' + text)
             self.file_saved = False
 
@@ -949,7 +1026,7 @@ class Driver(QtGui.QMainWindow):
         self.equal_spacing.params['Spacing'].v = value
         self.equal_spacing.set_cuts()
         self.es_slider0_label.setText(self.equal_spacing.labels[0])
-        self.draw()
+        self.schedule_draw()
         self.status_message('Changed slider %s' % str(self.es_slider0_label.text()))
         self.file_saved = False
 
@@ -961,7 +1038,7 @@ class Driver(QtGui.QMainWindow):
         self.equal_spacing.params['Width'].v = value
         self.equal_spacing.set_cuts()
         self.es_slider1_label.setText(self.equal_spacing.labels[1])
-        self.draw()
+        self.schedule_draw()
         self.status_message('Changed slider %s' % str(self.es_slider1_label.text()))
         self.file_saved = False
 
@@ -972,7 +1049,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_cb_es_centered')
         self.equal_spacing.params['Centered'].v = self.cb_es_centered.isChecked()
         self.equal_spacing.set_cuts()
-        self.draw()
+        self.schedule_draw()
         if self.equal_spacing.params['Centered'].v:
             self.status_message('Checked Centered.')
         else:
@@ -987,7 +1064,7 @@ class Driver(QtGui.QMainWindow):
         self.var_spacing.params['Fingers'].v = int(self.cb_vsfingers.itemText(index))
         self.var_spacing.set_cuts()
         self.cb_vsfingers_label.setText(self.var_spacing.keys[0] + ':')
-        self.draw()
+        self.schedule_draw()
         self.status_message('Changed slider %s' % str(self.cb_vsfingers_label.text()))
         self.file_saved = False
 
@@ -1008,6 +1085,7 @@ class Driver(QtGui.QMainWindow):
         '''
         if self.config.debug:
             print('_on_save')
+        self.flush_draw()
 
         prefix = 'pyrouterjig_'
         postfix = '.png'
@@ -1046,16 +1124,23 @@ class Driver(QtGui.QMainWindow):
                 return
 
         # Save the file with metadata
-        if do_screenshot:
-            image = QtGui.QPixmap.grabWindow(self.winId()).toImage()
-        else:
-            image = self.fig.image(self.template, self.boards, self.bit, self.spacing, self.woods,\
-                                   self.config.min_image_width)
-
         s = serialize.serialize(self.bit, self.boards, self.spacing, \
                                 self.config)
-        image.setText('pyRouterJig', s)
-        r = image.save(filename, 'png')
+        if not do_screenshot and self.config.image_tile_rows > 0:
+            r = self.fig.save_image(filename, self.template, self.boards, self.bit,\
+                                    self.spacing, self.woods, self.config.min_image_width,\
+                                    {'pyRouterJig':s}, self.config.image_tile_rows)
+        else:
+            if do_screenshot:
+                # paint the current joint, rather than what the geometry
+                # worker last finished
+                self.draw(True)
+                image = QtGui.QPixmap.grabWindow(self.winId()).toImage()
+            else:
+                image = self.fig.image(self.template, self.boards, self.bit, self.spacing,\
+                                       self.woods, self.config.min_image_width)
+            image.setText('pyRouterJig', s)
+            r = image.save(filename, 'png')
         if r:
             self.status_message('Saved to file %s' % filename)
             if self.screenshot_index is not None:
@@ -1095,10 +1180,13 @@ class Driver(QtGui.QMainWindow):
             self.status_message('File open aborted')
             return
 
-        # From the image file, parse the metadata.
-        image = QtGui.QImage(filename)
-        s = image.text('pyRouterJig') # see setText in _on_save
-        if len(s) == 0:
+        # From the image file, parse the metadata, without decoding the image
+        try:
+            with open(filename, 'rb') as fd:
+                s = png_file.read_text(fd, 'pyRouterJig') # see _on_save
+        except (IOError, png_file.PNG_Exception):
+            s = None
+        if not s:
             msg = 'File %s does not contain pyRouterJig data.  The PNG file'\
                   ' must have been saved using pyRouterJig.' % filename
             QtGui.QMessageBox.warning(self, 'Error', msg)
@@ -1134,6 +1222,7 @@ class Driver(QtGui.QMainWindow):
         if sp_type == 'Equa':
             sp.set_cuts()
             self.equal_spacing = sp
+            self.start_equal_spacing_table()
             self.spacing_index = self.equal_spacing_id
         elif sp_type == 'Vari':
             sp.set_cuts()
@@ -1155,13 +1244,14 @@ class Driver(QtGui.QMainWindow):
         self.le_bit_angle.setText(`self.bit.angle`)
         self.set_spacing_widgets()
 
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_print(self):
         '''Handles print events'''
         if self.config.debug:
             print('_on_print')
+        self.flush_draw()
 
         r = self.fig.print(self.template, self.boards, self.bit, self.spacing, self.woods)
         if r:
@@ -1227,7 +1317,7 @@ class Driver(QtGui.QMainWindow):
         self.le_bit_depth.setText(self.units.increments_to_string(self.bit.depth))
         self.reinit_spacing()
         self.update_tooltips()
-        self.draw()
+        self.schedule_draw()
 
     def _on_wood(self, iwood, index=None, reinit=False):
         '''Handles all changes in wood'''
@@ -1241,7 +1331,7 @@ class Driver(QtGui.QMainWindow):
             self.boards[iwood].set_wood(s)
         if reinit:
             self.reinit_spacing()
-        self.draw()
+        self.schedule_draw()
         self.file_saved = False
         msg = 'Changed %s to %s' % (label, s)
         self.statusbar.showMessage(msg)
@@ -1318,10 +1408,9 @@ class Driver(QtGui.QMainWindow):
             text = str(self.le_boardm[i].text())
             self.boards[i + 2].set_height_from_string(self.bit, text)
             self.reinit_spacing()
-            self.draw()
+            self.schedule_draw()
             labels = ['Double', 'Double-Double']
             self.status_message(('Changed %s Board thickness to ' + text) % labels[i])
-            self.reinit_spacing()
             self.file_saved = False
 
     @QtCore.pyqtSlot()
@@ -1341,7 +1430,16 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_undo')
         self.spacing.undo()
         self.statusbar.showMessage('Undo')
-        self.draw()
+        self.schedule_draw()
+
+    @QtCore.pyqtSlot()
+    def _on_edit_redo(self):
+        '''Handles redo event'''
+        if self.config.debug:
+            print('_on_edit_redo')
+        self.spacing.redo()
+        self.statusbar.showMessage('Redo')
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_moveL(self):
@@ -1350,7 +1448,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_moveL')
         msg = self.spacing.cut_move_left()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_moveR(self):
@@ -1359,7 +1457,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_moveR')
         msg = self.spacing.cut_move_right()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_widenL(self):
@@ -1368,7 +1466,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_widenL')
         msg = self.spacing.cut_widen_left()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_widenR(self):
@@ -1377,7 +1475,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_widenR')
         msg = self.spacing.cut_widen_right()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_trimL(self):
@@ -1386,7 +1484,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_trimL')
         msg = self.spacing.cut_trim_left()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_trimR(self):
@@ -1395,7 +1493,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_trimR')
         msg = self.spacing.cut_trim_right()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_toggle(self):
@@ -1404,7 +1502,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_toggle')
         msg = self.spacing.cut_toggle()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.draw_overlay()
 
     @QtCore.pyqtSlot()
     def _on_edit_cursorL(self):
@@ -1413,7 +1511,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_cursorL')
         msg = self.spacing.cut_increment_cursor(-1)
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.draw_overlay()
 
     @QtCore.pyqtSlot()
     def _on_edit_cursorR(self):
@@ -1422,7 +1520,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_cursorR')
         msg = self.spacing.cut_increment_cursor(1)
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.draw_overlay()
 
     @QtCore.pyqtSlot()
     def _on_edit_activate_all(self):
@@ -1431,7 +1529,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_activate_all')
         msg = self.spacing.cut_all_active()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.draw_overlay()
 
     @QtCore.pyqtSlot()
     def _on_edit_deactivate_all(self):
@@ -1440,7 +1538,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_deactivate_all')
         msg = self.spacing.cut_all_not_active()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.draw_overlay()
 
     @QtCore.pyqtSlot()
     def _on_edit_add(self):
@@ -1449,7 +1547,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_add')
         msg = self.spacing.cut_add()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_edit_del(self):
@@ -1458,7 +1556,7 @@ class Driver(QtGui.QMainWindow):
             print('_on_edit_del')
         msg = self.spacing.cut_delete_active()
         self.statusbar.showMessage(msg)
-        self.draw()
+        self.schedule_draw()
 
     @QtCore.pyqtSlot()
     def _on_flash_status_off(self):
@@ -1491,7 +1589,7 @@ class Driver(QtGui.QMainWindow):
             self.do_caul = True
             self.status_message('Turned on caul template.')
         self.file_saved = False
-        self.draw()
+        self.schedule_draw()
 
     def status_message(self, msg, flash_len_ms=None):
         '''Flashes a status message to the status bar'''
@@ -1509,6 +1607,42 @@ class Driver(QtGui.QMainWindow):
         self._on_exit()
         event.ignore()
 
+    def apply_edit(self, kind, side, delta):
+        '''
+        Applies delta increments of an edit to the active cuts, where kind is
+        'move' or 'widen', and redraws.  Returns the status message.
+        '''
+        if kind == 'move':
+            msg = self.spacing.cut_move(delta)
+        else:
+            msg = self.spacing.cut_widen(side, delta)
+        self.schedule_draw()
+        return msg
+
+    def queue_edit(self, kind, side, delta):
+        '''
+        Queues an edit from an auto-repeated key.  The queued increments are
+        applied together, with a single redraw, once the pending key events
+        are processed.
+        '''
+        if self.pending_edit is not None and self.pending_edit[:2] != [kind, side]:
+            self._on_pending_edit()
+        if self.pending_edit is None:
+            self.pending_edit = [kind, side, 0]
+            QtCore.QTimer.singleShot(0, self._on_pending_edit)
+        self.pending_edit[2] += delta
+
+    @QtCore.pyqtSlot()
+    def _on_pending_edit(self):
+        '''Applies the queued edit, if any'''
+        if self.pending_edit is None:
+            return
+        (kind, side, delta) = self.pending_edit
+        self.pending_edit = None
+        if self.config.debug:
+            print('_on_pending_edit', kind, side, delta)
+        self.status_message(self.apply_edit(kind, side, delta))
+
     def keyPressEvent(self, event):
         '''
         Handles key press events
@@ -1518,6 +1652,10 @@ class Driver(QtGui.QMainWindow):
             event.ignore()
             return
 
+        # apply any queued edit first, so that keys are handled in order
+        if not event.isAutoRepeat():
+            self._on_pending_edit()
+
         msg = None
         if event.key() == QtCore.Qt.Key_Shift:
             self.shift_key = True
@@ -1528,42 +1666,53 @@ class Driver(QtGui.QMainWindow):
         elif event.key() == QtCore.Qt.Key_U:
             self.spacing.undo()
             msg = 'Undo'
-            self.draw()
+            self.schedule_draw()
+        elif event.key() == QtCore.Qt.Key_R:
+            self.spacing.redo()
+            msg = 'Redo'
+            self.schedule_draw()
         elif event.key() == QtCore.Qt.Key_A:
             msg = self.spacing.cut_all_active()
-            self.draw()
+            self.draw_overlay()
         elif event.key() == QtCore.Qt.Key_N:
             msg = self.spacing.cut_all_not_active()
-            self.draw()
+            self.draw_overlay()
         elif event.key() == QtCore.Qt.Key_Return:
-            msg = self.spacing.cut_toggle()
-            self.draw()
+            if self.shift_key:
+                msg = self.spacing.cut_select_range()
+            else:
+                msg = self.spacing.cut_toggle()
+            self.draw_overlay()
+        elif event.key() >= QtCore.Qt.Key_2 and event.key() <= QtCore.Qt.Key_9:
+            msg = self.spacing.cut_select_every(event.key() - QtCore.Qt.Key_0)
+            self.draw_overlay()
         elif event.key() == QtCore.Qt.Key_Minus:
             msg = self.spacing.cut_delete_active()
-            self.draw()
+            self.schedule_draw()
         elif event.key() == QtCore.Qt.Key_Plus:
             msg = self.spacing.cut_add()
-            self.draw()
-        elif event.key() == QtCore.Qt.Key_Left:
-            if self.shift_key:
-                msg = self.spacing.cut_widen_left()
-            elif self.control_key:
-                msg = self.spacing.cut_trim_left()
-            elif self.alt_key:
-                msg = self.spacing.cut_move_left()
+            self.schedule_draw()
+        elif event.key() in [QtCore.Qt.Key_Left, QtCore.Qt.Key_Right]:
+            if event.key() == QtCore.Qt.Key_Left:
+                (side, inc) = ('left', -1)
             else:
-                msg = self.spacing.cut_increment_cursor(-1)
-            self.draw()
-        elif event.key() == QtCore.Qt.Key_Right:
+                (side, inc) = ('right', 1)
             if self.shift_key:
-                msg = self.spacing.cut_widen_right()
+                edit = ('widen', side, 1)
             elif self.control_key:
-                msg = self.spacing.cut_trim_right()
+                edit = ('widen', side, -1)
             elif self.alt_key:
-                msg = self.spacing.cut_move_right()
+                edit = ('move', side, inc)
             else:
-                msg = self.spacing.cut_increment_cursor(1)
-            self.draw()
+                edit = None
+            if edit is None:
+                self._on_pending_edit()
+                msg = self.spacing.cut_increment_cursor(inc)
+                self.draw_overlay()
+            elif event.isAutoRepeat():
+                self.queue_edit(*edit)
+            else:
+                msg = self.apply_edit(*edit)
         else:
             msg = 'You pressed an unrecognized key: '
             s = event.text()
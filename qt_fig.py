@@ -25,12 +25,97 @@ from __future__ import print_function
 from __future__ import division
 from future.utils import lrange
 
+import os
+import sys
+import copy
+import time
+from collections import OrderedDict
 import router
 import utils
+import png_file
 
 from PyQt4 import QtCore, QtGui
 #from PySide import QtCore, QtGui
 
+# the fill patterns that may be used in place of a wood image
+wood_patterns = {'DiagCrossPattern':QtCore.Qt.DiagCrossPattern,\
+                 'BDiagPattern':QtCore.Qt.BDiagPattern,\
+                 'FDiagPattern':QtCore.Qt.FDiagPattern,\
+                 'Dense1Pattern':QtCore.Qt.Dense1Pattern,\
+                 'Dense5Pattern':QtCore.Qt.Dense5Pattern}
+
+# the application created by export_figure(), when there is none
+_app = None
+
+class Qt_Fig_Exception(Exception):
+    '''
+    Exception handler for painting figures
+    '''
+    def __init__(self, msg):
+        Exception.__init__(self, msg)
+        self.msg = msg
+
+    def __str__(self):
+        return self.msg
+
+class Text_Cache(object):
+    '''
+    A least-recently-used cache of the bounding rectangles of text, as laid
+    out by QPainter.boundingRect().  Each entry is keyed on the text, the
+    font, the alignment flags and the resolution of the paint device.
+
+    Attributes:
+
+    size: Maximum number of entries.
+    hits: Number of lookups that found their entry.
+    misses: Number of lookups that laid out their text.
+    '''
+    def __init__(self, size=4096):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+    def bounding_rect(self, painter, text, flags):
+        '''
+        Returns the bounding rectangle of text drawn by painter with alignment
+        flags, relative to the alignment point at the origin.
+        '''
+        device = painter.device()
+        key = (text, painter.font().key(), int(flags), device.logicalDpiX(),\
+               device.logicalDpiY())
+        rect = self.entries.pop(key, None)
+        if rect is None:
+            self.misses += 1
+            # Create a large rectangle and use it to find the bounding rectangle
+            # around the text.  Find the origin of the rectangle based on the
+            # alignment.
+            big = 5000
+            xorg = 0
+            yorg = 0
+            if flags & QtCore.Qt.AlignRight:
+                xorg = -big
+            elif flags & QtCore.Qt.AlignHCenter:
+                xorg = -big // 2
+            if flags & QtCore.Qt.AlignBottom:
+                yorg = -big
+            elif flags & QtCore.Qt.AlignVCenter:
+                yorg = -big // 2
+            rect = QtCore.QRect(xorg, yorg, big, big)
+            rect = painter.boundingRect(rect, flags, text)
+        else:
+            self.hits += 1
+        # (re)insert as the most recently used entry
+        self.entries[key] = rect
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return QtCore.QRect(rect)
+    def stats(self):
+        '''Returns a dictionary of the cache statistics'''
+        return {'hits':self.hits, 'misses':self.misses, 'entries':len(self.entries)}
+
+# The cache used by paint_text()
+text_cache = Text_Cache()
+
 def paint_text(painter, text, coord, flags, shift=(0, 0), angle=0, fill=None):
     '''
     Puts text at coord with alignment flags.
@@ -52,21 +137,7 @@ def paint_text(painter, text, coord, flags, shift=(0, 0), angle=0, fill=None):
     painter.resetTransform()
     painter.translate(x, y)
     painter.rotate(angle)
-    # Create a large rectangle and use it to find the bounding rectangle around the text.
-    # Find the origin of the rectangle based on the alignment.
-    big = 5000
-    xorg = 0
-    yorg = 0
-    if flags & QtCore.Qt.AlignRight:
-        xorg = -big
-    elif flags & QtCore.Qt.AlignHCenter:
-        xorg = -big // 2
-    if flags & QtCore.Qt.AlignBottom:
-        yorg = -big
-    elif flags & QtCore.Qt.AlignVCenter:
-        yorg = -big // 2
-    rect = QtCore.QRect(xorg, yorg, big, big)
-    rect = painter.boundingRect(rect, flags, text)
+    rect = text_cache.bounding_rect(painter, text, flags)
     # Draw the text
     if fill is not None:
         painter.fillRect(rect, fill)
@@ -74,6 +145,116 @@ def paint_text(painter, text, coord, flags, shift=(0, 0), angle=0, fill=None):
     # restore the original transform
     painter.setTransform(transform)
 
+class Texture_Cache(object):
+    '''
+    A least-recently-used cache of the pixmaps decoded from wood image files.
+    Each entry is keyed on the file name, the file's modification time and
+    size, and the pixmap size, so that an entry is replaced when its file
+    changes.  The files are checked for changes only after refresh().
+
+    Attributes:
+
+    limit: Maximum memory of the cached pixmaps, in bytes.  If zero, nothing
+           is cached.
+    size: If positive, images larger than size pixels in width or height are
+          scaled down to fit, when decoded.
+    image_class: QPixmap, or QImage when painting without a window.
+    nbytes: Memory of the cached pixmaps, in bytes.
+    hits: Number of lookups that found their entry.
+    misses: Number of lookups that decoded their file.
+    '''
+    def __init__(self, limit, size=0, image_class=QtGui.QPixmap):
+        self.limit = limit
+        self.size = size
+        self.image_class = image_class
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        # the (mtime, size, dimension) of each file, where dimension is the
+        # larger of its image width and height
+        self.stamps = {}
+    def refresh(self):
+        '''Checks the files for changes on their next lookup'''
+        self.stamps.clear()
+    def _stamp(self, filename):
+        '''Returns the (mtime, size, dimension) of filename'''
+        stamp = self.stamps.get(filename)
+        if stamp is None:
+            try:
+                st = os.stat(filename)
+                size = QtGui.QImageReader(filename).size()
+                stamp = (st.st_mtime, st.st_size, max(size.width(), size.height()))
+            except OSError:
+                stamp = (None, None, 0)
+            self.stamps[filename] = stamp
+        return stamp
+    def key(self, filename, target=0):
+        '''
+        Returns the key of the pixmap for filename, to be drawn at most target
+        pixels in width and height, or at full size if target is 0.
+        '''
+        (mtime, nbytes, dim) = self._stamp(filename)
+        for limit in [target, self.size]:
+            if limit > 0 and (dim <= 0 or limit < dim):
+                dim = limit
+        return (filename, mtime, nbytes, dim)
+    def pixmap(self, filename, target=0):
+        '''
+        Returns the pixmap for the image file filename, scaled down to fit
+        target pixels in width and height, if target is positive.
+        '''
+        key = self.key(filename, target)
+        pixmap = self.entries.pop(key, None)
+        if pixmap is None:
+            self.misses += 1
+            # discard any pixmaps from older versions of the file
+            for k in [k for k in self.entries if k[0] == filename and k[1:3] != key[1:3]]:
+                self.nbytes -= self._nbytes(self.entries.pop(k))
+            pixmap = self._read(filename, key[3])
+        else:
+            self.hits += 1
+            self.nbytes -= self._nbytes(pixmap)
+        # (re)insert as the most recently used entry
+        self.entries[key] = pixmap
+        self.nbytes += self._nbytes(pixmap)
+        self._trim()
+        return pixmap
+    def _read(self, filename, dim):
+        '''
+        Decodes filename, scaled down to fit dim pixels in width and height,
+        if positive
+        '''
+        reader = QtGui.QImageReader(filename)
+        size = reader.size()
+        if dim > 0 and size.isValid() and max(size.width(), size.height()) > dim:
+            # let the reader scale while decoding, which for some formats is
+            # much cheaper than decoding the full image
+            reader.setScaledSize(size.scaled(dim, dim, QtCore.Qt.KeepAspectRatio))
+        image = reader.read()
+        if self.image_class is QtGui.QImage:
+            return image
+        return QtGui.QPixmap.fromImage(image)
+    def clear(self):
+        '''Removes all entries and resets the statistics'''
+        self.entries.clear()
+        self.stamps.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+    def stats(self):
+        '''Returns a dictionary of the cache statistics'''
+        return {'hits':self.hits, 'misses':self.misses,\
+                'entries':len(self.entries), 'nbytes':self.nbytes}
+    def _nbytes(self, pixmap):
+        '''Returns the memory of pixmap, in bytes'''
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+    def _trim(self):
+        '''Discards the least recently used entries beyond the memory limit'''
+        while self.nbytes > self.limit and len(self.entries) > 0:
+            (key, pixmap) = self.entries.popitem(last=False)
+            self.nbytes -= self._nbytes(pixmap)
+
 class Qt_Fig(object):
     '''
     Interface to the qt_driver, using Qt to draw the boards and template.
@@ -82,11 +263,18 @@ class Qt_Fig(object):
         self.canvas = Qt_Plotter(template, boards, config)
         self.transform = None
 
-    def draw(self, template, boards, bit, spacing, woods):
+    def draw(self, template, boards, bit, spacing, woods, wait=False):
+        '''
+        Draws the template and boards.  If wait, the figure is painted before
+        returning.
+        '''
+        self.canvas.draw(template, boards, bit, spacing, woods, wait)
+
+    def draw_overlay(self, spacing):
         '''
-        Draws the template and boards
+        Draws the cursor and active cuts of spacing, which are the only changes
         '''
-        self.canvas.draw(template, boards, bit, spacing, woods)
+        self.canvas.draw_overlay(spacing)
 
     def print(self, template, boards, bit, spacing, woods):
         '''
@@ -100,39 +288,112 @@ class Qt_Fig(object):
         '''
         return self.canvas.image_fig(template, boards, bit, spacing, woods, min_width)
 
-class Qt_Plotter(QtGui.QWidget):
+    def save_image(self, filename, template, boards, bit, spacing, woods, min_width, texts,\
+                   tile_rows):
+        '''
+        Saves the figure to the PNG file filename, painted in tiles of
+        tile_rows rows, with the dictionary texts as text chunks.  Returns
+        True if the file was saved.
+        '''
+        try:
+            self.canvas.save_image_tiles(filename, template, boards, bit, spacing, woods,\
+                                         min_width, texts, tile_rows)
+        except (IOError, png_file.PNG_Exception):
+            return False
+        return True
+
+class Geometry_Worker(QtCore.QObject):
     '''
-    Plots the template and boards using Qt.
+    Computes the joint geometry in a background thread.  Each request carries
+    a generation number, and a request is skipped if a newer one has been
+    made, since its result would be discarded anyway.
+
+    Attributes:
+
+    geom: The Joint_Geometry, which is updated for each request.
+    generation: The newest generation requested, set by the GUI thread.
     '''
-    def __init__(self, template, boards, config):
-        QtGui.QWidget.__init__(self)
+    finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, config):
+        QtCore.QObject.__init__(self)
+        self.config = config
+        self.geom = None
+        self.generation = 0
+
+    @QtCore.pyqtSlot(object)
+    def compute(self, request):
+        '''
+        Computes the geometry for request, which is the tuple (generation,
+        template, boards, bit, spacing, margins).  Emits finished with
+        (generation, geom, error), where geom is a snapshot of the geometry,
+        or None if the exception error was raised.
+        '''
+        (generation, template, boards, bit, spacing, margins) = request
+        if generation < self.generation:
+            return
+        try:
+            if self.geom is None:
+                self.geom = router.Joint_Geometry(template, boards, bit, spacing, margins,\
+                                                  self.config.caul_trim)
+            else:
+                self.geom.update(template, boards, bit, spacing, margins,\
+                                 self.config.caul_trim)
+        except Exception as e:
+            self.geom = None
+            self.finished.emit((generation, None, e))
+            return
+        self.finished.emit((generation, self.geom.snapshot(), None))
+
+class Figure_Painter(object):
+    '''
+    Paints the joint geometry, geom, with a QPainter on any paint device, so
+    that a figure may be drawn without a window.
+
+    The view of the figure is the figure fitted to the device, scaled by zoom,
+    and then shifted by pan, in pixels.  Only the screen changes the view.
+    '''
+    # the static layers of the figure, in the order drawn by paint_all()
+    layers = ['boards', 'template', 'title', 'cut_sizes']
+
+    def __init__(self, config, image_class):
+        '''
+        image_class is QPixmap or QImage, the class of the wood images
+        '''
         self.config = config
         self.fig_width = -1
         self.fig_height = -1
-        self.set_fig_dimensions(template, boards)
         # if subsequent passes are less than this value, don't label
         # the pass (in increments)
         #self.sep_annotate = 4
         self.sep_annotate = 0
+        # visible is the range of x in the figure on the screen, or None if
+        # all of the figure is drawn, with every label, as when printing
+        self.zoom = 1.0
+        self.pan = (0, 0)
+        self.view_zoom = 1.0
+        self.visible = None
+        # visible_y is the range of y in the figure on the painter window,
+        # so that a tile of an image skips what is outside of it
+        self.visible_y = None
         self.geom = None
+        self.woods = {}
+        # the fills of the active boards when last painted
+        self.board_woods = None
+        self.transform = None
+        # the device position of the top left of the whole image, which
+        # differs from (0, 0) when painting a tile of the image
+        self.image_origin = (0, 0)
         (r, g, b) = config.background_color
         self.background = QtGui.QBrush(QtGui.QColor(r, g, b))
         self.current_background = self.background
         self.labels = ['B', 'C', 'D', 'E', 'F']
         # font sizes are in 1/32" of an inch
         self.font_size = {'title':4, 'fingers':3, 'template':2, 'boards':4, 'template_labels':3}
-
-    def minimumSizeHint(self):
-        '''
-        Minimum size for this widget
-        '''
-        return QtCore.QSize(100, 100)
-
-    def sizeHint(self):
-        '''
-        Size hint for this widget
-        '''
-        return QtCore.QSize(self.window_width, self.window_height)
+        # the time to draw each layer, in seconds
+        self.paint_times = {}
+        self.textures = Texture_Cache(config.texture_cache_mb * 1024 * 1024,\
+                                      config.texture_size, image_class)
 
     def set_fig_dimensions(self, template, boards):
         '''
@@ -182,118 +443,41 @@ class Qt_Plotter(QtGui.QWidget):
 
         return dimensions_changed
 
-    def draw(self, template, boards, bit, spacing, woods):
-        '''
-        Draws the figure
-        '''
-        # Generate the new geometry layout
-        self.set_fig_dimensions(template, boards)
-        self.woods = woods
-        self.geom = router.Joint_Geometry(template, boards, bit, spacing, self.margins,\
-                                          self.config.caul_trim)
-        self.current_background = self.background
-        self.update()
-
-    def print_fig(self, template, boards, bit, spacing, woods):
-        '''
-        Prints the figure
-        '''
-        self.woods = woods
-        self.current_background = None
-
-        # Generate the new geometry layout
-        self.set_fig_dimensions(template, boards)
-        self.geom = router.Joint_Geometry(template, boards, bit, spacing, self.margins,\
-                                          self.config.caul_trim)
-
-        # Print through the preview dialog
-        printer = QtGui.QPrinter(QtGui.QPrinter.HighResolution)
-        printer.setOrientation(QtGui.QPrinter.Landscape)
-        printer.setPageMargins(0, 0, 0, 0, QtGui.QPrinter.Inch)
-        pdialog = QtGui.QPrintPreviewDialog(printer)
-        pdialog.setModal(True)
-        pdialog.paintRequested.connect(self.preview_requested)
-        return pdialog.exec_()
-
-    def image_fig(self, template, boards, bit, spacing, woods, min_width):
-        '''
-        Prints the figure to a QImage object
-        '''
-        self.woods = woods
-        self.set_fig_dimensions(template, boards)
-        self.geom = router.Joint_Geometry(template, boards, bit, spacing, self.margins,\
-                                          self.config.caul_trim)
-        self.current_background = self.background
-
-        s = self.size()
-        window_ar = float(s.width()) / s.height()
-        fig_ar = float(self.fig_width) / self.fig_height
-        if window_ar < fig_ar:
-            w = max(min_width, s.width())
-        else:
-            w = max(min_width, int(s.height() * fig_ar))
-        h = utils.my_round(w / fig_ar)
-        sNew = QtCore.QSize(w, h)
-
-        image = QtGui.QImage(sNew, QtGui.QImage.Format_RGB32)
-        painter = QtGui.QPainter()
-        painter.begin(image)
-        size = image.size()
-        painter.fillRect(0, 0, size.width(), size.height(), self.background)
-        self.paint_all(painter)
-        painter.end()
-        return image
-
-    def preview_requested(self, printer):
-        '''
-        Handles the print preview action.
-        '''
-        dpi = printer.resolution()
-        painter = QtGui.QPainter()
-        painter.begin(printer)
-        self.paint_all(painter, dpi)
-        painter.end()
-
-    def paintEvent(self, event):
-        '''
-        Handles the paint event, which draws to the screen
-        '''
-        if self.geom is None:
-            return
-
-        painter = QtGui.QPainter(self)
-        size = self.size()
-        # on the screen, we add a background color:
-        painter.fillRect(0, 0, size.width(), size.height(), self.background)
-        # paint all of the objects
-        self.window_width, self.window_height = self.paint_all(painter)
-        # on the screen, highlight the active cuts
-        self.draw_active_cuts(painter)
-        painter.end()
-
     def set_font_size(self, painter, param):
         '''
         Sets the font size for type param
         '''
         font_inches = self.font_size[param] / 32.0 * self.geom.bit.units.increments_per_inch
         font = painter.font()
-        xx = self.transform.map(font_inches, 0)[0] - self.transform.dx()
+        # zooming the view spreads out the text, rather than enlarging it
+        xx = (self.transform.map(font_inches, 0)[0] - self.transform.dx()) / self.view_zoom
         font.setPixelSize(utils.my_round(xx))
         painter.setFont(font)
 
-    def paint_all(self, painter, dpi=None):
+    def paint_all(self, painter, dpi=None, view=False, size=None):
         '''
         Paints all the objects.
 
         painter: A QPainter object
         dpi: The resolution of the painter, in dots-per-inch.  If None, then
              the image is maximized in the window, but maintaining aspect ratio.
+        view: If True, apply the zoom and pan of the screen, and skip what is
+              outside of the painter window.
+        size: If not None, the (width, height) of the image to fit, instead of
+              the painter window.
         '''
-        rw = painter.window()
-        window_width = rw.width()
-        window_height = rw.height()
+        if size is None:
+            rw = painter.window()
+            (window_width, window_height) = (rw.width(), rw.height())
+        else:
+            (window_width, window_height) = size
         units = self.geom.bit.units
 
+        self.view_zoom = 1.0
+        if view:
+            painter.translate(self.pan[0], self.pan[1])
+            painter.scale(self.zoom, self.zoom)
+            self.view_zoom = self.zoom
         if dpi is None:
             # transform the painter to maintain the figure aspect ratio in the current
             # window
@@ -313,14 +497,23 @@ class Qt_Plotter(QtGui.QWidget):
             scale = float(dpi) / units.increments_per_inch
         painter.scale(scale, -scale)
         self.transform = painter.transform()
+        self.visible = None
+        inverted = self.transform.inverted()[0]
+        y0 = inverted.map(0, 0)[1]
+        y1 = inverted.map(0, painter.window().height())[1]
+        self.visible_y = (min(y0, y1), max(y0, y1))
+        if view:
+            x0 = inverted.map(0, 0)[0]
+            x1 = inverted.map(painter.window().width(), 0)[0]
+            self.visible = (min(x0, x1), max(x0, x1))
 
         painter.setPen(QtCore.Qt.black)
 
-        # draw the objects
-        self.draw_boards(painter)
-        self.draw_template(painter)
-        self.draw_title(painter)
-        self.draw_cut_sizes(painter)
+        # draw the objects, timing each layer
+        for name in self.layers:
+            t = time.time()
+            getattr(self, 'draw_' + name)(painter)
+            self.paint_times[name] = time.time() - t
 
         return (window_width, window_height)
 
@@ -336,18 +529,47 @@ class Qt_Plotter(QtGui.QWidget):
             shift = (0, -2)
         else:
             shift = (0, 2)
-        passMid = None
         self.set_font_size(painter, 'template')
-        for c in cuts[::-1]:
-            for p in lrange(len(c.passes) - 1, -1, -1):
-                xp = c.passes[p] + board_T.xL()
+        # cuts is a Cut_Array, so read its passes directly.  The lines of all
+        # of the visible passes are drawn with one call, and then the labels.
+        # On the screen, a label closer than the text height, in pixels, to
+        # the previous label is dropped.  Printed figures keep every label.
+        passes = cuts.passes
+        offsets = cuts.offsets
+        # the passes are numbered from the right, and the label of the first
+        # pass at the middle is returned, even if nothing is drawn
+        passMid = None
+        xm = xMid - board_T.xL()
+        if xm in passes:
+            passMid = '%d%s' % (len(passes) - passes.index(xm), blabel)
+        # the labels extend from y1 by at most the width of the longest one
+        pad = painter.fontMetrics().width('%d%s' % (len(passes), blabel)) + abs(shift[1])
+        if not self.visible_rows(min(y1, y2), max(y1, y2), pad):
+            return passMid
+        (xmin, xmax) = self.visible_range()
+        sep = 0
+        if self.visible is not None:
+            sep = painter.fontMetrics().height()
+        last = None
+        lines = []
+        labels = []
+        for i in lrange(len(cuts) - 1, -1, -1):
+            for p in lrange(offsets[i + 1] - 1, offsets[i] - 1, -1):
+                xp = passes[p] + board_T.xL()
                 ip += 1
+                if xp < xmin or xp > xmax:
+                    continue
                 label = '%d%s' % (ip, blabel)
-                if xp == xMid:
-                    passMid = label
-                painter.drawLine(xp, y1, xp, y2)
-                if p == 0 or c.passes[p] - c.passes[p-1] > self.sep_annotate:
-                    paint_text(painter, label, (xp, y1), flags, shift, -90, fill=brush)
+                lines.append(QtCore.QLineF(xp, y1, xp, y2))
+                if p == offsets[i] or passes[p] - passes[p-1] > self.sep_annotate:
+                    px = self.transform.map(xp, 0)[0]
+                    if last is None or abs(px - last) >= sep:
+                        labels.append((label, xp))
+                        last = px
+        if lines:
+            painter.drawLines(lines)
+        for (label, xp) in labels:
+            paint_text(painter, label, (xp, y1), flags, shift, -90, fill=brush)
         return passMid
 
     def draw_alignment(self, painter):
@@ -531,22 +753,29 @@ class Qt_Plotter(QtGui.QWidget):
         if not board.active:
             return
         (x, y) = board.perimeter(bit)
+        if not self.visible_rows(min(y), max(y), 1):
+            return
         painter.save()
         pen = QtGui.QPen(QtCore.Qt.black)
         pen.setWidthF(0)
         painter.setPen(pen)
+        poly = QtGui.QPolygonF([QtCore.QPointF(xi, yi) for (xi, yi) in zip(x, y)])
         icon = self.woods[board.wood]
         if isinstance(icon, str):
-            brush = QtGui.QBrush(QtGui.QPixmap(icon))
+            # decode the image no larger than the board on the device, rounded
+            # up to a power of two so that small zooms reuse the pixmap
+            rect = self.transform.mapRect(poly.boundingRect())
+            target = 64
+            while target < max(rect.width(), rect.height()):
+                target *= 2
+            brush = QtGui.QBrush(self.textures.pixmap(icon, target))
         else:
             brush = QtGui.QBrush(QtCore.Qt.black, icon)
         (inverted, invertable) = self.transform.inverted()
-        brush.setMatrix(inverted.toAffine())
+        # anchor the fill to the whole image, rather than to a tile of it
+        origin = QtGui.QTransform.fromTranslate(self.image_origin[0], self.image_origin[1])
+        brush.setMatrix((origin * inverted).toAffine())
         painter.setBrush(brush)
-        n = len(x)
-        poly = QtGui.QPolygonF()
-        for i in lrange(n):
-            poly.append(QtCore.QPointF(x[i], y[i]))
         painter.drawPolygon(poly)
         painter.restore()
 
@@ -554,6 +783,11 @@ class Qt_Plotter(QtGui.QWidget):
         '''
         Draws all the boards
         '''
+        # check the wood image files for changes only when the woods change
+        woods = [self.woods[b.wood] for b in self.geom.boards if b.active]
+        if woods != self.board_woods:
+            self.board_woods = woods
+            self.textures.refresh()
 
         # Draw the A and B boards
         for i in lrange(4):
@@ -614,13 +848,9 @@ class Qt_Plotter(QtGui.QWidget):
             xRB -= self.geom.bit.offset
         yB = boards[0].yB()
         yT = yB + self.geom.bit.depth
-        poly = QtGui.QPolygonF()
-        poly.append(QtCore.QPointF(xLT, yT))
-        poly.append(QtCore.QPointF(xRT, yT))
-        poly.append(QtCore.QPointF(xRB, yB))
-        poly.append(QtCore.QPointF(xLB, yB))
-        poly.append(QtCore.QPointF(xLT, yT))
-        return poly
+        return QtGui.QPolygonF([QtCore.QPointF(xLT, yT), QtCore.QPointF(xRT, yT),\
+                                QtCore.QPointF(xRB, yB), QtCore.QPointF(xLB, yB),\
+                                QtCore.QPointF(xLT, yT)])
 
     def draw_active_cuts(self, painter):
         '''
@@ -639,27 +869,18 @@ class Qt_Plotter(QtGui.QWidget):
         painter.drawPolyline(poly)
         painter.restore()
 
-        # initialize limits
-        xminG = self.geom.boards[0].width
-        xmaxG = 0
-
-        # draw the active cuts filled, and track the limits
+        # draw the active cuts filled
         painter.save()
         brush = QtGui.QBrush(QtGui.QColor(255, 0, 0, 75))
         painter.setBrush(brush)
         for f in self.geom.spacing.active_cuts:
             poly = self.cut_polygon(self.geom.boards[0].bottom_cuts[f])
             painter.drawPolygon(poly)
-            # keep track of the limits
-            (xmin, xmax) = self.geom.spacing.get_limits(f)
-            xminG = min(xminG, xmin)
-            xmaxG = max(xmaxG, xmax)
         painter.restore()
 
         # draw the limits
         painter.save()
-        xminG += self.geom.boards[0].xL()
-        xmaxG += self.geom.boards[0].xL()
+        (xminG, xmaxG) = self.active_limits()
         yB = self.geom.boards[0].yB()
         yT = self.geom.boards[0].yT()
         painter.setPen(QtCore.Qt.green)
@@ -667,6 +888,18 @@ class Qt_Plotter(QtGui.QWidget):
         painter.drawLine(xmaxG, yB, xmaxG, yT)
         painter.restore()
 
+    def active_limits(self):
+        '''
+        Returns (xmin, xmax), the limits in x of all of the active cuts
+        '''
+        xminG = self.geom.boards[0].width
+        xmaxG = 0
+        for f in self.geom.spacing.active_cuts:
+            (xmin, xmax) = self.geom.spacing.get_limits(f)
+            xminG = min(xminG, xmin)
+            xmaxG = max(xmaxG, xmax)
+        return (xminG + self.geom.boards[0].xL(), xmaxG + self.geom.boards[0].xL())
+
     def draw_title(self, painter):
         '''
         Draws the title
@@ -712,20 +945,546 @@ class Qt_Plotter(QtGui.QWidget):
         # Draw the router passes
         # ... do the B cuts
         flags = QtCore.Qt.AlignHCenter | QtCore.Qt.AlignTop
-        shift = (0, 8)
-        for c in bcuts:
-            x = self.geom.boards[1].xL() + (c.xmin + c.xmax) // 2
-            y = self.geom.boards[1].yT()
-            label = '%d' % (c.xmax - c.xmin)
-            p = (x, y)
-            paint_text(painter, label, p, flags, shift, fill=self.current_background)
+        self.draw_cut_labels(painter, bcuts, self.geom.boards[1], self.geom.boards[1].yT(),\
+                             flags, (0, 8))
         # ... do the A cuts
         flags = QtCore.Qt.AlignHCenter | QtCore.Qt.AlignBottom
-        shift = (0, -8)
-        for c in acuts:
-            x = self.geom.boards[0].xL() + (c.xmin + c.xmax) // 2
-            y = self.geom.boards[0].yB()
+        self.draw_cut_labels(painter, acuts, self.geom.boards[0], self.geom.boards[0].yB(),\
+                             flags, (0, -8))
+
+    def draw_cut_labels(self, painter, cuts, board, y, flags, shift):
+        '''
+        Labels the visible cuts on board with their sizes, at height y.  On
+        the screen, a label that would overlap the previous label is dropped.
+        '''
+        # the labels, and their fill, extend from y by shift and the text height
+        pad = painter.fontMetrics().height() + abs(shift[1]) + 2
+        if not self.visible_rows(y, y, pad):
+            return
+        (xmin, xmax) = self.visible_range()
+        thin = self.visible is not None
+        last = None
+        for c in cuts:
+            x = board.xL() + (c.xmin + c.xmax) // 2
+            if x < xmin or x > xmax:
+                continue
             label = '%d' % (c.xmax - c.xmin)
-            p = (x, y)
-            paint_text(painter, label, p, flags, shift, fill=self.current_background)
+            if thin:
+                width = text_cache.bounding_rect(painter, label, flags).width()
+                px = self.transform.map(x, 0)[0]
+                if last is not None and px - width // 2 < last:
+                    continue
+                last = px + width - width // 2
+            paint_text(painter, label, (x, y), flags, shift, fill=self.current_background)
+
+    def visible_range(self):
+        '''
+        Returns (xmin, xmax), the range of x in the figure that is drawn
+        '''
+        if self.visible is None:
+            return (float('-inf'), float('inf'))
+        return self.visible
+
+    def visible_rows(self, y1, y2, pad=0):
+        '''
+        Returns True if any of y1 <= y <= y2 in the figure, extended by pad
+        pixels, is drawn on the painter window
+        '''
+        if self.visible_y is None:
+            return True
+        pad /= abs(self.transform.m22())
+        return y2 + pad >= self.visible_y[0] and y1 - pad <= self.visible_y[1]
+
+    def write_png(self, filename, size, texts, tile_rows):
+        '''
+        Writes the figure, fitted to the QSize size, as a PNG file, along
+        with the dictionary texts as text chunks.  The image is painted in
+        tiles of tile_rows rows, each of which is written as soon as it is
+        painted, so that only one tile is in memory.
+        '''
+        (w, h) = (size.width(), size.height())
+        with open(filename, 'wb') as fd:
+            writer = png_file.PNG_Writer(fd, w, h)
+            for key in sorted(texts.keys()):
+                writer.write_text(key, texts[key])
+            for y in lrange(0, h, tile_rows):
+                rows = min(tile_rows, h - y)
+                tile = QtGui.QImage(w, rows, QtGui.QImage.Format_RGB32)
+                painter = QtGui.QPainter()
+                painter.begin(tile)
+                painter.fillRect(0, 0, w, rows, self.background)
+                # paint the whole figure, shifted up to this tile
+                painter.translate(0, -y)
+                self.image_origin = (0, -y)
+                self.paint_all(painter, size=(w, h))
+                self.image_origin = (0, 0)
+                painter.end()
+                tile = tile.convertToFormat(QtGui.QImage.Format_RGB888)
+                data = tile.bits().asstring(tile.byteCount())
+                bpl = tile.bytesPerLine()
+                writer.write_rows([data[i * bpl:i * bpl + 3 * w] for i in lrange(rows)])
+            writer.close()
+
+class Qt_Plotter(QtGui.QWidget, Figure_Painter):
+    '''
+    Plots the template and boards on the screen, using Qt.
+
+    The geometry for the screen is computed by a Geometry_Worker, and until
+    it finishes, the last geometry computed is painted.  The worker's thread
+    is started by the first request, so a plotter that only draws with wait
+    has no thread.  An exception raised by the worker is emitted with
+    geometry_error.
+    '''
+    request_geometry = QtCore.pyqtSignal(object)
+    geometry_error = QtCore.pyqtSignal(object)
+    def __init__(self, template, boards, config):
+        QtGui.QWidget.__init__(self)
+        Figure_Painter.__init__(self, config, QtGui.QPixmap)
+        self.set_fig_dimensions(template, boards)
+        # drag_start is the mouse position when panning
+        self.drag_start = None
+        # geom is from request geom_generation, and is painted with selection,
+        # the newest (cursor_cut, active_cuts) of the spacing
+        self.geom_generation = 0
+        self.selection = None
+        # the cached static layers, and the key of their geometry, size and
+        # zoom.  When zoomed, the layers extend static_margin pixels beyond
+        # each side of the screen, and are drawn with the pan static_pan.
+        self.static_layer = None
+        self.static_key = None
+        self.static_transform = None
+        self.static_margin = (0, 0)
+        self.static_pan = (0, 0)
+        # the geometry worker and its thread, started by start_worker()
+        self.generation = 0
+        self.worker = None
+        self.worker_thread = None
+
+    def minimumSizeHint(self):
+        '''
+        Minimum size for this widget
+        '''
+        return QtCore.QSize(100, 100)
+
+    def sizeHint(self):
+        '''
+        Size hint for this widget
+        '''
+        return QtCore.QSize(self.window_width, self.window_height)
+
+    def copy_inputs(self, bit, boards, spacing):
+        '''
+        Returns copies of the geometry inputs, so that the geometry does not
+        share any state that the driver changes.
+        '''
+        bit = copy.copy(bit)
+        boards = [copy.copy(b) for b in boards]
+        return (bit, boards, spacing.snapshot(bit, boards))
+
+    def update_geometry(self, template, boards, bit, spacing):
+        '''
+        Updates the figure dimensions and computes the geometry layout now,
+        discarding any geometry that the worker has yet to finish.
+        '''
+        self.set_fig_dimensions(template, boards)
+        self.generation += 1
+        if self.worker is not None:
+            self.worker.generation = self.generation
+        (bit, boards, spacing) = self.copy_inputs(bit, boards, spacing)
+        self.selection = (spacing.cursor_cut, spacing.active_cuts)
+        self.geom = router.Joint_Geometry(template, boards, bit, spacing, self.margins,\
+                                          self.config.caul_trim)
+        self.geom_generation = self.generation
+
+    def request_update(self, template, boards, bit, spacing):
+        '''
+        Requests the geometry layout from the worker, which computes it on
+        copies of the inputs.
+        '''
+        self.start_worker()
+        self.generation += 1
+        self.worker.generation = self.generation
+        (bit, boards, spacing) = self.copy_inputs(bit, boards, spacing)
+        self.selection = (spacing.cursor_cut, spacing.active_cuts)
+        # the margins depend on the template, so find them for the request,
+        # and then restore the dimensions of the geometry being painted
+        self.set_fig_dimensions(template, boards)
+        margins = self.margins
+        self.set_fig_dimensions(self.geom.template, self.geom.boards)
+        self.request_geometry.emit((self.generation, template, boards, bit, spacing, margins))
+
+    @QtCore.pyqtSlot(object)
+    def _on_geometry(self, result):
+        '''Handles a geometry computed by the worker'''
+        (generation, geom, error) = result
+        if generation != self.generation:
+            # a newer geometry is on its way, or was computed here
+            return
+        if error is not None:
+            # this slot is called by the event loop, so raising would lose it
+            self.geometry_error.emit(error)
+            return
+        (geom.spacing.cursor_cut, geom.spacing.active_cuts) = self.selection
+        self.geom = geom
+        self.geom_generation = generation
+        self.set_fig_dimensions(geom.template, geom.boards)
+        if self.config.debug:
+            print('geometry counts:', self.geom.counts)
+            print('cut cache:', router.cut_cache.stats())
+            print('texture cache:', self.textures.stats())
+            print('text cache:', text_cache.stats())
+        self.update()
+
+    def draw_overlay(self, spacing):
+        '''
+        Draws the cursor and active cuts of spacing over the cached static
+        layers, when the cuts themselves are unchanged.  Only the parts of the
+        screen covered by the old or new selection are repainted.
+        '''
+        self.selection = (spacing.cursor_cut, copy.copy(spacing.active_cuts))
+        if self.geom is not None and self.geom_generation == self.generation:
+            # repaint only where the old and new selections are drawn
+            region = self.overlay_region()
+            (self.geom.spacing.cursor_cut, self.geom.spacing.active_cuts) = self.selection
+            self.update(region.united(self.overlay_region()))
+
+    def start_worker(self):
+        '''Starts the geometry worker and its thread, if not yet started'''
+        if self.worker is not None:
+            return
+        self.worker = Geometry_Worker(self.config)
+        self.worker_thread = QtCore.QThread()
+        self.worker.moveToThread(self.worker_thread)
+        self.request_geometry.connect(self.worker.compute)
+        self.worker.finished.connect(self._on_geometry)
+        QtGui.qApp.aboutToQuit.connect(self.stop_worker)
+        self.worker_thread.start()
+
+    @QtCore.pyqtSlot()
+    def stop_worker(self):
+        '''Stops the thread of the geometry worker, if started'''
+        if self.worker is None:
+            return
+        QtGui.qApp.aboutToQuit.disconnect(self.stop_worker)
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+        self.request_geometry.disconnect(self.worker.compute)
+        self.worker = None
+        self.worker_thread = None
+
+    def draw(self, template, boards, bit, spacing, woods, wait=False):
+        '''
+        Draws the figure.  If wait, the geometry is computed and painted
+        before returning.
+        '''
+        # Request the new geometry layout, which repaints when it arrives
+        self.woods = woods
+        self.current_background = self.background
+        if wait:
+            self.update_geometry(template, boards, bit, spacing)
+            self.repaint()
+        elif self.geom is None:
+            self.update_geometry(template, boards, bit, spacing)
+            self.update()
+        else:
+            self.request_update(template, boards, bit, spacing)
+
+    def print_fig(self, template, boards, bit, spacing, woods):
+        '''
+        Prints the figure
+        '''
+        self.woods = woods
+        self.current_background = None
+
+        # Generate the new geometry layout
+        self.update_geometry(template, boards, bit, spacing)
+
+        # Print through the preview dialog
+        printer = QtGui.QPrinter(QtGui.QPrinter.HighResolution)
+        printer.setOrientation(QtGui.QPrinter.Landscape)
+        printer.setPageMargins(0, 0, 0, 0, QtGui.QPrinter.Inch)
+        pdialog = QtGui.QPrintPreviewDialog(printer)
+        pdialog.setModal(True)
+        pdialog.paintRequested.connect(self.preview_requested)
+        return pdialog.exec_()
+
+    def image_fig(self, template, boards, bit, spacing, woods, min_width):
+        '''
+        Prints the figure to a QImage object
+        '''
+        self.woods = woods
+        self.update_geometry(template, boards, bit, spacing)
+        self.current_background = self.background
+
+        image = QtGui.QImage(self.image_size(min_width), QtGui.QImage.Format_RGB32)
+        painter = QtGui.QPainter()
+        painter.begin(image)
+        size = image.size()
+        painter.fillRect(0, 0, size.width(), size.height(), self.background)
+        self.paint_all(painter)
+        painter.end()
+        return image
+
+    def image_size(self, min_width):
+        '''
+        Returns the QSize of an image of the figure, at least min_width pixels
+        wide, and as wide as the figure on the screen.
+        '''
+        s = self.size()
+        window_ar = float(s.width()) / s.height()
+        fig_ar = float(self.fig_width) / self.fig_height
+        if window_ar < fig_ar:
+            w = max(min_width, s.width())
+        else:
+            w = max(min_width, int(s.height() * fig_ar))
+        h = utils.my_round(w / fig_ar)
+        return QtCore.QSize(w, h)
+
+    def save_image_tiles(self, filename, template, boards, bit, spacing, woods, min_width,\
+                         texts, tile_rows):
+        '''
+        Saves the figure as a PNG file, as image_fig() would form it, along
+        with the dictionary texts as text chunks.  See write_png().
+        '''
+        self.woods = woods
+        self.update_geometry(template, boards, bit, spacing)
+        self.current_background = self.background
+
+        self.write_png(filename, self.image_size(min_width), texts, tile_rows)
+
+    def preview_requested(self, printer):
+        '''
+        Handles the print preview action.
+        '''
+        dpi = printer.resolution()
+        painter = QtGui.QPainter()
+        painter.begin(printer)
+        self.paint_all(painter, dpi)
+        painter.end()
 
+    def screen_transform(self):
+        '''
+        Returns the transform from the figure to the screen, which is that of
+        the static layers shifted by the pan since they were drawn
+        '''
+        dx = self.pan[0] - self.static_pan[0] - self.static_margin[0]
+        dy = self.pan[1] - self.static_pan[1] - self.static_margin[1]
+        return self.static_transform * QtGui.QTransform.fromTranslate(dx, dy)
+
+    def paintEvent(self, event):
+        '''
+        Handles the paint event, which draws to the screen.  The static layers
+        of the figure are drawn to the pixmap static_layer, which is reused
+        until the geometry, the widget size or the zoom changes, and the
+        active cuts are drawn over it.  Panning shifts the pixmap, until the
+        screen moves past its margins.
+        '''
+        if self.geom is None:
+            return
+
+        size = self.size()
+        key = (self.geom_generation, size.width(), size.height(), self.zoom)
+        (mx, my) = self.static_margin
+        dx = self.pan[0] - self.static_pan[0]
+        dy = self.pan[1] - self.static_pan[1]
+        cached = (key == self.static_key and abs(dx) <= mx and abs(dy) <= my)
+        t = time.time()
+        if not cached:
+            # at a zoom of 1, there is no panning, so no margins
+            (mx, my) = (0, 0)
+            if self.zoom > 1.0:
+                (mx, my) = (size.width() // 2, size.height() // 2)
+            (w, h) = (size.width() + 2 * mx, size.height() + 2 * my)
+            self.static_layer = QtGui.QPixmap(w, h)
+            painter = QtGui.QPainter(self.static_layer)
+            # on the screen, we add a background color:
+            painter.fillRect(0, 0, w, h, self.background)
+            # paint all of the objects, fitted to the screen and shifted by
+            # the margins
+            pan = self.pan
+            self.pan = (pan[0] + mx, pan[1] + my)
+            self.window_width, self.window_height = \
+                self.paint_all(painter, view=True, size=(size.width(), size.height()))
+            self.pan = pan
+            painter.end()
+            self.static_key = key
+            self.static_transform = self.transform
+            self.static_margin = (mx, my)
+            self.static_pan = pan
+            (dx, dy) = (0, 0)
+        painter = QtGui.QPainter(self)
+        rect = event.rect()
+        painter.drawPixmap(rect, self.static_layer, rect.translated(mx - dx, my - dy))
+        t_static = time.time() - t
+        # on the screen, highlight the active cuts
+        t = time.time()
+        painter.setTransform(self.screen_transform())
+        self.draw_active_cuts(painter)
+        painter.end()
+        t_overlay = time.time() - t
+        if self.config.debug:
+            if cached:
+                print('paint: static %.2f ms (cached)' % (1000 * t_static), end=' ')
+            else:
+                print('paint: static %.2f ms (' % (1000 * t_static) +\
+                      ', '.join(['%s %.2f ms' % (name, 1000 * self.paint_times[name])\
+                                 for name in self.layers]) + ')', end=' ')
+            print('overlay %.2f ms' % (1000 * t_overlay))
+
+    def overlay_region(self):
+        '''
+        Returns the QRegion of the screen that draw_active_cuts() paints
+        '''
+        region = QtGui.QRegion()
+        f = self.geom.spacing.cursor_cut
+        if f is None or self.static_transform is None:
+            return region
+        cuts = self.geom.boards[0].bottom_cuts
+        rects = [self.cut_polygon(cuts[f]).boundingRect()]
+        for f in self.geom.spacing.active_cuts:
+            rects.append(self.cut_polygon(cuts[f]).boundingRect())
+        yB = self.geom.boards[0].yB()
+        yT = self.geom.boards[0].yT()
+        for x in self.active_limits():
+            rects.append(QtCore.QRectF(x, yB, 0, yT - yB))
+        transform = self.screen_transform()
+        for r in rects:
+            # pad for the width of the pens
+            r = transform.mapRect(r).toAlignedRect().adjusted(-2, -2, 2, 2)
+            region = region.united(QtGui.QRegion(r))
+        return region
+
+    def wheelEvent(self, event):
+        '''
+        Zooms the view in or out, keeping the point under the mouse fixed
+        '''
+        zoom = self.zoom * 1.25 ** (event.delta() / 120.0)
+        zoom = min(max(zoom, 1.0), 256.0)
+        f = zoom / self.zoom
+        (x, y) = (event.pos().x(), event.pos().y())
+        self.pan = (x - (x - self.pan[0]) * f, y - (y - self.pan[1]) * f)
+        self.zoom = zoom
+        if zoom == 1.0:
+            self.pan = (0, 0)
+        self.update()
+
+    def mousePressEvent(self, event):
+        '''Starts panning the view'''
+        if event.button() == QtCore.Qt.LeftButton and self.zoom > 1.0:
+            self.drag_start = (event.pos().x() - self.pan[0], event.pos().y() - self.pan[1])
+
+    def mouseMoveEvent(self, event):
+        '''Pans the view'''
+        if self.drag_start is not None:
+            self.pan = (event.pos().x() - self.drag_start[0],\
+                        event.pos().y() - self.drag_start[1])
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        '''Stops panning the view'''
+        self.drag_start = None
+
+    def mouseDoubleClickEvent(self, event):
+        '''Resets the view to fit the whole figure'''
+        self.zoom = 1.0
+        self.pan = (0, 0)
+        self.update()
+
+def has_display():
+    '''
+    Returns True unless running on X11 without a display, where no GUI
+    application may be created
+    '''
+    return not sys.platform.startswith('linux') or bool(os.environ.get('DISPLAY'))
+
+def application():
+    '''
+    Returns the application, creating one if there is none, so that figures
+    may be painted without a window.  Fonts and printers need a GUI
+    application, so raises a Qt_Fig_Exception if there is no display.  On a
+    server, run under a virtual display, such as with xvfb-run.
+    '''
+    global _app
+    app = QtGui.QApplication.instance()
+    if app is None:
+        if not has_display():
+            raise Qt_Fig_Exception('painting figures requires a display;'\
+                                   ' set DISPLAY, or run under xvfb-run')
+        _app = QtGui.QApplication(sys.argv[:1])
+        app = _app
+    return app
+
+def headless_figure(template, boards, bit, spacing, config, woods=None):
+    '''
+    Returns a Figure_Painter of the joint geometry, for painting without a
+    window.
+
+    woods is the dictionary of fills for the boards, as for Qt_Fig.draw().
+    If None, the wood patterns and the images in config.wood_images are used.
+    Boards whose wood is not in woods are filled with config.default_wood.
+    '''
+    application()
+    if woods is None:
+        woods = utils.create_wood_dict(config.wood_images)
+        woods.update(wood_patterns)
+    # paint with images, since pixmaps require a window system
+    fig = Figure_Painter(config, QtGui.QImage)
+    fig.set_fig_dimensions(template, boards)
+    fig.woods = dict(woods)
+    default = fig.woods.get(config.default_wood, QtCore.Qt.DiagCrossPattern)
+    for b in boards:
+        if b.wood not in fig.woods:
+            fig.woods[b.wood] = default
+    fig.geom = router.Joint_Geometry(template, boards, bit, spacing, fig.margins,\
+                                     config.caul_trim)
+    return fig
+
+def export_figure(filename, template, boards, bit, spacing, config, woods=None):
+    '''
+    Exports the figure to filename at true scale, without a window, so that
+    it may be called from a batch process.  The format is SVG if filename
+    ends in .svg, and PDF otherwise.  See headless_figure() for woods.
+    '''
+    fig = headless_figure(template, boards, bit, spacing, config, woods)
+    fig.current_background = None
+
+    dpi = 1200
+    if filename.lower().endswith('.svg'):
+        from PyQt4 import QtSvg
+        scale = float(dpi) / bit.units.increments_per_inch
+        device = QtSvg.QSvgGenerator()
+        device.setFileName(filename)
+        device.setResolution(dpi)
+        device.setSize(QtCore.QSize(utils.my_round(fig.fig_width * scale),\
+                                    utils.my_round(fig.fig_height * scale)))
+        device.setTitle('pyRouterJig')
+    else:
+        device = QtGui.QPrinter(QtGui.QPrinter.HighResolution)
+        device.setOutputFormat(QtGui.QPrinter.PdfFormat)
+        device.setOutputFileName(filename)
+        device.setFullPage(True)
+        device.setPageMargins(0, 0, 0, 0, QtGui.QPrinter.Inch)
+        device.setPaperSize(QtCore.QSizeF(bit.units.increments_to_inches(fig.fig_width),\
+                                          bit.units.increments_to_inches(fig.fig_height)),\
+                            QtGui.QPrinter.Inch)
+        dpi = device.resolution()
+    painter = QtGui.QPainter()
+    if not painter.begin(device):
+        raise IOError('unable to write %s' % filename)
+    fig.paint_all(painter, dpi)
+    painter.end()
+
+def render_image(filename, template, boards, bit, spacing, config, texts, woods=None):
+    '''
+    Renders the figure, without a window, to the PNG file filename, along
+    with the dictionary texts as text chunks.  The image is
+    config.min_image_width pixels wide, and is painted in tiles of
+    config.image_tile_rows rows.  See headless_figure() for woods.
+    '''
+    fig = headless_figure(template, boards, bit, spacing, config, woods)
+    w = config.min_image_width
+    h = utils.my_round(w * fig.fig_height / fig.fig_width)
+    tile_rows = config.image_tile_rows
+    if tile_rows <= 0:
+        tile_rows = h
+    fig.write_png(filename, QtCore.QSize(w, h), texts, tile_rows)
@@ -0,0 +1,116 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Tests for qt_fig, which paint to images and files, so no window is shown.
+Requires PyQt4 and a display, such as from xvfb-run.
+'''
+from future.utils import lrange
+
+import os
+import shutil
+import tempfile
+import unittest
+import batch
+
+try:
+    from PyQt4 import QtCore, QtGui
+    import qt_fig
+except ImportError:
+    qt_fig = None
+
+@unittest.skipUnless(qt_fig and qt_fig.has_display(), 'requires PyQt4 and a display')
+class Render_Image_Test(unittest.TestCase):
+    '''
+    Tests render_image
+    '''
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    def grain(self):
+        '''Returns the woods, with a wood image of varying color'''
+        qt_fig.application()
+        image = QtGui.QImage(37, 53, QtGui.QImage.Format_RGB32)
+        for y in lrange(image.height()):
+            for x in lrange(image.width()):
+                image.setPixel(x, y, QtGui.qRgb(5 * x, 4 * y, 3 * (x + y)))
+        filename = os.path.join(self.directory, 'grain.png')
+        image.save(filename)
+        woods = dict(qt_fig.wood_patterns)
+        woods['grain'] = filename
+        return woods
+    def render(self, tile_rows, woods):
+        '''Returns the contents of the PNG file rendered in tiles of tile_rows'''
+        job = {'double_thickness':4, 'caul':True, 'min_image_width':400,\
+               'image_tile_rows':tile_rows}
+        (config, template, boards, bit, sp) = batch.make_joint(job)
+        boards[0].set_wood('grain')
+        boards[2].set_wood('Dense5Pattern')
+        filename = os.path.join(self.directory, 'tiles%d.png' % tile_rows)
+        qt_fig.render_image(filename, template, boards, bit, sp, config, {'a':'b'}, woods)
+        with open(filename, 'rb') as fd:
+            return fd.read()
+    def test_tiles(self):
+        woods = self.grain()
+        # the tiles match the whole image, pixel for pixel
+        image = self.render(0, woods)
+        for tile_rows in [7, 64]:
+            self.assertEqual(self.render(tile_rows, woods), image)
+
+@unittest.skipUnless(qt_fig and qt_fig.has_display(), 'requires PyQt4 and a display')
+class Texture_Cache_Test(unittest.TestCase):
+    '''
+    Tests Texture_Cache
+    '''
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'wood.png')
+        qt_fig.application()
+        self.save(200, 100)
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    def save(self, width, height):
+        '''Saves an image of width by height pixels to the wood file'''
+        image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+        image.fill(0)
+        image.save(self.filename)
+    def test_target(self):
+        cache = qt_fig.Texture_Cache(1 << 30, 0, QtGui.QImage)
+        self.assertEqual(cache.pixmap(self.filename).size(), QtCore.QSize(200, 100))
+        self.assertEqual(cache.pixmap(self.filename, 64).size(), QtCore.QSize(64, 32))
+        self.assertEqual(cache.pixmap(self.filename, 64).size(), QtCore.QSize(64, 32))
+        # targets larger than the image share the full size pixmap
+        self.assertEqual(cache.pixmap(self.filename, 512).size(), QtCore.QSize(200, 100))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        cache = qt_fig.Texture_Cache(1 << 30, 50, QtGui.QImage)
+        self.assertEqual(cache.pixmap(self.filename, 64).size(), QtCore.QSize(50, 25))
+    def test_refresh(self):
+        cache = qt_fig.Texture_Cache(1 << 30, 0, QtGui.QImage)
+        cache.pixmap(self.filename)
+        self.save(30, 20)
+        # the file is checked for changes only after refresh()
+        self.assertEqual(cache.pixmap(self.filename).size(), QtCore.QSize(200, 100))
+        cache.refresh()
+        self.assertEqual(cache.pixmap(self.filename).size(), QtCore.QSize(30, 20))
+        self.assertEqual(len(cache.entries), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,6 +26,10 @@ from __future__ import print_function
 from future.utils import lrange
 
 import math
+import copy
+import threading
+from array import array
+from collections import OrderedDict
 from utils import my_round
 
 class Router_Exception(Exception):
@@ -161,6 +165,9 @@ class Router_Bit(object):
         if self.angle > 0:
             self.offset = self.depth * math.tan(self.angle * math.pi / 180)
         self.neck = self.width - 2 * self.offset
+    def key(self):
+        '''Returns the tuple of the dimensions, to tell when they change'''
+        return (self.width, self.depth, self.angle, self.neck, self.offset)
     def scale(self, s):
         '''Scales dimensions by the factor s'''
         self.width = my_round(self.width * s)
@@ -308,13 +315,11 @@ class Board(My_Rectangle):
         self.units = new_units
     def set_bottom_cuts(self, cuts, bit):
         '''Sets the bottom cuts for the board'''
-        for c in cuts:
-            c.make_router_passes(bit, self)
+        set_router_passes(cuts, bit, self)
         self.bottom_cuts = cuts
     def set_top_cuts(self, cuts, bit):
         '''Sets the top cuts for the board'''
-        for c in cuts:
-            c.make_router_passes(bit, self)
+        set_router_passes(cuts, bit, self)
         self.top_cuts = cuts
     def _do_cuts(self, bit, cuts, y_nocut, y_cut):
         '''Creates the perimeter coordinates for the given cuts'''
@@ -377,6 +382,211 @@ class Board(My_Rectangle):
         y.append(y[0])
         return (x, y)
 
+def _whole(x):
+    '''
+    Returns x as a whole number of increments, which is what a Cut_Array
+    stores.  Other values, such as floats from a fractional board width, are
+    rounded to the nearest increment.
+    '''
+    if type(x) is int:
+        return x
+    return my_round(x)
+
+def _int_array(values):
+    '''Returns an array of values, each rounded as by _whole()'''
+    try:
+        return array('l', values)
+    except TypeError:
+        return array('l', [_whole(x) for x in values])
+
+class Cut_View(object):
+    '''
+    A single cut of a Cut_Array.  It has the same xmin, xmax, and passes
+    attributes as a Cut, but these read from (and, for xmin and xmax, write
+    to) the storage of the Cut_Array.  A Cut_View is only valid until cuts are
+    inserted or deleted from its Cut_Array.
+    '''
+    __slots__ = ['cuts', 'index']
+    def __init__(self, cuts, index):
+        self.cuts = cuts
+        self.index = index
+    def _get_xmin(self):
+        return self.cuts.xmin[self.index]
+    def _set_xmin(self, xmin):
+        self.cuts.xmin[self.index] = _whole(xmin)
+    def _get_xmax(self):
+        return self.cuts.xmax[self.index]
+    def _set_xmax(self, xmax):
+        self.cuts.xmax[self.index] = _whole(xmax)
+    def _get_passes(self):
+        return self.cuts.get_passes(self.index)
+    xmin = property(_get_xmin, _set_xmin)
+    xmax = property(_get_xmax, _set_xmax)
+    passes = property(_get_passes)
+
+class Cut_Array(object):
+    '''
+    Stores a sequence of cuts in contiguous integer arrays, rather than as a
+    list of Cut objects.
+
+    Attributes:
+
+    xmin: array of the min x-location of each cut.
+    xmax: array of the max x-location of each cut.
+    passes: array of the router passes of all the cuts, in order of the cuts.
+    offsets: array of length len(xmin) + 1.  The passes of cut i are
+             passes[offsets[i]:offsets[i + 1]].  This is the compressed row
+             layout, so that the passes of all the cuts need only one array.
+
+    Indexing with an integer, or iterating, gives Cut_View objects, which have
+    the same attributes as a Cut.  Indexing with a slice gives a new Cut_Array.
+    Renderers may read the arrays directly, without copying them.  Locations
+    that are not whole increments are rounded to the nearest increment.
+    '''
+    def __init__(self, xmin=(), xmax=()):
+        self.xmin = _int_array(xmin)
+        self.xmax = _int_array(xmax)
+        self.passes = array('l')
+        self.offsets = array('l', [0] * (len(self.xmin) + 1))
+    def __len__(self):
+        return len(self.xmin)
+    def _index(self, i):
+        '''Returns the index i as non-negative, following list indexing.'''
+        n = len(self.xmin)
+        if i < 0:
+            i += n
+        if i < 0 or i >= n:
+            raise IndexError('cut index out of range')
+        return i
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            indices = lrange(*i.indices(len(self.xmin)))
+            cuts = Cut_Array([self.xmin[j] for j in indices], [self.xmax[j] for j in indices])
+            cuts.set_passes([self.get_passes(j) for j in indices])
+            return cuts
+        return Cut_View(self, self._index(i))
+    def __setitem__(self, i, cut):
+        i = self._index(i)
+        self.xmin[i] = _whole(cut.xmin)
+        self.xmax[i] = _whole(cut.xmax)
+    def __delitem__(self, i):
+        i = self._index(i)
+        del self.xmin[i]
+        del self.xmax[i]
+        npasses = self.offsets[i + 1] - self.offsets[i]
+        del self.passes[self.offsets[i]:self.offsets[i + 1]]
+        del self.offsets[i]
+        for j in lrange(i, len(self.offsets)):
+            self.offsets[j] -= npasses
+    def __iter__(self):
+        for i in lrange(len(self.xmin)):
+            yield Cut_View(self, i)
+    def get_passes(self, i):
+        '''Returns a list of the passes of cut index i'''
+        return self.passes[self.offsets[i]:self.offsets[i + 1]].tolist()
+    def set_passes(self, passes):
+        '''
+        Sets the passes from a sequence that contains the passes of each cut.
+        '''
+        self.passes = array('l')
+        self.offsets = array('l', [0])
+        for p in passes:
+            self.passes.extend(_int_array(p))
+            self.offsets.append(len(self.passes))
+    def append(self, xmin, xmax):
+        '''Appends the cut with extents xmin and xmax, with no passes'''
+        self.xmin.append(_whole(xmin))
+        self.xmax.append(_whole(xmax))
+        self.offsets.append(self.offsets[-1])
+    def insert(self, i, xmin, xmax):
+        '''Inserts the cut with extents xmin and xmax before index i, with no passes'''
+        n = len(self.xmin)
+        if i < 0:
+            i = max(0, i + n)
+        i = min(i, n)
+        self.xmin.insert(i, _whole(xmin))
+        self.xmax.insert(i, _whole(xmax))
+        self.offsets.insert(i, self.offsets[i])
+    def extend(self, cuts):
+        '''Appends the cuts, which is a Cut_Array or an array of Cut objects'''
+        if isinstance(cuts, Cut_Array):
+            n = len(self.xmin)
+            self.replace(n, n, cuts)
+            return
+        for c in cuts:
+            self.append(c.xmin, c.xmax)
+            self.passes.extend(_int_array(c.passes))
+            self.offsets[-1] = len(self.passes)
+    def replace(self, a, b, cuts):
+        '''
+        Replaces the cuts of index a <= i < b, along with their passes, with the
+        Cut_Array cuts.
+        '''
+        self.xmin[a:b] = cuts.xmin
+        self.xmax[a:b] = cuts.xmax
+        pa = self.offsets[a]
+        pb = self.offsets[b]
+        self.passes[pa:pb] = cuts.passes
+        delta = len(cuts.passes) - (pb - pa)
+        offsets = [pa + o for o in cuts.offsets]
+        offsets.extend([o + delta for o in self.offsets[b + 1:]])
+        self.offsets[a:] = array('l', offsets)
+    def copy(self):
+        '''Returns a copy of the cuts'''
+        cuts = Cut_Array(self.xmin, self.xmax)
+        cuts.passes = array('l', self.passes)
+        cuts.offsets = array('l', self.offsets)
+        return cuts
+    def fingerprint(self):
+        '''Returns an immutable, hashable copy of the cut extents'''
+        return (self.xmin.tostring(), self.xmax.tostring())
+    def sort(self):
+        '''Sorts the cuts in increasing xmin'''
+        order = sorted(lrange(len(self.xmin)), key=self.xmin.__getitem__)
+        passes = [self.get_passes(i) for i in order]
+        self.xmin = array('l', [self.xmin[i] for i in order])
+        self.xmax = array('l', [self.xmax[i] for i in order])
+        self.set_passes(passes)
+    def to_cuts(self):
+        '''Returns the cuts as a list of Cut objects'''
+        cuts = []
+        for i in lrange(len(self.xmin)):
+            c = Cut(self.xmin[i], self.xmax[i])
+            c.passes = self.get_passes(i)
+            cuts.append(c)
+        return cuts
+
+def as_cut_array(cuts):
+    '''
+    Returns cuts as a Cut_Array.  If cuts is already a Cut_Array, it is
+    returned, otherwise it is assumed to be an array of Cut objects, which
+    are copied.
+    '''
+    if isinstance(cuts, Cut_Array):
+        return cuts
+    new_cuts = Cut_Array()
+    new_cuts.extend(cuts)
+    return new_cuts
+
+def validate_cut(xmin, xmax, bit, board):
+    '''
+    Checks whether the cut extents xmin and xmax are valid for the bit and board.
+    '''
+    if xmin >= xmax:
+        raise Router_Exception('cut xmin = %d, xmax = %d: '\
+                               'Must have xmax > xmin!' % (xmin, xmax))
+    if xmin < 0:
+        raise Router_Exception('cut xmin = %d, xmax = %d: '\
+                               'Must have xmin >=0!' % (xmin, xmax))
+    if xmax > board.width:
+        raise Router_Exception('cut xmin = %d, xmax = %d:'
+                               ' Must have xmax < board width (%d)!'\
+                               % (xmin, xmax, board.width))
+    if xmax - xmin < bit.width and xmin > 0 and xmax < board.width:
+        raise Router_Exception('cut xmin = %d, xmax = %d: '\
+                               'Bit width (%d) too large for this cut!'\
+                               % (xmin, xmax, bit.width))
+
 class Cut(object):
     '''
     Cut description.
@@ -397,25 +607,16 @@ class Cut(object):
         '''
         Checks whether the attributes of the cut are valid.
         '''
-        if self.xmin >= self.xmax:
-            raise Router_Exception('cut xmin = %d, xmax = %d: '\
-                                   'Must have xmax > xmin!' % (self.xmin, self.xmax))
-        if self.xmin < 0:
-            raise Router_Exception('cut xmin = %d, xmax = %d: '\
-                                   'Must have xmin >=0!' % (self.xmin, self.xmax))
-        if self.xmax > board.width:
-            raise Router_Exception('cut xmin = %d, xmax = %d:'
-                                   ' Must have xmax < board width (%d)!'\
-                                   % (self.xmin, self.xmax, board.width))
-        if self.xmax - self.xmin < bit.width and self.xmin > 0 and self.xmax < board.width:
-            raise Router_Exception('cut xmin = %d, xmax = %d: '\
-                                   'Bit width (%d) too large for this cut!'\
-                                   % (self.xmin, self.xmax, bit.width))
+        validate_cut(self.xmin, self.xmax, bit, board)
     def make_router_passes(self, bit, board):
-        '''Computes passes for the given bit.'''
+        '''
+        Computes passes for the given bit, by simulating the alternating
+        left and right passes.  This is the reference implementation for
+        pass_layout() and plan_router_passes(), which is what the boards use.
+        '''
         # The logic below assumes bit.width is even
         if bit.width % 2 != 0:
-            Router_Exception('Router-bit width must be even!')
+            raise Router_Exception('Router-bit width must be even!')
         self.validate(bit, board)
         # set current extents of the uncut region
         xL = self.xmin
@@ -453,89 +654,458 @@ class Cut(object):
                                        'Bit width (%d) too large for this cut!'\
                                        % (self.xmin, self.xmax, p, bit.width))
 
-def adjoining_cuts(cuts, bit, board):
+def _pass_count(xmin, xmax, bit):
+    '''Returns the number of passes for a valid cut with extents xmin and xmax'''
+    # The simulation alternates right and left passes, each removing a bit
+    # width, until the remainder fits in one centered pass.  So the number of
+    # passes is the cut width divided by the bit width, rounded up.
+    return -(-(xmax - xmin) // bit.width)
+
+def _pass_layout(xmin, xmax, bit):
+    '''Returns the sorted passes for a valid cut with extents xmin and xmax'''
+    n = _pass_count(xmin, xmax, bit)
+    if n == 1:
+        # A cut narrower than the bit only occurs on an edge.  On the right
+        # edge, the single pass is aligned with xmin, otherwise with xmax.
+        if xmin > 0 and xmax - xmin < bit.width:
+            return [xmin + bit.halfwidth]
+        return [xmax - bit.halfwidth]
+    # n // 2 passes from the left, a centered pass if n is odd, and n // 2
+    # passes from the right
+    nside = n // 2
+    passes = lrange(xmin + bit.halfwidth, xmin + bit.halfwidth + nside * bit.width, bit.width)
+    if n % 2 == 1:
+        passes.append((xmin + xmax) // 2)
+    passes.extend(lrange(xmax - bit.halfwidth - (nside - 1) * bit.width,\
+                         xmax - bit.halfwidth + 1, bit.width))
+    return passes
+
+def pass_count(cut, bit, board):
     '''
-    Given the cuts on an edge, computes the cuts on the adjoining edge.
+    Returns the number of router passes for the cut, without forming the
+    passes.  This is len(pass_layout(cut, bit, board)), in constant time.
+    '''
+    # The logic below assumes bit.width is even
+    if bit.width % 2 != 0:
+        raise Router_Exception('Router-bit width must be even!')
+    validate_cut(cut.xmin, cut.xmax, bit, board)
+    return _pass_count(cut.xmin, cut.xmax, bit)
+
+def pass_layout(cut, bit, board):
+    '''
+    Returns the sorted router passes for the cut.  The passes are identical to
+    those from Cut.make_router_passes(), but are computed directly from the
+    pass count, rather than by simulation.
+    '''
+    # The logic below assumes bit.width is even
+    if bit.width % 2 != 0:
+        raise Router_Exception('Router-bit width must be even!')
+    validate_cut(cut.xmin, cut.xmax, bit, board)
+    return _pass_layout(cut.xmin, cut.xmax, bit)
+
+def plan_router_passes(xmins, xmaxs, bit, board):
+    '''
+    Computes the router passes for all of the cuts on a board edge at once.
+
+    xmins: Sequence of the min x-location of each cut
+    xmaxs: Sequence of the max x-location of each cut
+    bit: A Router_Bit object
+    board: A Board object
+
+    Returns a list with the sorted passes for each cut, as from pass_layout().
+    All of the cuts are validated before any passes are formed.
+    '''
+    # The logic below assumes bit.width is even
+    if bit.width % 2 != 0:
+        raise Router_Exception('Router-bit width must be even!')
+    for (xmin, xmax) in zip(xmins, xmaxs):
+        validate_cut(xmin, xmax, bit, board)
+    return [_pass_layout(xmin, xmax, bit) for (xmin, xmax) in zip(xmins, xmaxs)]
 
-    cuts: An array of Cut objects
+def set_router_passes(cuts, bit, board):
+    '''
+    Sets the passes of each of the cuts, using plan_router_passes().
+
+    cuts: A Cut_Array, or an array of Cut objects
     bit: A Router_Bit object
     board: A Board object
+    '''
+    if isinstance(cuts, Cut_Array):
+        cuts.set_passes(plan_router_passes(cuts.xmin, cuts.xmax, bit, board))
+        return
+    xmins = [c.xmin for c in cuts]
+    xmaxs = [c.xmax for c in cuts]
+    for (c, p) in zip(cuts, plan_router_passes(xmins, xmaxs, bit, board)):
+        c.passes = p
 
-    Returns an array of Cut objects
+def _adjoining_edges(cuts, bit, board):
+    '''
+    Returns the tuple (left, right) of the adjoining cuts that include the left
+    and right edges of the board, where each is either None or a tuple
+    (xmin, xmax).  cuts is a Cut_Array.
     '''
-    nc = len(cuts)
-    adjCuts = []
+    left_cut = None
+    right_cut = None
     # if the left-most input cut does not include the left edge, add an
     # adjoining cut that includes the left edge
-    if cuts[0].xmin > 0:
+    if cuts.xmin[0] > 0:
         left = 0
-        right = my_round(cuts[0].xmin + bit.offset) - board.dheight
+        right = my_round(cuts.xmin[0] + bit.offset) - board.dheight
         if right - left >= board.dheight:
-            adjCuts.append(Cut(left, right))
-    # loop through the input cuts and form an adjoining cut, formed
-    # by looking where the previous cut ended and the current cut starts
-    for i in lrange(1, nc):
-        left = my_round(cuts[i-1].xmax - bit.offset + board.dheight)
-        right = max(left + bit.width, my_round(cuts[i].xmin + bit.offset) - board.dheight)
-        adjCuts.append(Cut(left, right))
+            left_cut = (left, right)
     # if the right-most input cut does not include the right edge, add an
     # adjoining cut that includes this edge
-    if cuts[-1].xmax < board.width:
-        left = my_round(cuts[-1].xmax - bit.offset) + board.dheight
+    if cuts.xmax[-1] < board.width:
+        left = my_round(cuts.xmax[-1] - bit.offset) + board.dheight
         right = board.width
         if right - left >= board.dheight:
-            adjCuts.append(Cut(left, right))
+            right_cut = (left, right)
+    return (left_cut, right_cut)
+
+def _adjoining_interior(cuts, bit, board, i0, i1):
+    '''
+    Returns a Cut_Array of the adjoining cuts formed between the input cuts
+    i-1 and i, for i0 <= i < i1.  cuts is a Cut_Array.
+    '''
+    adjCuts = Cut_Array()
+    # form an adjoining cut by looking where the previous cut ended and the
+    # current cut starts
+    for i in lrange(i0, i1):
+        left = my_round(cuts.xmax[i-1] - bit.offset + board.dheight)
+        right = max(left + bit.width, my_round(cuts.xmin[i] + bit.offset) - board.dheight)
+        adjCuts.append(left, right)
+    return adjCuts
+
+class Cut_Cache(object):
+    '''
+    A least-recently-used cache of computed cuts.  Each entry is a Cut_Array,
+    keyed on an immutable fingerprint of all of the inputs used to compute it.
+
+    Attributes:
+
+    size: Maximum number of entries.  If zero, nothing is cached.
+    hits: Number of lookups that found their entry.
+    misses: Number of lookups that computed their entry.
+
+    The cache may be shared by several threads.
+    '''
+    def __init__(self, size=64):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    def resize(self, size):
+        '''Sets the maximum number of entries, discarding the oldest if needed'''
+        with self.lock:
+            self.size = size
+            self._trim()
+    def clear(self):
+        '''Removes all entries and resets the statistics'''
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+    def get(self, key, compute):
+        '''
+        Returns a copy of the cuts for key.  If key is not cached, the function
+        compute is called with no arguments to form the cuts.
+        '''
+        with self.lock:
+            cuts = self.entries.pop(key, None)
+            if cuts is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if cuts is None:
+            cuts = compute()
+        with self.lock:
+            if self.size > 0:
+                # (re)insert as the most recently used entry
+                self.entries[key] = cuts
+                self._trim()
+        return cuts.copy()
+    def stats(self):
+        '''Returns a dictionary of the cache statistics'''
+        return {'hits':self.hits, 'misses':self.misses,\
+                'entries':len(self.entries), 'size':self.size}
+    def _trim(self):
+        '''Discards the least recently used entries beyond the size'''
+        while len(self.entries) > max(0, self.size):
+            self.entries.popitem(last=False)
+
+# The cache for adjoining_cuts() and caul_cuts()
+cut_cache = Cut_Cache()
+
+def adjoining_cuts(cuts, bit, board):
+    '''
+    Given the cuts on an edge, computes the cuts on the adjoining edge.
+
+    cuts: A Cut_Array, or an array of Cut objects
+    bit: A Router_Bit object
+    board: A Board object
+
+    Returns a Cut_Array.  Results are cached in cut_cache.
+    '''
+    cuts = as_cut_array(cuts)
+    key = ('adjoining', cuts.fingerprint(), bit.width, bit.offset,\
+           board.width, board.dheight)
+    return cut_cache.get(key, lambda: _adjoining_cuts(cuts, bit, board))
+
+def _adjoining_cuts(cuts, bit, board):
+    '''
+    Computes adjoining_cuts(), without caching.
+    '''
+    (left, right) = _adjoining_edges(cuts, bit, board)
+    adjCuts = Cut_Array()
+    if left is not None:
+        adjCuts.append(left[0], left[1])
+    adjCuts.extend(_adjoining_interior(cuts, bit, board, 1, len(cuts)))
+    if right is not None:
+        adjCuts.append(right[0], right[1])
     return adjCuts
 
 def caul_cuts(cuts, bit, board, trim):
     '''
     Given the cuts on an edge, computes the cuts need to make a caul clamp.
 
-    cuts: An array of Cut objects
+    cuts: A Cut_Array, or an array of Cut objects
     bit: A Router_Bit object
     board: A Board object
     trim: Amount to add to each side of cut (or "trim" from each side of finger)
 
-    Returns an array of Cut objects
+    Returns a Cut_Array, including the passes.  Results are cached in cut_cache.
+    '''
+    cuts = as_cut_array(cuts)
+    key = ('caul', cuts.fingerprint(), bit.width, board.width, trim)
+    return cut_cache.get(key, lambda: _caul_cuts(cuts, bit, board, trim))
+
+def _caul_cuts(cuts, bit, board, trim):
     '''
-    new_cuts = []
+    Computes caul_cuts(), without caching.
+    '''
+    new_cuts = _caul_extents(cuts, board, trim)
+    set_router_passes(new_cuts, bit, board)
+    return new_cuts
+
+def _caul_extents(cuts, board, trim):
+    '''
+    Returns a Cut_Array of the caul cuts, without their passes.  See caul_cuts().
+    '''
+    new_cuts = Cut_Array()
     for c in cuts:
         xmin = max(0, c.xmin - trim)
         xmax = min(board.width, c.xmax + trim)
-        cut = Cut(xmin, xmax)
-        cut.make_router_passes(bit, board)
-        new_cuts.append(cut)
+        new_cuts.append(xmin, xmax)
     return new_cuts
 
+def _changed_range(xmin, xmax, cuts):
+    '''
+    Compares the cut extents xmin and xmax to those of the Cut_Array cuts.
+    Returns the tuple (lo, hi), where the cuts differ only for indices
+    lo <= i < hi, or None if the number of cuts differs.
+    '''
+    n = len(cuts)
+    if xmin is None or len(xmin) != n:
+        return None
+    if xmin == cuts.xmin and xmax == cuts.xmax:
+        return (n, n)
+    lo = 0
+    while xmin[lo] == cuts.xmin[lo] and xmax[lo] == cuts.xmax[lo]:
+        lo += 1
+    hi = n
+    while xmin[hi - 1] == cuts.xmin[hi - 1] and xmax[hi - 1] == cuts.xmax[hi - 1]:
+        hi -= 1
+    return (lo, hi)
+
+class Edge_Cuts(object):
+    '''
+    The cuts on a board edge, computed from the cuts on another edge.  The
+    inputs of the last computation are saved, so that only the cuts that
+    depend on changed input cuts are recomputed.
+
+    Attributes:
+
+    kind: How the cuts are formed from the input cuts.  One of 'copy',
+          'adjoining' (see adjoining_cuts()), or 'caul' (see caul_cuts()).
+    cuts: A Cut_Array of the computed cuts, including their passes.
+    '''
+    def __init__(self, kind):
+        self.kind = kind
+        self.cuts = None
+        self.key = None # the inputs, other than the input cuts
+        self.xmin = None # the input cuts
+        self.xmax = None
+        self.has_edges = None # for adjoining cuts, whether each edge is cut
+    def update(self, cuts, bit, board, pass_board, trim, counts):
+        '''
+        Updates the cuts from the input cuts.
+
+        cuts: A Cut_Array of the input cuts
+        bit: A Router_Bit object
+        board: The Board passed to adjoining_cuts() or caul_cuts()
+        pass_board: The Board the cuts are made on, used to form the passes
+        trim: The caul trim
+        counts: A dictionary of work counters, as in Joint_Geometry
+
+        Returns the attribute cuts.
+        '''
+        key = (bit.width, bit.offset, board.width, board.dheight, pass_board.width, trim)
+        changed = None
+        if key == self.key:
+            changed = _changed_range(self.xmin, self.xmax, cuts)
+        # in case of an exception below, force a full computation next time
+        self.key = None
+        ncomputed = None
+        if changed is not None:
+            ncomputed = self._update_range(cuts, bit, board, pass_board, trim,\
+                                           changed[0], changed[1])
+        if ncomputed is None:
+            self._update_all(cuts, bit, board, pass_board, trim)
+            ncomputed = len(self.cuts)
+        self.key = key
+        self.xmin = array('l', cuts.xmin)
+        self.xmax = array('l', cuts.xmax)
+        if ncomputed == 0:
+            counts['edges_skipped'] += 1
+        else:
+            counts['edges_updated'] += 1
+        counts['cuts_computed'] += ncomputed
+        counts['cuts_reused'] += len(self.cuts) - ncomputed
+        return self.cuts
+    def _update_all(self, cuts, bit, board, pass_board, trim):
+        '''Computes all of the cuts'''
+        if self.kind == 'caul':
+            # the caul cuts are on their input board, so include the passes
+            self.cuts = caul_cuts(cuts, bit, board, trim)
+            return
+        if self.kind == 'copy':
+            new_cuts = Cut_Array(cuts.xmin, cuts.xmax)
+        else:
+            new_cuts = adjoining_cuts(cuts, bit, board)
+            (left, right) = _adjoining_edges(cuts, bit, board)
+            self.has_edges = (left is not None, right is not None)
+        set_router_passes(new_cuts, bit, pass_board)
+        self.cuts = new_cuts
+    def _update_range(self, cuts, bit, board, pass_board, trim, lo, hi):
+        '''
+        Recomputes the cuts that depend on the input cuts lo <= i < hi.  Returns
+        the number of cuts recomputed, or None if all of the cuts must be
+        recomputed.
+        '''
+        # Form the list of (first, last, new_cuts), where new_cuts replaces
+        # the cuts first <= i < last
+        replace = []
+        if lo == hi:
+            pass
+        elif self.kind == 'copy':
+            replace.append((lo, hi, Cut_Array(cuts.xmin[lo:hi], cuts.xmax[lo:hi])))
+        elif self.kind == 'caul':
+            replace.append((lo, hi, _caul_extents(cuts[lo:hi], board, trim)))
+        else:
+            # adjoining cut i is formed from input cuts i-1 and i, and the cuts
+            # on the board edges from the first and last input cuts
+            (left, right) = _adjoining_edges(cuts, bit, board)
+            if (left is not None, right is not None) != self.has_edges:
+                return None
+            shift = 0
+            if left is not None:
+                shift = 1
+                if lo == 0:
+                    replace.append((0, 1, Cut_Array([left[0]], [left[1]])))
+            i0 = max(lo, 1)
+            i1 = min(hi + 1, len(cuts))
+            if i1 > i0:
+                replace.append((i0 - 1 + shift, i1 - 1 + shift,\
+                                _adjoining_interior(cuts, bit, board, i0, i1)))
+            if right is not None and hi == len(cuts):
+                n = len(self.cuts)
+                replace.append((n - 1, n, Cut_Array([right[0]], [right[1]])))
+        for (first, last, new_cuts) in replace:
+            set_router_passes(new_cuts, bit, pass_board)
+        # each new_cuts has the same length as the cuts it replaces
+        ncomputed = 0
+        for (first, last, new_cuts) in replace:
+            self.cuts.replace(first, last, new_cuts)
+            ncomputed += len(new_cuts)
+        return ncomputed
+
 class Joint_Geometry(object):
     '''
     Computes and stores all of the geometry attributes of the joint.
+
+    Call update() when any of the inputs change.  The cuts on each board edge
+    are recomputed only if their inputs changed, and then only the cuts that
+    depend on the changed input cuts.  The dictionary attribute counts tallies
+    the work done over all updates:
+
+    edges_updated: number of board edges with recomputed cuts
+    edges_skipped: number of board edges with unchanged inputs
+    cuts_computed: number of cuts (and their passes) recomputed
+    cuts_reused: number of cuts (and their passes) reused
     '''
     def __init__(self, template, boards, bit, spacing, margins, caul_trim):
+        self.counts = {'edges_updated':0, 'edges_skipped':0,\
+                       'cuts_computed':0, 'cuts_reused':0}
+        self.edges = {}
+        self.update(template, boards, bit, spacing, margins, caul_trim)
+
+    def edge_cuts(self, name, kind, cuts, bit, board, pass_board, trim=0):
+        '''
+        Returns the cuts on the edge called name, updated from the input cuts.
+        See Edge_Cuts.update() for the arguments.
+        '''
+        if name not in self.edges:
+            self.edges[name] = Edge_Cuts(kind)
+        return self.edges[name].update(cuts, bit, board, pass_board, trim, self.counts)
+
+    def snapshot(self):
+        '''
+        Returns a copy of the geometry, with its own copies of the cuts, that
+        later updates do not change.  The snapshot itself cannot be updated.
+        '''
+        geom = copy.copy(self)
+        geom.edges = None
+        geom.boards = [copy.copy(b) for b in self.boards]
+        for b in geom.boards:
+            if b.top_cuts is not None:
+                b.top_cuts = b.top_cuts.copy()
+            if b.bottom_cuts is not None:
+                b.bottom_cuts = b.bottom_cuts.copy()
+        if self.caul_top is not None:
+            geom.caul_top = self.caul_top.copy()
+            geom.caul_bottom = self.caul_bottom.copy()
+        geom.counts = dict(self.counts)
+        return geom
+
+    def update(self, template, boards, bit, spacing, margins, caul_trim):
+        '''
+        Updates the geometry for the inputs.
+        '''
         self.template = template
         self.boards = boards
         self.bit = bit
         self.spacing = spacing
 
         # determine all the cuts from the a-cuts (index 0)
-        last = spacing.cuts
-        self.boards[0].set_bottom_cuts(last, bit)
+        last = self.edge_cuts('A', 'copy', as_cut_array(spacing.cuts), bit, boards[0], boards[0])
+        self.boards[0].bottom_cuts = last
         if self.boards[3].active:
             # double-double case
-            top = adjoining_cuts(last, bit, boards[0])
-            self.boards[3].set_top_cuts(top, bit)
-            last = adjoining_cuts(top, bit, boards[3])
-            self.boards[3].set_bottom_cuts(last, bit)
+            top = self.edge_cuts('DD top', 'adjoining', last, bit, boards[0], boards[3])
+            self.boards[3].top_cuts = top
+            last = self.edge_cuts('DD bottom', 'adjoining', top, bit, boards[3], boards[3])
+            self.boards[3].bottom_cuts = last
         if self.boards[2].active:
             # double and double-double
-            top = adjoining_cuts(last, bit, boards[0])
-            self.boards[2].set_top_cuts(top, bit)
-            last = adjoining_cuts(top, bit, boards[2])
-            self.boards[2].set_bottom_cuts(last, bit)
+            top = self.edge_cuts('D top', 'adjoining', last, bit, boards[0], boards[2])
+            self.boards[2].top_cuts = top
+            last = self.edge_cuts('D bottom', 'adjoining', top, bit, boards[2], boards[2])
+            self.boards[2].bottom_cuts = last
 
         # make the top cuts on the bottom board
-        top = adjoining_cuts(last, bit, boards[1])
-        self.boards[1].set_top_cuts(top, bit)
+        top = self.edge_cuts('B', 'adjoining', last, bit, boards[1], boards[1])
+        self.boards[1].top_cuts = top
 
         # Create the corners of the template
         self.rect_T = My_Rectangle(margins.left, margins.bottom,
@@ -581,8 +1151,12 @@ class Joint_Geometry(object):
                                           template.length, template.height)
             self.board_caul = My_Rectangle(self.rect_caul.xL() + template.margin, y, \
                                           boards[0].width, template.height)
-            self.caul_top = caul_cuts(self.boards[0].bottom_cuts, bit, boards[0], caul_trim)
-            self.caul_bottom = caul_cuts(self.boards[1].top_cuts, bit, boards[1], caul_trim)
+            self.caul_top = self.edge_cuts('caul top', 'caul', self.boards[0].bottom_cuts,\
+                                           bit, boards[0], boards[0], caul_trim)
+            self.caul_bottom = self.edge_cuts('caul bottom', 'caul', self.boards[1].top_cuts,\
+                                              bit, boards[1], boards[1], caul_trim)
         else:
             self.rect_caul = None
             self.board_caul = None
+            self.caul_top = None
+            self.caul_bottom = None
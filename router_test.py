@@ -0,0 +1,283 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Tests for router
+'''
+from future.utils import lrange
+
+import copy
+import random
+import unittest
+import router
+import spacing
+import utils
+
+class Config(object):
+    '''
+    The configuration attributes needed by the spacing algorithms
+    '''
+    min_finger_width = 2
+    debug = False
+    undo_limit = 100000
+
+def reference_passes(cuts, bit, board):
+    '''Returns the passes for cuts from Cut.make_router_passes()'''
+    passes = []
+    for c in cuts:
+        r = router.Cut(c.xmin, c.xmax)
+        r.make_router_passes(bit, board)
+        passes.append(r.passes)
+    return passes
+
+class Router_Passes_Test(unittest.TestCase):
+    '''
+    Tests pass_layout, pass_count, and plan_router_passes against
+    Cut.make_router_passes
+    '''
+    def setUp(self):
+        self.units = utils.Units()
+    def test_all_cuts(self):
+        for width in lrange(2, 20, 2):
+            bit = router.Router_Bit(self.units, width, 24)
+            for board_width in [20, 37, 60]:
+                board = router.Board(bit, board_width)
+                for xmin in lrange(board_width):
+                    for xmax in lrange(xmin + 1, board_width + 1):
+                        c = router.Cut(xmin, xmax)
+                        try:
+                            c.make_router_passes(bit, board)
+                        except router.Router_Exception:
+                            self.assertRaises(router.Router_Exception,\
+                                              router.plan_router_passes,\
+                                              [xmin], [xmax], bit, board)
+                            self.assertRaises(router.Router_Exception,\
+                                              router.pass_count, c, bit, board)
+                            continue
+                        p = router.plan_router_passes([xmin], [xmax], bit, board)
+                        self.assertEqual(p, [c.passes])
+                        self.assertEqual(router.pass_layout(c, bit, board), c.passes)
+                        self.assertEqual(router.pass_count(c, bit, board), len(c.passes))
+    def test_odd_width(self):
+        bit = router.Router_Bit(self.units, 16, 24)
+        bit.width = 15
+        board = router.Board(bit, width=100)
+        c = router.Cut(10, 50)
+        self.assertRaises(router.Router_Exception, c.make_router_passes, bit, board)
+        self.assertRaises(router.Router_Exception, router.plan_router_passes,\
+                          [10], [50], bit, board)
+        self.assertRaises(router.Router_Exception, router.pass_layout, c, bit, board)
+        self.assertRaises(router.Router_Exception, router.pass_count, c, bit, board)
+    def test_joint_geometry(self):
+        bit = router.Router_Bit(self.units, 16, 24, 7)
+        boards = [router.Board(bit, width=240) for i in lrange(4)]
+        boards[2].set_height(bit, 4)
+        boards[3].set_active(False)
+        template = router.Incra_Template(self.units, boards, True)
+        margins = utils.Margins(8)
+        for sp in [spacing.Equally_Spaced(bit, boards, Config()),\
+                   spacing.Variable_Spaced(bit, boards, Config())]:
+            sp.set_cuts()
+            geom = router.Joint_Geometry(template, boards, bit, sp, margins, 1)
+            for (b, cuts) in [(boards[0], boards[0].bottom_cuts),\
+                              (boards[2], boards[2].top_cuts),\
+                              (boards[2], boards[2].bottom_cuts),\
+                              (boards[1], boards[1].top_cuts),\
+                              (boards[0], geom.caul_top),\
+                              (boards[1], geom.caul_bottom)]:
+                self.assertEqual([c.passes for c in cuts], reference_passes(cuts, bit, b))
+
+def cut_table(geom):
+    '''Returns the extents and passes of all the cuts in the geometry'''
+    table = []
+    edges = [geom.caul_top, geom.caul_bottom]
+    for b in geom.boards:
+        if b.active:
+            edges.extend([b.top_cuts, b.bottom_cuts])
+    for cuts in edges:
+        if cuts is None:
+            table.append(None)
+        else:
+            table.append([(c.xmin, c.xmax, c.passes) for c in cuts])
+    return table
+
+class Joint_Geometry_Update_Test(unittest.TestCase):
+    '''
+    Tests that Joint_Geometry.update() matches a new Joint_Geometry
+    '''
+    def setUp(self):
+        units = utils.Units()
+        self.bit = router.Router_Bit(units, 16, 24, 7)
+        self.boards = [router.Board(self.bit, width=480) for i in lrange(4)]
+        self.boards[2].set_height(self.bit, 4)
+        self.boards[3].set_height(self.bit, 3)
+        self.template = router.Incra_Template(units, self.boards, True)
+        self.margins = utils.Margins(8)
+        sp = spacing.Equally_Spaced(self.bit, self.boards, Config())
+        sp.params['Spacing'].v += 8
+        sp.set_cuts()
+        self.spacing = spacing.Edit_Spaced(self.bit, self.boards, Config())
+        self.spacing.set_cuts(sp.cuts)
+        self.geom = router.Joint_Geometry(self.template, self.boards, self.bit, self.spacing,\
+                                          self.margins, 1)
+    def update(self):
+        '''Updates the geometry and returns the change in its counts'''
+        counts = dict(self.geom.counts)
+        self.geom.update(self.template, self.boards, self.bit, self.spacing, self.margins, 1)
+        for k in counts:
+            counts[k] = self.geom.counts[k] - counts[k]
+        return counts
+    def new_geometry(self):
+        '''Returns a new geometry, computed on copies of the inputs'''
+        (boards, sp) = copy.deepcopy((self.boards, self.spacing))
+        return router.Joint_Geometry(self.template, boards, self.bit, sp, self.margins, 1)
+    def test_no_change(self):
+        counts = self.update()
+        self.assertEqual(counts['cuts_computed'], 0)
+        self.assertEqual(counts['edges_updated'], 0)
+        self.assertEqual(counts['edges_skipped'], 8)
+    def test_move_one_cut(self):
+        self.spacing.cursor_cut = 3
+        self.spacing.active_cuts = [3]
+        self.spacing.cut_move_right()
+        counts = self.update()
+        # each edge recomputes at most one cut more than its input edge
+        self.assertEqual(counts['edges_updated'], 8)
+        self.assertLessEqual(counts['cuts_computed'], 1 + 2 + 3 + 4 + 5 + 6 + 1 + 6)
+        self.assertEqual(cut_table(self.geom), cut_table(self.new_geometry()))
+    def test_random_edits(self):
+        r = random.Random(1)
+        ops = [self.spacing.cut_move_left, self.spacing.cut_move_right,\
+               self.spacing.cut_widen_left, self.spacing.cut_widen_right,\
+               self.spacing.cut_trim_left, self.spacing.cut_trim_right,\
+               self.spacing.cut_add, self.spacing.cut_delete_active]
+        for i in lrange(200):
+            self.spacing.cursor_cut = r.randrange(len(self.spacing.cuts))
+            self.spacing.active_cuts = [self.spacing.cursor_cut]
+            r.choice(ops)()
+            if i % 50 == 0:
+                self.boards[3].set_active(not self.boards[3].active)
+            self.update()
+            self.assertEqual(cut_table(self.geom), cut_table(self.new_geometry()))
+    def test_snapshot(self):
+        snapshot = self.geom.snapshot()
+        table = cut_table(snapshot)
+        sp = self.spacing.snapshot(self.bit, self.boards)
+        self.spacing.cursor_cut = 3
+        self.spacing.active_cuts = [3]
+        self.spacing.cut_move_right()
+        self.update()
+        self.assertEqual(cut_table(snapshot), table)
+        self.assertNotEqual(cut_table(self.geom), table)
+        self.assertNotEqual(sp.cuts.fingerprint(), self.spacing.cuts.fingerprint())
+        self.assertEqual(list(sp.active_cuts), [0])
+
+class Cut_Array_Test(unittest.TestCase):
+    '''
+    Tests Cut_Array
+    '''
+    def setUp(self):
+        self.cuts = router.Cut_Array([10, 0, 30], [20, 5, 40])
+        self.cuts.set_passes([[12, 18], [2], [35]])
+    def test_access(self):
+        self.assertEqual(len(self.cuts), 3)
+        self.assertEqual([(c.xmin, c.xmax) for c in self.cuts], [(10, 20), (0, 5), (30, 40)])
+        self.assertEqual(self.cuts[-1].passes, [35])
+        c = self.cuts[1]
+        c.xmax = 6
+        self.assertEqual(self.cuts.xmax[1], 6)
+        self.assertRaises(IndexError, self.cuts.__getitem__, 3)
+    def test_sort(self):
+        self.cuts.sort()
+        self.assertEqual(self.cuts.xmin.tolist(), [0, 10, 30])
+        self.assertEqual([c.passes for c in self.cuts], [[2], [12, 18], [35]])
+    def test_slice(self):
+        c = self.cuts[1:]
+        self.assertEqual(c.xmin.tolist(), [0, 30])
+        self.assertEqual([p.passes for p in c], [[2], [35]])
+        c = self.cuts[::-1]
+        self.assertEqual(c.xmax.tolist(), [40, 5, 20])
+    def test_insert_delete(self):
+        self.cuts.insert(1, 50, 60)
+        self.cuts.append(70, 80)
+        self.assertEqual(self.cuts.xmin.tolist(), [10, 50, 0, 30, 70])
+        self.assertEqual([c.passes for c in self.cuts], [[12, 18], [], [2], [35], []])
+        del self.cuts[0]
+        self.assertEqual(self.cuts.xmin.tolist(), [50, 0, 30, 70])
+        self.assertEqual([c.passes for c in self.cuts], [[], [2], [35], []])
+    def test_round(self):
+        cuts = router.Cut_Array([10.4, 0], [20, 5.5])
+        cuts.append(30.0, 40)
+        cuts.insert(0, -4.6, 2)
+        cuts[1].xmax = 19.7
+        cuts.set_passes([[0], [12.2, 18], [2], [35]])
+        self.assertEqual(cuts.xmin.tolist(), [-5, 10, 0, 30])
+        self.assertEqual(cuts.xmax.tolist(), [2, 20, 6, 40])
+        self.assertEqual(cuts.passes.tolist(), [0, 12, 18, 2, 35])
+    def test_to_cuts(self):
+        cuts = router.as_cut_array(self.cuts.to_cuts())
+        self.assertEqual(cuts.xmin, self.cuts.xmin)
+        self.assertEqual(cuts.xmax, self.cuts.xmax)
+        self.assertEqual(cuts.passes, self.cuts.passes)
+        self.assertEqual(cuts.offsets, self.cuts.offsets)
+
+class Cut_Cache_Test(unittest.TestCase):
+    '''
+    Tests Cut_Cache, and its use by adjoining_cuts and caul_cuts
+    '''
+    def setUp(self):
+        self.cache = router.Cut_Cache(2)
+        self.computed = []
+    def compute(self, key):
+        '''Returns a function that computes the cuts for key'''
+        def f():
+            self.computed.append(key)
+            return router.Cut_Array([key], [key + 1])
+        return f
+    def test_lru(self):
+        for key in [1, 2, 1, 3, 1, 2]:
+            self.assertEqual(self.cache.get(key, self.compute(key)).xmin.tolist(), [key])
+        # 2 was evicted by 3, since 1 was used more recently
+        self.assertEqual(self.computed, [1, 2, 3, 2])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 4))
+        self.cache.resize(0)
+        self.cache.get(1, self.compute(1))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+    def test_copy(self):
+        self.cache.get(1, self.compute(1)).xmin[0] = 5
+        self.assertEqual(self.cache.get(1, self.compute(1)).xmin.tolist(), [1])
+    def test_cut_functions(self):
+        units = utils.Units()
+        bit = router.Router_Bit(units, 16, 24, 7)
+        board = router.Board(bit, width=240)
+        cuts = router.Cut_Array([0, 50, 120], [30, 80, 150])
+        router.cut_cache.clear()
+        for i in lrange(2):
+            adj = router.adjoining_cuts(cuts, bit, board)
+            caul = router.caul_cuts(cuts, bit, board, 1)
+            self.assertEqual(adj.xmin, router._adjoining_cuts(cuts, bit, board).xmin)
+            self.assertEqual(caul.passes, router._caul_cuts(cuts, bit, board, 1).passes)
+        self.assertEqual((router.cut_cache.hits, router.cut_cache.misses), (2, 2))
+        board.set_height(bit, 4)
+        router.adjoining_cuts(cuts, bit, board)
+        self.assertEqual(router.cut_cache.misses, 3)
+
+if __name__ == '__main__':
+    unittest.main()
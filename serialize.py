@@ -62,7 +62,8 @@ def serialize(bit, boards, sp, config):
         print('serialize', sp_type)
     p.dump(sp_type)
     if sp_type == 'Edit':
-        p.dump(sp.cuts)
+        # Save as Cut objects, so that the format is unchanged
+        p.dump(sp.cuts.to_cuts())
     else:
         p.dump(sp.params)
     s = out.getvalue()
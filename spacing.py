@@ -26,8 +26,12 @@ from __future__ import division
 from future.utils import lrange
 
 import math
+import time
 import copy
-from operator import attrgetter
+import random
+import itertools
+import threading
+from collections import deque
 import router
 import utils
 
@@ -36,6 +40,12 @@ def dump_cuts(cuts):
     for c in cuts:
         print(c.xmin, c.xmax)
 
+def _increments(n):
+    '''Returns the status message text for n increments'''
+    if n == 1:
+        return '1 increment'
+    return '%d increments' % n
+
 class Spacing_Exception(Exception):
     '''
     Exception handler for spacings
@@ -62,6 +72,103 @@ class Spacing_Param(object):
         self.vMax = vMax
         self.v = v
 
+def _popcount(bits):
+    '''Returns the number of set bits of the integer bits >= 0'''
+    return bin(bits).count('1')
+
+class Cut_Selection(object):
+    '''
+    A set of cut indices, stored as the bits of an integer, so that membership
+    and toggling a cut are single bit operations, and deleting a cut shifts
+    the higher indices in one operation.  The number of indices is kept as
+    they are added and removed, so len() is constant time.  Iteration gives
+    the indices in increasing order, in time linear in the largest index.
+    '''
+    def __init__(self, indices=()):
+        self.bits = 0
+        for i in indices:
+            self.bits |= 1 << i
+        self.count = _popcount(self.bits)
+    def __contains__(self, i):
+        return (self.bits >> i) & 1 == 1
+    def __len__(self):
+        return self.count
+    def __iter__(self):
+        # scan the binary digits once, rather than clearing each bit in turn
+        digits = bin(self.bits)[:1:-1]
+        i = digits.find('1')
+        while i >= 0:
+            yield i
+            i = digits.find('1', i + 1)
+    def __eq__(self, other):
+        return list(self) == list(other)
+    def __ne__(self, other):
+        return not self == other
+    def __repr__(self):
+        return repr(list(self))
+    def first(self):
+        '''Returns the smallest index, or None if empty'''
+        if self.bits == 0:
+            return None
+        return (self.bits & -self.bits).bit_length() - 1
+    def last(self):
+        '''Returns the largest index, or None if empty'''
+        if self.bits == 0:
+            return None
+        return self.bits.bit_length() - 1
+    def add(self, i):
+        '''Adds index i'''
+        if i not in self:
+            self.bits |= 1 << i
+            self.count += 1
+    def remove(self, i):
+        '''Removes index i'''
+        if i in self:
+            self.bits &= ~(1 << i)
+            self.count -= 1
+    def toggle(self, i):
+        '''Toggles index i.  Returns True if i is now in the selection.'''
+        self.bits ^= 1 << i
+        if i in self:
+            self.count += 1
+            return True
+        self.count -= 1
+        return False
+    def clear(self):
+        '''Removes all indices'''
+        self.bits = 0
+        self.count = 0
+    def _add_bits(self, bits):
+        '''Adds the indices of the set bits of the integer bits'''
+        self.count += _popcount(bits & ~self.bits)
+        self.bits |= bits
+    def select_range(self, lo, hi):
+        '''Adds the indices lo <= i < hi'''
+        if hi > lo:
+            self._add_bits(((1 << (hi - lo)) - 1) << lo)
+    def select_every(self, k, lo, hi):
+        '''Adds every k-th index, lo, lo + k, lo + 2k, ..., that is < hi'''
+        count = (hi - lo + k - 1) // k
+        if count <= 0:
+            return
+        # form the pattern of count bits, each k apart, by repeated doubling
+        pattern = 1
+        m = 1
+        while m < count:
+            pattern |= pattern << (m * k)
+            m *= 2
+        pattern &= (1 << ((count - 1) * k + 1)) - 1
+        self._add_bits(pattern << lo)
+    def delete(self, i):
+        '''Removes index i, and decrements the indices greater than i'''
+        self.remove(i)
+        low = self.bits & ((1 << i) - 1)
+        self.bits = low | ((self.bits >> (i + 1)) << i)
+    def truncate(self, n):
+        '''Removes the indices >= n'''
+        self.count -= _popcount(self.bits >> n)
+        self.bits &= (1 << n) - 1
+
 class Base_Spacing(object):
     '''
     Base class for spacing algorithms.
@@ -71,11 +178,12 @@ class Base_Spacing(object):
     description: string description of algorithm
     bit: A Router_Bit object.
     boards: A list of Board objects.
-    cuts: A list of Cut objects, which represent the female fingers in Board-A.
+    cuts: A Cut_Array, which represent the female fingers in Board-A.
     cursor_cut: Cut index to highlight perimeter.  Index is with respect to
                    female cuts in Board-A.
-    active_cuts: Cut indices to highlight with fill.  Index is with respect to
-                    female cuts in Board-A.
+    active_cuts: Cut_Selection of the cut indices to highlight with fill.
+                 Index is with respect to female cuts in Board-A.  May be
+                 assigned any sequence of indices.
     labels: list of labels for the Spacing_Params
     id: Unique integer identifier for each concrete class
 
@@ -89,8 +197,8 @@ class Base_Spacing(object):
         self.boards = boards
         self.config = config
         self.cursor_cut = None
-        self.active_cuts = []
-        self.cuts = []
+        self.active_cuts = Cut_Selection()
+        self.cuts = router.Cut_Array()
         self.labels = []
 
         # compute the increase in effective bit width from the double* boards
@@ -100,6 +208,27 @@ class Base_Spacing(object):
             if boards[3].active:
                 self.dhtot += boards[3].dheight
 
+    def _get_active_cuts(self):
+        return self._active_cuts
+    def _set_active_cuts(self, cuts):
+        if not isinstance(cuts, Cut_Selection):
+            cuts = Cut_Selection(cuts)
+        self._active_cuts = cuts
+    active_cuts = property(_get_active_cuts, _set_active_cuts)
+
+    def snapshot(self, bit, boards):
+        '''
+        Returns a shallow copy that uses bit and boards, which are usually
+        copies themselves, with its own copies of the cuts and active cuts.
+        Later edits of this spacing do not change the snapshot.
+        '''
+        sp = copy.copy(self)
+        sp.bit = bit
+        sp.boards = boards
+        sp.cuts = router.as_cut_array(self.cuts).copy()
+        sp.active_cuts = Cut_Selection(self.active_cuts)
+        return sp
+
     def write(self, fd):
         '''Writes the class to a file'''
 
@@ -131,6 +260,7 @@ class Equally_Spaced(Base_Spacing):
         self.params = {}
         for i in lrange(len(t)):
             self.params[self.keys[i]] = t[i]
+        self.table = None # optional Equally_Spaced_Table
 
     def set_cuts(self):
         '''
@@ -140,7 +270,6 @@ class Equally_Spaced(Base_Spacing):
         width = self.params['Width'].v
         centered = self.params['Centered'].v
 
-        board_width = self.boards[0].width
         units = self.bit.units
         label = units.increments_to_string(spacing, True)
         self.labels = self.keys[:]
@@ -148,7 +277,24 @@ class Equally_Spaced(Base_Spacing):
         self.labels[1] += ': ' + units.increments_to_string(width, True)
         self.description = 'Equally spaced (' + self.labels[0] + \
                            ', ' + self.labels[1] + ')'
-        self.cuts = [] # return value
+        self.cuts = None # return value
+        if self.table is not None:
+            self.cuts = self.table.lookup(self.params['Spacing'].v, width, centered,\
+                                          self.bit)
+        if self.cuts is None:
+            self.cuts = self.compute_cuts(self.params['Spacing'].v, width, centered)
+        if self.config.debug:
+            print('e-s cuts:')
+            dump_cuts(self.cuts)
+
+    def compute_cuts(self, spacing, width, centered):
+        '''
+        Returns a Cut_Array of the cuts for the parameter values spacing,
+        width, and centered.  The parameters are not changed.
+        '''
+        spacing -= 2 * self.dhtot
+        board_width = self.boards[0].width
+        cuts = router.Cut_Array()
         neck_width = utils.my_round(self.bit.neck + width - self.bit.width + spacing)
         if neck_width < 1:
             raise Spacing_Exception('Specified bit paramters give a zero'
@@ -163,35 +309,131 @@ class Equally_Spaced(Base_Spacing):
         else:
             left = max(0, (xMid // width) * width)
         right = min(board_width, left + width)
-        self.cuts.append(router.Cut(left, right))
+        cuts.append(left, right)
         # do left side of board
         i = left - neck_width
         min_interior = utils.my_round(self.dhtot + self.bit.offset)
         while i > 0:
             li = max(i - width, 0)
             if i - li > self.config.min_finger_width and i > min_interior:
-                self.cuts.append(router.Cut(li, i))
+                cuts.append(li, i)
             i = li - neck_width
         # do right side of board
         i = right + neck_width
         while i < board_width:
             ri = min(i + width, board_width)
             if ri - i > self.config.min_finger_width and board_width - i > min_interior:
-                self.cuts.append(router.Cut(i, ri))
+                cuts.append(i, ri)
             i = ri + neck_width
         # If we have only one cut the entire width of the board, then
         # the board width is too small for the bit
-        if self.cuts[0].xmin == 0 and self.cuts[0].xmax == board_width:
+        if cuts[0].xmin == 0 and cuts[0].xmax == board_width:
             raise Spacing_Exception('Unable to compute a equally-spaced'\
                                     ' joint for the board and bit parameters'\
                                     ' specified.  This is likely because'\
                                     ' the board width is too small for the'\
                                     ' bit width specified.')
         # sort the cuts in increasing x
-        self.cuts = sorted(self.cuts, key=attrgetter('xmin'))
-        if self.config.debug:
-            print('e-s cuts:')
-            dump_cuts(self.cuts)
+        cuts.sort()
+        return cuts
+
+def _outward(param):
+    '''
+    Generates the values of the Spacing_Param param, starting from its current
+    value and alternating above and below it
+    '''
+    v = min(max(param.v, param.vMin), param.vMax)
+    yield v
+    for d in itertools.count(1):
+        above = v + d <= param.vMax
+        below = v - d >= param.vMin
+        if not (above or below):
+            return
+        if above:
+            yield v + d
+        if below:
+            yield v - d
+
+class Equally_Spaced_Table(object):
+    '''
+    A table of the Equally_Spaced cuts for combinations of its parameters
+    Spacing, Width, and Centered, so that changing the parameters is a lookup.
+    Call start() to fill the table in a background thread, outward from the
+    default parameters, with at most limit layouts if limit is not None.
+    Each layout is a Cut_Array, and identical layouts are stored once.  The table is computed
+    on copies of the bit and boards, so it must be replaced whenever they
+    change.  Lookups for a bit whose dimensions differ from those of the
+    table find nothing.
+
+    Attributes:
+
+    layouts: Dictionary of (spacing, width, centered) to the Cut_Array of
+             cuts, or to the Spacing_Exception raised by those parameters.
+    bit_key: The Router_Bit.key() of the bit of the table.
+    done: True once the table is filled, up to limit layouts.
+    '''
+    def __init__(self, bit, boards, config, limit=None):
+        (bit, boards) = copy.deepcopy((bit, boards))
+        self.spacing = Equally_Spaced(bit, boards, config)
+        self.limit = limit
+        self.bit_key = bit.key()
+        self.layouts = {}
+        self.unique = {} # fingerprint to Cut_Array
+        self.done = False
+        self.stop = threading.Event()
+        self.thread = None
+    def _centered(self, centered):
+        '''Returns the table value of centered, which is ignored for dovetails'''
+        return bool(centered) or self.spacing.bit.angle > 0
+    def keys(self):
+        '''
+        Generates the (spacing, width, centered) keys of the table, outward
+        from the default parameter values
+        '''
+        params = self.spacing.params
+        for width in _outward(params['Width']):
+            for spacing in _outward(params['Spacing']):
+                for centered in set([self._centered(True), self._centered(False)]):
+                    yield (spacing, width, centered)
+    def fill(self):
+        '''Computes the layouts, unless cancel() is called'''
+        for (i, key) in enumerate(self.keys()):
+            if self.stop.is_set():
+                return
+            if i == self.limit:
+                break
+            # let the GUI thread run between layouts
+            time.sleep(0)
+            try:
+                cuts = self.spacing.compute_cuts(*key)
+                fingerprint = cuts.fingerprint()
+                cuts = self.unique.setdefault(fingerprint, cuts)
+            except Spacing_Exception as e:
+                cuts = e
+            self.layouts[key] = cuts
+        self.done = True
+    def start(self):
+        '''Fills the table in a background thread'''
+        self.thread = threading.Thread(target=self.fill)
+        self.thread.daemon = True
+        self.thread.start()
+    def cancel(self):
+        '''Stops filling the table'''
+        self.stop.set()
+    def lookup(self, spacing, width, centered, bit=None):
+        '''
+        Returns a copy of the cuts for the parameter values, or None if they
+        are not yet computed or bit is not the bit of the table.  Raises the
+        Spacing_Exception for parameters that have no valid cuts.
+        '''
+        if bit is not None and bit.key() != self.bit_key:
+            return None
+        cuts = self.layouts.get((spacing, width, self._centered(centered)))
+        if isinstance(cuts, Spacing_Exception):
+            raise cuts
+        if cuts is None:
+            return None
+        return cuts.copy()
 
 class Variable_Spaced(Base_Spacing):
     '''
@@ -223,56 +465,89 @@ class Variable_Spaced(Base_Spacing):
         self.mDefault = (self.mMin + self.mMax) // 2
 
         self.params = {'Fingers':Spacing_Param(self.mMin, self.mMax, self.mDefault)}
+        # the cuts for each number of fingers, and the Router_Bit.key() of
+        # the bit they were computed for
+        self.layouts = None
+        self.layouts_key = None
 
     def set_cuts(self):
         '''
         Sets the cuts to make the joint
         '''
-        board_width = self.boards[0].width
         m = self.params['Fingers'].v
         self.labels = [self.keys[0] + ': %d' % m]
         self.description = 'Variable Spaced (' + self.labels[0] + ')'
+        if self.layouts is None or self.layouts_key != self.bit.key():
+            self.compute_layouts()
+        if isinstance(self.layouts[m], Exception):
+            raise self.layouts[m]
+        self.cuts = self.layouts[m].copy()
+        if self.config.debug:
+            print('v-s cuts:')
+            dump_cuts(self.cuts)
+
+    def compute_layouts(self):
+        '''
+        Computes the cuts for every number of fingers m in [mMin, mMax], and
+        stores them in the dictionary layouts, indexed by m.
+        '''
+        # Adjustments for dovetails
+        deltaP = self.bit.width + 2 * self.dhtot - self.eff_width
+        deltaM = utils.my_round(self.eff_width - self.bit.neck - 2 * self.dhtot)
+        self.layouts = {}
+        self.layouts_key = self.bit.key()
+        for m in lrange(self.mMin, self.mMax + 1):
+            try:
+                self.layouts[m] = self._layout(m, deltaP, deltaM)
+            except ZeroDivisionError as e:
+                # no layout for this m; raise the error if m is selected
+                self.layouts[m] = e
+
+    def _layout(self, m, deltaP, deltaM):
+        '''
+        Returns a Cut_Array of the cuts for m fingers, where deltaP and deltaM
+        are the dovetail adjustments from compute_layouts().
+        '''
+        board_width = self.boards[0].width
+        xMid = board_width // 2
         # c is the ideal center-cut width
         c = self.eff_width * ((m - 1.0) * self.wb - \
                               m * (m + 1.0) + self.alpha * m) /\
             (m * m - 2.0 * m - 1.0 + self.alpha)
         # d is the ideal decrease in finger width for each finger away from center finger
         d = (c - self.eff_width) / (m - 1.0)
-        # compute fingers on one side of the center and the center and store them
-        # in increments.  Keep a running total of sizes.
-        increments = [0] * (m + 1)
-        ivals = 0
-        for i in lrange(1, m + 1):
-            increments[i] = max(2, int(c - d * i))
-            ivals += 2 * increments[i]
-        # Set the center increment.  This takes up the slop in the rounding and increment
-        # resolution.
-        increments[0] = board_width - ivals
+        # compute fingers on one side of the center and store them in
+        # increments.
+        increments = [max(2, int(c - d * i)) for i in lrange(m + 1)]
+        # Set the center increment.  This takes up the slop in the rounding
+        # and increment resolution.
+        increments[0] = board_width - 2 * sum(increments[1:])
+        nfingers = m
         if increments[0] < increments[1]:
             # The center increment is narrower than the adjacent increment,
             # so reset it to the adjacent increment and get rid of a finger.
             increments[0] = increments[1]
-            m -= 1
-        if self.config.debug:
-            print('v-s increments', increments)
-        # Adjustments for dovetails
-        deltaP = self.bit.width + 2 * self.dhtot - self.eff_width
-        deltaM = utils.my_round(self.eff_width - self.bit.neck - 2 * self.dhtot)
+            nfingers -= 1
         # put a cut at the center of the board
-        xMid = board_width // 2
         width = increments[0] + deltaP
         left = max(0, xMid -  width // 2)
         right = min(board_width, left + width)
-        self.cuts = [router.Cut(left, right)]
-        # do the remaining cuts
+        # do the remaining cuts, which are formed in decreasing x on the
+        # left and increasing x on the right
+        xminL = [left]
+        xmaxL = [right]
+        xminR = []
+        xmaxR = []
         do_cut = False
-        for i in lrange(1, m + 1):
+        for i in lrange(1, nfingers + 1):
             if do_cut:
                 width = increments[i] + deltaP
                 farLeft = max(0, left - width)
-                self.cuts.append(router.Cut(farLeft, left))
+                xminL.append(farLeft)
+                xmaxL.append(left)
                 farRight = min(board_width, right + width)
-                self.cuts.append(router.Cut(right, farRight))
+                xminR.append(right)
+                xmaxR.append(farRight)
             else:
                 width = increments[i] - deltaM
                 farLeft = max(0, left - width)
@@ -280,11 +555,210 @@ class Variable_Spaced(Base_Spacing):
             left = farLeft
             right = farRight
             do_cut = (not do_cut)
-        # sort the cuts in increasing x
-        self.cuts = sorted(self.cuts, key=attrgetter('xmin'))
-        if self.config.debug:
-            print('v-s cuts:')
-            dump_cuts(self.cuts)
+        # so the cuts are in increasing x without sorting
+        xminL.reverse()
+        xmaxL.reverse()
+        return router.Cut_Array(xminL + xminR, xmaxL + xmaxR)
+
+class Edit_History(object):
+    '''
+    The undo and redo history of Edit_Spaced.  Rather than a copy of all of
+    the cuts, each entry stores only the cuts that an edit changed, as the
+    tuple (index, old, new), where the Cut_Array new replaced the Cut_Array
+    old starting at cut index.
+
+    Attributes:
+
+    limit: Maximum size of all entries, where each entry's size is its number
+           of cuts plus one.  When exceeded, the oldest undo entries are
+           discarded.
+    truncated: True if any undo entries were discarded.
+    '''
+    def __init__(self, limit):
+        self.limit = limit
+        self.undo_entries = deque()
+        self.redo_entries = []
+        self.size = 0
+        self.truncated = False
+    def _entry_size(self, entry):
+        '''Returns the size of entry, as counted against limit'''
+        return len(entry[1]) + len(entry[2]) + 1
+    def push(self, index, old, new):
+        '''
+        Adds the edit that replaced the cuts old with new, starting at cut
+        index.  Any redo entries are discarded.
+        '''
+        for e in self.redo_entries:
+            self.size -= self._entry_size(e)
+        self.redo_entries = []
+        entry = (index, old, new)
+        self.undo_entries.append(entry)
+        self.size += self._entry_size(entry)
+        # always keep the last entry
+        while self.size > self.limit and len(self.undo_entries) > 1:
+            self.size -= self._entry_size(self.undo_entries.popleft())
+            self.truncated = True
+    def can_undo(self):
+        '''Returns True if there is an edit to undo'''
+        return len(self.undo_entries) > 0
+    def can_redo(self):
+        '''Returns True if there is an undone edit to redo'''
+        return len(self.redo_entries) > 0
+    def undo(self, cuts):
+        '''
+        Undoes the last edit of the Cut_Array cuts.  Returns the range (lo, hi)
+        of the restored cuts, or None if there is nothing to undo.
+        '''
+        if not self.can_undo():
+            return None
+        (index, old, new) = entry = self.undo_entries.pop()
+        cuts.replace(index, index + len(new), old)
+        self.redo_entries.append(entry)
+        return (index, index + len(old))
+    def redo(self, cuts):
+        '''
+        Redoes the last undone edit of the Cut_Array cuts.  Returns the range
+        (lo, hi) of the restored cuts, or None if there is nothing to redo.
+        '''
+        if not self.can_redo():
+            return None
+        (index, old, new) = entry = self.redo_entries.pop()
+        cuts.replace(index, index + len(old), new)
+        self.undo_entries.append(entry)
+        return (index, index + len(new))
+
+class _Gap_Node(object):
+    '''
+    A node of Gap_Index, for one cut.  The maximums and count are over the
+    subtree of the node.
+    '''
+    __slots__ = ('gap', 'width', 'max_gap', 'max_width', 'count', 'left', 'right')
+
+    def __init__(self, gap, width):
+        self.gap = gap
+        self.width = width
+        self.left = None
+        self.right = None
+
+    def fix(self):
+        '''Sets the maximums and count of the subtree from the children'''
+        self.max_gap = self.gap
+        self.max_width = self.width
+        self.count = 1
+        for child in (self.left, self.right):
+            if child is not None:
+                self.max_gap = max(self.max_gap, child.max_gap)
+                self.max_width = max(self.max_width, child.max_width)
+                self.count += child.count
+
+class Gap_Index(object):
+    '''
+    A balanced tree over a Cut_Array, ordered by cut index, which finds the
+    first cut index i >= 1 where either the gap between cuts i-1 and i, or the
+    width of cut i, is at least a given size, in logarithmic time.  Changes to
+    the cuts, including inserts and deletes, are applied with replace() in
+    time proportional to the number of cuts changed, plus a logarithmic cost.
+    '''
+    _NONE = -(1 << 30) # value for cut 0, which has no gap
+
+    def __init__(self, cuts):
+        self.random = random.Random(0) # chooses the roots when merging
+        self.root = self._build(cuts, 0, len(cuts))
+    def __len__(self):
+        if self.root is None:
+            return 0
+        return self.root.count
+    def _build(self, cuts, lo, hi):
+        '''Returns a balanced subtree of the cut indices lo <= i < hi'''
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        if mid == 0:
+            node = _Gap_Node(self._NONE, self._NONE)
+        else:
+            node = _Gap_Node(cuts.xmin[mid] - cuts.xmax[mid - 1],
+                             cuts.xmax[mid] - cuts.xmin[mid])
+        node.left = self._build(cuts, lo, mid)
+        node.right = self._build(cuts, mid + 1, hi)
+        node.fix()
+        return node
+    def _split(self, node, k):
+        '''Splits the subtree node into its first k cuts and the rest'''
+        if node is None:
+            return (None, None)
+        nleft = 0 if node.left is None else node.left.count
+        if k <= nleft:
+            (left, node.left) = self._split(node.left, k)
+            node.fix()
+            return (left, node)
+        (node.right, right) = self._split(node.right, k - nleft - 1)
+        node.fix()
+        return (node, right)
+    def _merge(self, a, b):
+        '''
+        Returns the subtree of the cuts of subtree a followed by those of b.
+        The root is chosen at random, weighted by the counts, which keeps the
+        tree balanced on average.
+        '''
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if self.random.random() * (a.count + b.count) < a.count:
+            a.right = self._merge(a.right, b)
+            a.fix()
+            return a
+        b.left = self._merge(a, b.left)
+        b.fix()
+        return b
+    def replace(self, cuts, lo, count, hi):
+        '''
+        Updates the index for the count cuts starting at index lo being
+        replaced by the cuts lo <= i < hi.
+        '''
+        # the gap of cut hi depends on cut hi - 1, so it is replaced too
+        end = min(hi + 1, len(cuts))
+        (left, rest) = self._split(self.root, lo)
+        right = self._split(rest, count + end - hi)[1]
+        self.root = self._merge(self._merge(left, self._build(cuts, lo, end)), right)
+    def update(self, cuts, lo, hi):
+        '''Updates the index for changes to the extents of the cuts lo <= i < hi'''
+        self.replace(cuts, lo, hi - lo, hi)
+    def leaves(self):
+        '''Returns the list of (gap, width) of the cuts, in order'''
+        result = []
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                result.append((node.gap, node.width))
+                node = node.right
+        return result
+    def first(self, gap, width):
+        '''
+        Returns the first cut index i >= 1 with either a gap to cut i-1 of at
+        least gap, or a width of at least width.  Returns None if there is no
+        such cut.
+        '''
+        node = self.root
+        if node is None or (node.max_gap < gap and node.max_width < width):
+            return None
+        i = 0
+        while True:
+            left = node.left
+            if left is not None:
+                if left.max_gap >= gap or left.max_width >= width:
+                    node = left
+                    continue
+                i += left.count
+            if node.gap >= gap or node.width >= width:
+                return i
+            i += 1
+            node = node.right
 
 class Edit_Spaced(Base_Spacing):
     '''
@@ -294,25 +768,84 @@ class Edit_Spaced(Base_Spacing):
 
     def __init__(self, bit, boards, config):
         Base_Spacing.__init__(self, bit, boards, config)
-        self.undo_cuts = [] # list of cuts to undo
+        self.history = Edit_History(config.undo_limit)
+        self.edit_start = None # the cuts saved by _begin_edit()
+        self.gap_index = None # Gap_Index of cuts, formed when needed
+        self.anchor_cut = 0 # the last toggled cut, for cut_select_range()
         self.params = []
 
     def set_cuts(self, cuts):
         '''
-        Sets cuts to the input cuts
+        Sets cuts to a copy of the input cuts, which is a Cut_Array or an array
+        of Cut objects.
         '''
-        self.cuts = cuts
+        self.cuts = router.as_cut_array(cuts).copy()
         self.labels = []
         self.description = 'Edit spacing'
         self.cursor_cut = 0
+        self.anchor_cut = 0
         self.active_cuts = [self.cursor_cut]
-        self.undo_cuts = []
+        self.history = Edit_History(self.config.undo_limit)
+        self.gap_index = None
 
     def changes_made(self):
         '''
         Returns true if editing changes have been made
         '''
-        return len(self.undo_cuts) > 0
+        return self.history.can_undo() or self.history.truncated
+
+    def _active_range(self):
+        '''
+        Returns (lo, hi), where the active cut indices are in lo <= i < hi
+        '''
+        if len(self.active_cuts) == 0:
+            return (0, 0)
+        return (self.active_cuts.first(), self.active_cuts.last() + 1)
+
+    def _begin_edit(self, lo, hi):
+        '''
+        Saves the cuts lo <= i < hi, which must include all of the cuts that
+        the edit changes, inserts, or deletes.
+        '''
+        self.edit_start = (lo, self.cuts[lo:hi], len(self.cuts))
+
+    def _edit_range(self):
+        '''
+        Returns the (lo, hi) range of the current cuts that replaced the cuts
+        saved by _begin_edit()
+        '''
+        (lo, old, n) = self.edit_start
+        return (lo, lo + len(old) + len(self.cuts) - n)
+
+    def _cancel_edit(self):
+        '''Restores the cuts saved by _begin_edit()'''
+        (lo, hi) = self._edit_range()
+        old = self.edit_start[1]
+        self.cuts.replace(lo, hi, old)
+        self._cuts_changed(lo, len(old), lo + len(old))
+        self.edit_start = None
+
+    def _end_edit(self):
+        '''Adds the edit since _begin_edit() to the history'''
+        (lo, hi) = self._edit_range()
+        old = self.edit_start[1]
+        self.history.push(lo, old, self.cuts[lo:hi])
+        self._cuts_changed(lo, len(old), hi)
+        self.edit_start = None
+
+    def _cuts_changed(self, lo, count, hi):
+        '''
+        Updates the gap index for the count cuts starting at index lo being
+        replaced by the cuts lo <= i < hi.
+        '''
+        if self.gap_index is not None:
+            self.gap_index.replace(self.cuts, lo, count, hi)
+
+    def _clamp_cursor(self):
+        '''Limits the cursor and active cuts to the cut indices'''
+        n = len(self.cuts)
+        self.cursor_cut = min(self.cursor_cut, n - 1)
+        self.active_cuts.truncate(n)
 
     def get_limits(self, f):
         '''
@@ -338,200 +871,192 @@ class Edit_Spaced(Base_Spacing):
         '''
         Undoes the last change to cuts
         '''
-        if len(self.undo_cuts) > 0:
-            self.cuts = self.undo_cuts.pop()
+        n = len(self.cuts)
+        r = self.history.undo(self.cuts)
+        if r is not None:
+            self._cuts_changed(r[0], r[1] - r[0] + n - len(self.cuts), r[1])
+            self._clamp_cursor()
 
-    def cut_move_left(self):
+    def redo(self):
         '''
-        Moves the active cuts 1 increment to the left
+        Redoes the last undone change to cuts
         '''
-        cuts_save = copy.deepcopy(self.cuts)
-        op = []
-        noop = []
-        delete_cut = False
+        n = len(self.cuts)
+        r = self.history.redo(self.cuts)
+        if r is not None:
+            self._cuts_changed(r[0], r[1] - r[0] + n - len(self.cuts), r[1])
+            self._clamp_cursor()
+
+    def _move_once(self, delta):
+        '''
+        Moves the active cuts 1 increment, to the left if delta is negative
+        and to the right if positive, as part of an edit.  Returns (noop,
+        deleted), where noop is the list of cut indices that would be out of
+        their limits, in which case the cuts are restored, and deleted is the
+        index of a cut deleted at the board edge, or None.
+        '''
+        (lo, hi) = self._active_range()
+        saved = self.cuts[lo:hi]
+        n = len(self.cuts)
+        width = self.boards[0].width
+        wNew = self.bit.width + 2 * self.dhtot
+        delete_cut = None
         for f in self.active_cuts:
             c = self.cuts[f]
-            c.xmin = max(0, c.xmin - 1)
-            if c.xmax == 1:
-                # note its possible for only one cut to be deleted
-                delete_cut = True
-            elif c.xmax == self.boards[0].width:
-                # if on the right end, create a new finger if it gets too wide
-                wNew = self.bit.width + 2 * self.dhtot
-                w = c.xmax - c.xmin
-                if w > wNew:
-                    c.xmax -= 1
+            (xmin, xmax) = (c.xmin, c.xmax)
+            if delta < 0:
+                xmin = max(0, xmin - 1)
+                if xmax == 1:
+                    # note its possible for only one cut to be deleted
+                    delete_cut = 0
+                    continue
+                elif xmax < width or xmax - xmin > wNew:
+                    # if on the right end, create a new finger if it gets too wide
+                    xmax -= 1
             else:
-                c.xmax -= 1
-        msg = ''
-        incr = 0
-        if delete_cut:
-            self.cut_delete(0)
-            msg = 'Deleted cut 0 '
-            incr = 1
-        for f in self.active_cuts:
-            if self.check_limits(f):
-                op.append(f + incr)
-            else:
-                noop.append(f + incr)
+                xmax = min(width, xmax + 1)
+                if xmin == width - 1:
+                    # note its possible for only one cut to be deleted
+                    delete_cut = len(self.cuts) - 1
+                    continue
+                elif xmin > 0:
+                    xmin += 1
+                elif xmax - xmin > wNew:
+                    # if on the left end, create a new finger if it gets too wide
+                    xmin = 1
+            c.xmin = xmin
+            c.xmax = xmax
+        if delete_cut is not None:
+            self.cut_delete(delete_cut)
+        noop = [f for f in self.active_cuts if not self.check_limits(f)]
         if len(noop) > 0:
-            self.cuts = cuts_save
+            self.cuts.replace(lo, hi + len(self.cuts) - n, saved)
+        return (noop, delete_cut)
+
+    def cut_move(self, delta):
+        '''
+        Moves the active cuts delta increments, to the left if delta is
+        negative and to the right if positive.  The increments are made one
+        at a time, as a single edit, up to the first one that would move a
+        cut out of its limits, so the result is the same as delta single
+        increments.
+        '''
+        n = abs(delta)
+        if n == 0:
+            return 'Moved no cuts'
+        self._begin_edit(*self._active_range())
+        moved = 0
+        deleted = []
+        noop = []
+        while moved < n:
+            (noop, delete_cut) = self._move_once(delta)
+            if len(noop) > 0:
+                break
+            moved += 1
+            if delete_cut is not None:
+                deleted.append(delete_cut)
+        if moved == 0:
+            self._cancel_edit()
             return 'No cuts moved: unable to move indices ' + `noop`
-        if len(op) > 0 or delete_cut:
-            self.undo_cuts.append(cuts_save)
+        op = list(self.active_cuts)
+        if len(op) == 0 and len(deleted) == 0:
+            self._cancel_edit()
+            return ''
+        self._end_edit()
+        msg = ''.join(['Deleted cut %d ' % f for f in deleted])
         if len(op) > 0:
-            msg += 'Moved cut indices ' + `op` + ' to left 1 increment'
+            side = 'left' if delta < 0 else 'right'
+            msg += 'Moved cut indices ' + `op` + ' to %s %s' % (side, _increments(moved))
+        if len(noop) > 0:
+            msg += '; unable to move indices %s further' % `noop`
         return msg
 
-    def cut_move_right(self):
+    def cut_widen(self, side, delta):
         '''
-        Moves the active cuts 1 increment to the right
+        Increases the active cuts width on side, which is 'left' or 'right',
+        by delta increments, or decreases it if delta is negative.  As in
+        cut_move(), the increments stop at the first one that would take a
+        cut out of its limits.
         '''
-        cuts_save = copy.deepcopy(self.cuts)
-        op = []
-        noop = []
-        delete_cut = False
+        if delta >= 0:
+            (done, verb) = ('Widened', 'widen')
+        else:
+            (done, verb) = ('Trimmed', 'trim')
+        n = abs(delta)
+        if n == 0:
+            return done + ' no cuts'
+        width = self.boards[0].width
+        # the increments each cut allows; widening a side does not change the
+        # limits on that side, so each increment has the same limits
+        room = {}
         for f in self.active_cuts:
             c = self.cuts[f]
-            c.xmax = min(self.boards[0].width, c.xmax + 1)
-            if c.xmin == self.boards[0].width - 1:
-                # note its possible for only one cut to be deleted
-                delete_cut = True
-            elif c.xmin == 0:
-                # if on the left end, create a new finger if it gets too wide
-                wNew = self.bit.width + 2 * self.dhtot
-                w = c.xmax - c.xmin
-                if w > wNew:
-                    c.xmin = 1
+            if delta > 0:
+                (xmin, xmax) = self.get_limits(f)
+                if side == 'left':
+                    room[f] = c.xmin - xmin
+                else:
+                    room[f] = xmax - c.xmax
             else:
-                c.xmin += 1
-        msg = ''
-        incr = 0
-        if delete_cut:
-            f = len(self.cuts) - 1
-            self.cut_delete(f)
-            msg = 'Deleted cut %d ' % f
+                wmin = self.bit.width + 2 * self.dhtot
+                if (side == 'left' and c.xmax == width) or (side == 'right' and c.xmin == 0):
+                    wmin = 1
+                room[f] = c.xmax - c.xmin - wmin
+        if len(room) == 0:
+            return done + ' no cuts'
+        k = max(0, min(n, min(room.values())))
+        noop = sorted([f for f in room if room[f] <= k and k < n])
+        if k == 0:
+            return 'No cuts %s: unable to %s indices ' % (done.lower(), verb) + `noop`
+        self._begin_edit(*self._active_range())
+        shift = k if delta > 0 else -k
         for f in self.active_cuts:
-            if self.check_limits(f):
-                op.append(f)
+            c = self.cuts[f]
+            if side == 'left':
+                c.xmin -= shift
             else:
-                noop.append(f)
+                c.xmax += shift
+        self._end_edit()
+        msg = done + ' cut indices ' + `sorted(room)` + ' on %s %s' % (side, _increments(k))
         if len(noop) > 0:
-            self.cuts = cuts_save
-            return 'No cuts moved: unable to move indices ' + `noop`
-        if len(op) > 0 or delete_cut:
-            self.undo_cuts.append(cuts_save)
-        if len(op) > 0:
-            msg += 'Moved cut indices ' + `op` + ' to right 1 increment'
+            msg += '; unable to %s indices %s further' % (verb, `noop`)
         return msg
 
+    def cut_move_left(self):
+        '''
+        Moves the active cuts 1 increment to the left
+        '''
+        return self.cut_move(-1)
+
+    def cut_move_right(self):
+        '''
+        Moves the active cuts 1 increment to the right
+        '''
+        return self.cut_move(1)
+
     def cut_widen_left(self):
         '''
         Increases the active cuts width on the left side by 1 increment
         '''
-        cuts_save = copy.deepcopy(self.cuts)
-        op = []
-        noop = []
-        for f in self.active_cuts:
-            c = self.cuts[f]
-            (xmin, xmax) = self.get_limits(f)
-            if c.xmin > xmin:
-                c.xmin -= 1
-                self.cuts[f] = c
-                op.append(f)
-            else:
-                noop.append(f)
-        if len(noop) > 0:
-            self.cuts = cuts_save
-            return 'No cuts widened: unable to widen indices ' + `noop`
-        if len(op) > 0:
-            self.undo_cuts.append(cuts_save)
-            msg = 'Widened cut indices ' + `op` + ' on left 1 increment'
-        else:
-            msg = 'Widened no cuts'
-        return msg
+        return self.cut_widen('left', 1)
 
     def cut_widen_right(self):
         '''
         Increases the active cuts width on the right side by 1 increment
         '''
-        cuts_save = copy.deepcopy(self.cuts)
-        op = []
-        noop = []
-        for f in self.active_cuts:
-            c = self.cuts[f]
-            (xmin, xmax) = self.get_limits(f)
-            if c.xmax < xmax:
-                c.xmax += 1
-                self.cuts[f] = c
-                op.append(f)
-            else:
-                noop.append(f)
-        if len(noop) > 0:
-            self.cuts = cuts_save
-            return 'No cuts widened: unable to widen indices ' + `noop`
-        if len(op) > 0:
-            self.undo_cuts.append(cuts_save)
-            msg = 'Widened cut indices ' + `op` + ' on right 1 increment'
-        else:
-            msg = 'Widened no cuts'
-        return msg
+        return self.cut_widen('right', 1)
 
     def cut_trim_left(self):
         '''
         Decreases the active cuts width on the left side by 1 increment
         '''
-        cuts_save = copy.deepcopy(self.cuts)
-        op = []
-        noop = []
-        for f in self.active_cuts:
-            c = self.cuts[f]
-            wmin = self.bit.width + 2 * self.dhtot
-            if c.xmax == self.boards[0].width:
-                wmin = 1
-            if c.xmax - c.xmin <= wmin:
-                noop.append(f)
-            else:
-                c.xmin += 1
-                self.cuts[f] = c
-                op.append(f)
-        if len(noop) > 0:
-            self.cuts = cuts_save
-            return 'No cuts trimmed: unable to trim indices ' + `noop`
-        if len(op) > 0:
-            self.undo_cuts.append(cuts_save)
-            msg = 'Trimmed cut indices ' + `op` + ' on left 1 increment'
-        else:
-            msg = 'Trimmed no cuts'
-        return msg
+        return self.cut_widen('left', -1)
 
     def cut_trim_right(self):
         '''
         Decreases the active cuts width on the right side by 1 increment
         '''
-        cuts_save = copy.deepcopy(self.cuts)
-        op = []
-        noop = []
-        for f in self.active_cuts:
-            c = self.cuts[f]
-            wmin = self.bit.width + 2 * self.dhtot
-            if c.xmin == 0:
-                wmin = 1
-            if c.xmax - c.xmin <= wmin:
-                noop.append(f)
-            else:
-                c.xmax -= 1
-                self.cuts[f] = c
-                op.append(f)
-        if len(noop) > 0:
-            self.cuts = cuts_save
-            return 'No cuts trimmed: unable to trim indices ' + `noop`
-        if len(op) > 0:
-            self.undo_cuts.append(cuts_save)
-            msg = 'Trimmed cut indices ' + `op` + ' on right 1 increment'
-        else:
-            msg = 'Trimmed no cuts'
-        return msg
+        return self.cut_widen('right', -1)
 
     def cut_increment_cursor(self, inc):
         '''
@@ -544,26 +1069,42 @@ class Edit_Spaced(Base_Spacing):
         '''
         Toggles Increments the cursor cut, cyclicly.  Increment can be positive or negative.
         '''
-        if self.cursor_cut in self.active_cuts:
-            self.active_cuts.remove(self.cursor_cut)
-            msg = 'Deactivated cut index %d' % self.cursor_cut
-        else:
-            self.active_cuts.append(self.cursor_cut)
+        self.anchor_cut = self.cursor_cut
+        if self.active_cuts.toggle(self.cursor_cut):
             msg = 'Activated cut index %d' % self.cursor_cut
+        else:
+            msg = 'Deactivated cut index %d' % self.cursor_cut
         return msg
 
+    def cut_select_range(self):
+        '''
+        Activates the cuts from the last toggled cut to the cursor cut.
+        '''
+        anchor = min(self.anchor_cut, len(self.cuts) - 1)
+        lo = min(anchor, self.cursor_cut)
+        hi = max(anchor, self.cursor_cut)
+        self.active_cuts.select_range(lo, hi + 1)
+        return 'Activated cut indices %d to %d' % (lo, hi)
+
+    def cut_select_every(self, k):
+        '''
+        Activates every k-th cut, starting from the cursor cut.
+        '''
+        self.active_cuts.select_every(k, self.cursor_cut, len(self.cuts))
+        return 'Activated every %d cuts from cut index %d' % (k, self.cursor_cut)
+
     def cut_all_active(self):
         '''
         Sets all cuts as active.
         '''
-        self.active_cuts = lrange(len(self.cuts))
+        self.active_cuts.select_range(0, len(self.cuts))
         return 'All cuts activated'
 
     def cut_all_not_active(self):
         '''
         Deactivate all cuts.
         '''
-        self.active_cuts = []
+        self.active_cuts.clear()
         return 'All cuts deactivated'
 
     def cut_delete(self, f):
@@ -574,31 +1115,23 @@ class Edit_Spaced(Base_Spacing):
         if len(self.cuts) < 2: # don't delete the last cut
             return False
         # delete from the cuts list
-        c = self.cuts[0:f]
-        c.extend(self.cuts[f + 1:])
-        self.cuts = c
+        del self.cuts[f]
         # adjust the cursor appropriately
         if self.cursor_cut >= f and self.cursor_cut > 0:
             self.cursor_cut -= 1
-        # adjust the active cuts list
-        id = self.active_cuts.index(f)
-        c = self.active_cuts[0:id]
-        c.extend(self.active_cuts[id + 1:])
-        self.active_cuts = c
-        for i in lrange(len(self.active_cuts)):
-            if self.active_cuts[i] > f:
-                self.active_cuts[i] -= 1
+        # adjust the active cuts
+        self.active_cuts.delete(f)
         return True
 
     def cut_delete_active(self):
         '''
         Deletes the active cuts.
         '''
-        cuts_save = copy.deepcopy(self.cuts)
+        self._begin_edit(*self._active_range())
         deleted = []
         failed = False
         # delete in reverse order, so that modifications to cuts don't affect index values
-        rev = sorted(self.active_cuts, reverse=True)
+        rev = list(self.active_cuts)[::-1]
         for f in rev:
             if not self.cut_delete(f):
                 failed = True
@@ -607,7 +1140,7 @@ class Edit_Spaced(Base_Spacing):
         self.active_cuts = [self.cursor_cut]
         if len(deleted) > 0:
             msg = 'Deleted cut indices ' + `deleted`
-            self.undo_cuts.append(cuts_save)
+            self._end_edit()
         else:
             msg = 'Deleted no cuts'
         if failed:
@@ -621,7 +1154,7 @@ class Edit_Spaced(Base_Spacing):
         '''
         neck_width = utils.my_round(self.bit.neck)
         index = None
-        cuts_save = copy.deepcopy(self.cuts)
+        split = False # if true, the new cut is split from cut index - 1
         if self.cuts[0].xmin > self.bit.neck:
             if self.config.debug:
                 print('add at left')
@@ -630,22 +1163,23 @@ class Edit_Spaced(Base_Spacing):
             xmax = self.cuts[0].xmin - neck_width
         wadd = 2 * self.bit.width + neck_width
         wdelta = self.bit.width - neck_width
-        for i in lrange(1, len(self.cuts)):
+        # find the first cut with either a wide enough gap to its left, or
+        # that is wide enough to split
+        if self.gap_index is None:
+            self.gap_index = Gap_Index(self.cuts)
+        i = self.gap_index.first(wadd - wdelta, wadd)
+        if i is not None:
+            if self.config.debug:
+                print('add in cut')
             if self.cuts[i].xmin - self.cuts[i - 1].xmax + wdelta >= wadd:
-                if self.config.debug:
-                    print('add in cut')
                 index = i
                 xmin = self.cuts[i - 1].xmax + neck_width
                 xmax = xmin + self.bit.width
-                break
-            elif self.cuts[i].xmax - self.cuts[i].xmin >= wadd:
-                if self.config.debug:
-                    print('add in cut')
+            else:
                 index = i + 1
                 xmin = self.cuts[i].xmax - self.bit.width
                 xmax = self.cuts[i].xmax
-                self.cuts[i].xmax = self.cuts[i].xmin + self.bit.width
-                break
+                split = True
         if index is None and \
            self.cuts[-1].xmax < self.boards[0].width - self.bit.neck:
             if self.config.debug:
@@ -655,11 +1189,15 @@ class Edit_Spaced(Base_Spacing):
             xmin = self.cuts[-1].xmax + neck_width
         if index is None:
             return 'Unable to add cut'
-        self.undo_cuts.append(cuts_save)
-        c = self.cuts[0:index]
-        c.append(router.Cut(xmin, xmax))
-        c.extend(self.cuts[index:])
-        self.cuts = c
+        if split:
+            self._begin_edit(index - 1, index)
+            c = self.cuts[index - 1]
+            c.xmax = c.xmin + self.bit.width
+        else:
+            self._begin_edit(index, index)
+        self.cuts.insert(index, xmin, xmax)
+        self._end_edit()
         self.cursor_cut = index
         self.active_cuts = [index]
+        self.anchor_cut = index
         return 'Added cut'
@@ -0,0 +1,362 @@
+###########################################################################
+#
+# Copyright 2015-2016 Robert B. Lowrie (http://github.com/lowrie)
+#
+# This file is part of pyRouterJig.
+#
+# pyRouterJig is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# pyRouterJig is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# pyRouterJig; see the file LICENSE. If not, see <http://www.gnu.org/licenses/>.
+#
+###########################################################################
+
+'''
+Tests for spacing
+'''
+from future.utils import lrange
+
+import copy
+import random
+import unittest
+import router
+import spacing
+import utils
+from router_test import Config
+
+class Equally_Spaced_Table_Test(unittest.TestCase):
+    '''
+    Tests Equally_Spaced_Table against Equally_Spaced.compute_cuts
+    '''
+    def setUp(self):
+        units = utils.Units()
+        self.bit = router.Router_Bit(units, 16, 24)
+        self.boards = [router.Board(self.bit, width=160) for i in lrange(4)]
+        self.boards[2].set_height(self.bit, 4)
+        self.boards[3].set_active(False)
+    def test_table(self):
+        for angle in [0, 7]:
+            self.bit = router.Router_Bit(self.bit.units, 16, 24, angle)
+            table = spacing.Equally_Spaced_Table(self.bit, self.boards, Config())
+            table.start()
+            table.thread.join()
+            self.assertTrue(table.done)
+            sp = spacing.Equally_Spaced(self.bit, self.boards, Config())
+            for key in table.keys():
+                try:
+                    cuts = sp.compute_cuts(*key)
+                except spacing.Spacing_Exception:
+                    self.assertRaises(spacing.Spacing_Exception, table.lookup, *key)
+                    continue
+                self.assertEqual(table.lookup(*key).fingerprint(), cuts.fingerprint())
+            self.assertTrue(len(table.unique) < len(table.layouts))
+    def test_limit(self):
+        table = spacing.Equally_Spaced_Table(self.bit, self.boards, Config(), 10)
+        table.fill()
+        self.assertTrue(table.done)
+        self.assertEqual(len(table.layouts), 10)
+        # the layouts are those nearest the default parameters
+        params = table.spacing.params
+        self.assertTrue((params['Spacing'].v, params['Width'].v, True) in table.layouts)
+        keys = list(table.keys())
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertEqual(set(table.layouts), set(keys[:10]))
+    def test_set_cuts(self):
+        sp = spacing.Equally_Spaced(self.bit, self.boards, Config())
+        sp.table = spacing.Equally_Spaced_Table(self.bit, self.boards, Config())
+        sp.set_cuts()
+        self.assertEqual(sp.table.layouts, {})
+        cuts = sp.cuts
+        sp.table.fill()
+        sp.set_cuts()
+        self.assertEqual(sp.cuts.fingerprint(), cuts.fingerprint())
+        # the cuts are a copy, so that they may be edited
+        sp.cuts[0].xmin += 1
+        sp.set_cuts()
+        self.assertEqual(sp.cuts.fingerprint(), cuts.fingerprint())
+
+    def test_bit_change(self):
+        self.bit = router.Router_Bit(self.bit.units, 16, 24, 7)
+        sp = spacing.Equally_Spaced(self.bit, self.boards, Config())
+        sp.table = spacing.Equally_Spaced_Table(self.bit, self.boards, Config())
+        sp.table.fill()
+        self.bit.set_depth_from_string('1/2')
+        sp.set_cuts()
+        key = (sp.params['Spacing'].v, sp.params['Width'].v, sp.params['Centered'].v)
+        self.assertEqual(sp.cuts.fingerprint(), sp.compute_cuts(*key).fingerprint())
+        self.assertEqual(sp.table.lookup(*(key + (self.bit,))), None)
+
+class Variable_Spaced_Test(unittest.TestCase):
+    '''
+    Tests the layouts of Variable_Spaced
+    '''
+    def test_layouts(self):
+        units = utils.Units()
+        for angle in [0, 7]:
+            bit = router.Router_Bit(units, 16, 24, angle)
+            boards = [router.Board(bit, width=960) for i in lrange(4)]
+            boards[3].set_active(False)
+            sp = spacing.Variable_Spaced(bit, boards, Config())
+            self.assertEqual(sp.layouts, None)
+            for m in lrange(sp.mMin, sp.mMax + 1):
+                sp.params['Fingers'].v = m
+                sp.set_cuts()
+                cuts = sp.cuts[:]
+                cuts.sort()
+                self.assertEqual(sp.cuts.fingerprint(), cuts.fingerprint())
+                self.assertEqual(len(sp.layouts), sp.mMax - sp.mMin + 1)
+                # the cuts are a copy, so that they may be edited
+                self.assertFalse(sp.cuts is sp.layouts[m])
+
+    def test_bit_change(self):
+        units = utils.Units()
+        bit = router.Router_Bit(units, 16, 24, 7)
+        boards = [router.Board(bit, width=960) for i in lrange(4)]
+        boards[3].set_active(False)
+        sp = spacing.Variable_Spaced(bit, boards, Config())
+        sp.set_cuts()
+        bit.set_depth_from_string('1/2')
+        sp.set_cuts()
+        deltaP = bit.width + 2 * sp.dhtot - sp.eff_width
+        deltaM = utils.my_round(sp.eff_width - bit.neck - 2 * sp.dhtot)
+        cuts = sp._layout(sp.params['Fingers'].v, deltaP, deltaM)
+        self.assertEqual(sp.cuts.fingerprint(), cuts.fingerprint())
+
+class Edit_History_Test(unittest.TestCase):
+    '''
+    Tests the undo and redo history of Edit_Spaced
+    '''
+    def setUp(self):
+        units = utils.Units()
+        bit = router.Router_Bit(units, 16, 24)
+        boards = [router.Board(bit, width=480) for i in lrange(4)]
+        boards[2].set_active(False)
+        boards[3].set_active(False)
+        sp = spacing.Equally_Spaced(bit, boards, Config())
+        sp.params['Spacing'].v = 8
+        sp.set_cuts()
+        self.sp = spacing.Edit_Spaced(bit, boards, Config())
+        self.sp.set_cuts(sp.cuts)
+    def edit(self, n):
+        '''Makes n random edits, and returns the fingerprints of the cuts after each'''
+        r = random.Random(2)
+        ops = [self.sp.cut_move_left, self.sp.cut_move_right,\
+               self.sp.cut_widen_left, self.sp.cut_widen_right,\
+               self.sp.cut_trim_left, self.sp.cut_trim_right,\
+               self.sp.cut_add, self.sp.cut_delete_active]
+        states = [self.sp.cuts.fingerprint()]
+        for i in lrange(n):
+            self.sp.cursor_cut = r.randrange(len(self.sp.cuts))
+            self.sp.active_cuts = r.sample(lrange(len(self.sp.cuts)), min(2, len(self.sp.cuts)))
+            r.choice(ops)()
+            if self.sp.cuts.fingerprint() != states[-1]:
+                states.append(self.sp.cuts.fingerprint())
+        return states
+    def test_undo_redo(self):
+        states = self.edit(300)
+        self.assertEqual(len(self.sp.history.undo_entries), len(states) - 1)
+        for s in reversed(states[:-1]):
+            self.sp.undo()
+            self.assertEqual(self.sp.cuts.fingerprint(), s)
+        self.assertFalse(self.sp.changes_made())
+        for s in states[1:]:
+            self.sp.redo()
+            self.assertEqual(self.sp.cuts.fingerprint(), s)
+        self.sp.undo()
+        self.sp.cut_add()
+        self.assertFalse(self.sp.history.can_redo())
+    def test_limit(self):
+        self.sp.history.limit = 20
+        states = self.edit(100)
+        history = self.sp.history
+        self.assertTrue(history.size <= 20)
+        self.assertTrue(history.truncated)
+        n = len(history.undo_entries)
+        while self.sp.history.can_undo():
+            self.sp.undo()
+        self.assertEqual(self.sp.cuts.fingerprint(), states[-1 - n])
+        self.assertTrue(self.sp.changes_made())
+
+class Gap_Index_Test(unittest.TestCase):
+    '''
+    Tests Gap_Index against a linear search
+    '''
+    def first(self, cuts, gap, width):
+        '''Returns Gap_Index.first(gap, width), by a linear search'''
+        for i in lrange(1, len(cuts)):
+            if cuts.xmin[i] - cuts.xmax[i - 1] >= gap or cuts.xmax[i] - cuts.xmin[i] >= width:
+                return i
+        return None
+    def test_first(self):
+        r = random.Random(3)
+        for n in [1, 2, 7, 64, 100]:
+            x = sorted(r.sample(lrange(10 * n), 2 * n))
+            cuts = router.Cut_Array(x[0::2], x[1::2])
+            index = spacing.Gap_Index(cuts)
+            for k in lrange(50):
+                # shrink a cut, so that the cuts remain ordered
+                i = r.randrange(n)
+                if cuts.xmax[i] - cuts.xmin[i] > 1:
+                    if r.random() < 0.5:
+                        cuts.xmin[i] += 1
+                    else:
+                        cuts.xmax[i] -= 1
+                    index.update(cuts, i, i + 1)
+                for (gap, width) in [(1, 1), (5, 100), (100, 5), (12, 12), (100, 100)]:
+                    self.assertEqual(index.first(gap, width), self.first(cuts, gap, width))
+    def test_replace(self):
+        r = random.Random(5)
+        x = sorted(r.sample(lrange(1000), 40))
+        cuts = router.Cut_Array(x[0::2], x[1::2])
+        index = spacing.Gap_Index(cuts)
+        for k in lrange(200):
+            # replace a range of cuts with fewer, the same, or more cuts
+            lo = r.randrange(len(cuts) + 1)
+            hi = r.randrange(lo, min(lo + 3, len(cuts)) + 1)
+            xmin = 0 if lo == 0 else cuts.xmax[lo - 1]
+            xmax = 1000 if hi == len(cuts) else cuts.xmin[hi]
+            m = min(r.randrange(4), (xmax - xmin - 1) // 2)
+            if len(cuts) - (hi - lo) + m == 0:
+                continue
+            x = sorted(r.sample(lrange(xmin + 1, xmax), 2 * m))
+            cuts.replace(lo, hi, router.Cut_Array(x[0::2], x[1::2]))
+            index.replace(cuts, lo, hi - lo, lo + m)
+            self.assertEqual(len(index), len(cuts))
+            self.assertEqual(index.leaves(), spacing.Gap_Index(cuts).leaves())
+            for (gap, width) in [(1, 1), (5, 100), (100, 5), (30, 30)]:
+                self.assertEqual(index.first(gap, width), self.first(cuts, gap, width))
+    def test_edit(self):
+        test = Edit_History_Test('test_undo_redo')
+        test.setUp()
+        sp = test.sp
+        sp.cut_add()
+        index = sp.gap_index
+        test.edit(200)
+        for k in lrange(50):
+            sp.undo()
+        sp.cut_add()
+        sp.cut_delete_active()
+        self.assertTrue(sp.gap_index is index)
+        self.assertEqual(index.leaves(), spacing.Gap_Index(sp.cuts).leaves())
+
+class Cut_Selection_Test(unittest.TestCase):
+    '''
+    Tests Cut_Selection against a set
+    '''
+    def test_operations(self):
+        r = random.Random(4)
+        sel = spacing.Cut_Selection([3, 1])
+        ref = set([1, 3])
+        for k in lrange(500):
+            i = r.randrange(100)
+            op = r.randrange(7)
+            if op == 0:
+                self.assertEqual(sel.toggle(i), i not in ref)
+                ref ^= set([i])
+            elif op == 1:
+                sel.delete(i)
+                ref = set([j - (j > i) for j in ref if j != i])
+            elif op == 2:
+                sel.select_range(i, i + 7)
+                ref |= set(lrange(i, i + 7))
+            elif op == 3:
+                step = r.randint(1, 9)
+                sel.select_every(step, i, 100)
+                ref |= set(lrange(i, 100, step))
+            elif op == 4:
+                sel.add(i)
+                ref.add(i)
+            elif op == 5:
+                sel.remove(i)
+                ref.discard(i)
+            elif len(ref) > 30:
+                sel.truncate(i)
+                ref = set([j for j in ref if j < i])
+            self.assertEqual(list(sel), sorted(ref))
+            self.assertEqual(len(sel), len(ref))
+            self.assertEqual(i in sel, i in ref)
+            if ref:
+                self.assertEqual((sel.first(), sel.last()), (min(ref), max(ref)))
+    def test_commands(self):
+        test = Edit_History_Test('test_undo_redo')
+        test.setUp()
+        sp = test.sp
+        sp.active_cuts = [5]
+        sp.cursor_cut = 2
+        sp.cut_toggle()
+        sp.cursor_cut = 6
+        sp.cut_select_range()
+        self.assertEqual(list(sp.active_cuts), [2, 3, 4, 5, 6])
+        sp.cut_all_not_active()
+        sp.cursor_cut = 1
+        sp.cut_select_every(3)
+        self.assertEqual(list(sp.active_cuts), lrange(1, len(sp.cuts), 3))
+        sp.cut_delete(4)
+        self.assertEqual(list(sp.active_cuts), [1] + lrange(6, len(sp.cuts), 3))
+
+class Batched_Edit_Test(unittest.TestCase):
+    '''
+    Tests cut_move and cut_widen against repeated single increments
+    '''
+    def test_limit(self):
+        test = Edit_History_Test('test_undo_redo')
+        test.setUp()
+        sp = test.sp
+        ref = copy.deepcopy(sp)
+        (sp.active_cuts, ref.active_cuts) = ([1], [1])
+        msg = sp.cut_widen('right', 1000)
+        self.assertTrue('unable to widen indices [1] further' in msg)
+        for i in lrange(1000):
+            ref.cut_widen_right()
+        self.assertEqual(sp.cuts.fingerprint(), ref.cuts.fingerprint())
+        (lo, hi) = sp.get_limits(1)
+        self.assertEqual(sp.cuts[1].xmax, hi)
+        msg = sp.cut_move(-1000)
+        for i in lrange(1000):
+            ref.cut_move_left()
+        self.assertEqual(sp.cuts.fingerprint(), ref.cuts.fingerprint())
+        self.assertEqual(len(sp.history.undo_entries), 2)
+    def test_batched(self):
+        test = Edit_History_Test('test_undo_redo')
+        test.setUp()
+        sp = test.sp
+        r = random.Random(5)
+        for k in lrange(300):
+            sp.cursor_cut = r.randrange(len(sp.cuts))
+            sp.active_cuts = r.sample(lrange(len(sp.cuts)), min(2, len(sp.cuts)))
+            n = r.randint(1, 20)
+            side = r.choice(['left', 'right'])
+            delta = r.choice([-n, n])
+            ref = copy.deepcopy(sp)
+            if r.random() < 0.5:
+                (batched, single) = (lambda: sp.cut_move(delta), ref.cut_move_left)
+                if delta > 0:
+                    single = ref.cut_move_right
+            else:
+                batched = lambda: sp.cut_widen(side, delta)
+                single = getattr(ref, 'cut_%s_%s' % (['trim', 'widen'][delta > 0], side))
+            undos = len(sp.history.undo_entries)
+            before = sp.cuts.fingerprint()
+            msg = batched()
+            # the single increments past the limit are not made
+            for i in lrange(n):
+                single()
+            self.assertEqual(sp.cuts.fingerprint(), ref.cuts.fingerprint())
+            self.assertEqual(list(sp.active_cuts), list(ref.active_cuts))
+            if msg.startswith('No cuts'):
+                self.assertEqual(sp.cuts.fingerprint(), before)
+                self.assertEqual(len(sp.history.undo_entries), undos)
+            elif sp.cuts.fingerprint() != before:
+                self.assertEqual(len(sp.history.undo_entries), undos + 1)
+            if len(sp.cuts) < 4:
+                sp.cut_add()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,7 +23,7 @@ This module contains base utilities for pyRouterJig
 '''
 from __future__ import division
 
-import math, fractions, os, glob
+import math, os, glob
 
 VERSION = '0.7.7'
 
@@ -33,6 +33,15 @@ def my_round(f):
     '''
     return int(round(f))
 
+def greatest_common_divisor(a, b):
+    '''
+    Returns the greatest common divisor of the integers a and b, as
+    fractions.gcd(), which is not imported so that this module loads quickly.
+    '''
+    while b:
+        (a, b) = (b, a % b)
+    return a
+
 class My_Fraction(object):
     '''
     Represents a number as whole + numerator / denominator, all of which must be
@@ -58,7 +67,7 @@ class My_Fraction(object):
         dwhole = self.numerator // self.denominator
         self.whole += dwhole
         self.numerator -= dwhole * self.denominator
-        gcd = fractions.gcd(self.numerator, self.denominator)
+        gcd = greatest_common_divisor(self.numerator, self.denominator)
         self.numerator /= gcd
         self.denominator /= gcd
     def to_string(self):